@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 15:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_alter_paystackbank_country"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="paystackbank",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="bank_created_id_idx"
+            ),
+        ),
+    ]
@@ -15,6 +15,11 @@ class PaystackBank(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            # Keyset pagination order for the bank listing.
+            models.Index(fields=['-created_at', '-id'], name='bank_created_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.code})"
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from api.serializers import SparseFieldsetMixin
 from .models import PaystackBank, UserBankAccount
 from paystack.api import Verification
 import paystack
@@ -7,7 +8,7 @@ from django.conf import settings
 paystack.api_key = settings.PAYSTACK_SECRET_KEY
 
 
-class PaystackBankSerializer(serializers.ModelSerializer):
+class PaystackBankSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = PaystackBank
         fields = ['id', 'name', 'slug', 'code', 'longcode', 'country', 'currency', 'logo']
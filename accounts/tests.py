@@ -1,3 +1,42 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
+from .models import PaystackBank
 
-# Create your tests here.
+
+
+class PaystackBankListTests(TestCase):
+    """
+    The bank listing answers a conditional GET with 304 until fetch_banks
+    changes, adds or removes a bank.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bank = PaystackBank.objects.create(name="Access Bank", slug="access-bank", code="044", country="Nigeria", currency="NGN")
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_unchanged_banks_are_not_modified(self):
+        first = self.client.get("/api/accounts/banks/")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.client.get("/api/accounts/banks/", HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        self.assertEqual(
+            self.client.get("/api/accounts/banks/", HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304
+        )
+
+        other_page = self.client.get("/api/accounts/banks/?page_size=1", HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(other_page.status_code, 200)
+
+    def test_changed_banks_are_sent_again(self):
+        first = self.client.get("/api/accounts/banks/")
+        PaystackBank.objects.create(name="Zenith Bank", slug="zenith-bank", code="057", country="Nigeria", currency="NGN")
+        second = self.client.get("/api/accounts/banks/", HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(len(second.json()['data']), 2)
+
+        self.bank.name = "Access Bank Plc"
+        self.bank.save()
+        third = self.client.get("/api/accounts/banks/", HTTP_IF_NONE_MATCH=second['ETag'])
+        self.assertEqual(third.status_code, 200)
+        self.assertIn("Access Bank Plc", [bank['name'] for bank in third.json()['data']])
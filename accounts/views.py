@@ -9,6 +9,9 @@ from rest_framework import status
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from django.db import transaction
+from django.db.models import Count, Max
+from api.conditional import make_etag, not_modified, with_validators
+from api.serializers import SPARSE_FIELDSET_PARAMETERS
 
 
 
@@ -23,13 +26,13 @@ class PaystackBankListView(GenericAPIView):
     
     queryset = PaystackBank.objects.all()
     permission_classes = [AllowAny]
-    pagination_class = None
     serializer_class = PaystackBankSerializer
     
     
     @swagger_auto_schema(
         operation_summary="List Paystack Banks",
-        operation_description="Retrieve a list of all paystack banks.",
+        operation_description="Retrieve a page of paystack banks. Follow `pagination.next` for the next page.",
+        manual_parameters=SPARSE_FIELDSET_PARAMETERS,
         responses={
             200: openapi.Response("Paystack Banks List", PaystackBankSerializer(many=True)),
         }
@@ -40,13 +43,22 @@ class PaystackBankListView(GenericAPIView):
         Retrieve a list of all paystack banks.
         """
         
-        banks = self.get_queryset()
+        # Bank rows only change when fetch_banks runs, so the newest update
+        # and the row count are enough to tell whether the client's copy is stale.
+        state = self.get_queryset().aggregate(last_modified=Max('updated_at'), count=Count('id'))
+        etag = make_etag(state['count'], state['last_modified'], request.build_absolute_uri())
+        response = not_modified(request, etag=etag, last_modified=state['last_modified'])
+        if response:
+            return response
+        
+        banks = self.paginate_queryset(self.get_queryset())
         serializer = self.get_serializer(banks, many=True)
-        return Response({
+        return with_validators(Response({
             "success": True,
             "message": "Paystack banks retrieved successfully." if banks else "No paystack banks available.",
-            "data": serializer.data
-        }, status=status.HTTP_200_OK)
+            "data": serializer.data,
+            "pagination": self.paginator.get_links(),
+        }, status=status.HTTP_200_OK), etag=etag, last_modified=state['last_modified'])
 
 
 
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 15:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("affiliate", "0003_remove_affiliatewithdrawalrequest_is_approved_and_more"),
+        ("donations", "0006_donation_archive"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="affiliateearnings",
+            name="donation",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="affiliate_earnings",
+                to="donations.donation",
+            ),
+        ),
+    ]
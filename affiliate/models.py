@@ -20,7 +20,9 @@ class Affiliate(models.Model):
 
 class AffiliateEarnings(models.Model):
     affiliate = models.ForeignKey(Affiliate, on_delete=models.CASCADE, related_name='earnings')
-    donation = models.ForeignKey(Donation, on_delete=models.CASCADE, related_name='affiliate_earnings')
+    # Postgres cannot reference the partitioned donations table, so the
+    # relation is kept by Django alone.
+    donation = models.ForeignKey(Donation, on_delete=models.CASCADE, related_name='affiliate_earnings', db_constraint=False)
     amount_earned = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from api.serializers import SparseFieldsetMixin
 from .models import Affiliate, AffiliateWallet, AffiliateTransaction, AffiliateWithdrawalRequest
 from accounts.models import UserBankAccount
 from .utils import generate_referral_code
@@ -48,7 +49,7 @@ class BecomeAffiliateSerializer(serializers.ModelSerializer):
 
 
 
-class AffiliateWalletSerializer(serializers.ModelSerializer):
+class AffiliateWalletSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = AffiliateWallet
         fields = ['balance']
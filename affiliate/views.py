@@ -9,6 +9,7 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from django.db import transaction
 from .models import AffiliateWallet
+from api.serializers import SPARSE_FIELDSET_PARAMETERS
 
 
 
@@ -63,6 +64,7 @@ class AffiliateWalletView(GenericAPIView):
     @swagger_auto_schema(
         operation_summary="Get Affiliate Wallet",
         operation_description="Retrieve the wallet details of the authenticated affiliate.",
+        manual_parameters=SPARSE_FIELDSET_PARAMETERS,
         responses={
             200: openapi.Response("Affiliate Wallet Details", AffiliateWalletSerializer),
             403: "Forbidden"
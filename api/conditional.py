@@ -0,0 +1,29 @@
+import hashlib
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+
+def make_etag(*parts):
+    """
+    Build a quoted ETag from the given validator parts.
+    """
+    digest = hashlib.md5("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return quote_etag(digest)
+
+
+def not_modified(request, etag=None, last_modified=None):
+    """
+    Return a 304 response when the client's If-None-Match/If-Modified-Since
+    headers still match, otherwise None.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def with_validators(response, etag=None, last_modified=None):
+    if etag:
+        response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
@@ -0,0 +1,50 @@
+import timeit
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from api.renderers import FastJSONRenderer, orjson
+from campaign.views import CampaignListView
+
+
+
+class Command(BaseCommand):
+    help = 'Compares JSONRenderer and FastJSONRenderer on /campaigns/ payloads and checks their output matches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100, help='Campaigns per rendered page')
+        parser.add_argument('--number', type=int, default=200, help='Renders timed per run')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per renderer, the best one is reported')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError('orjson is not installed, FastJSONRenderer would only call JSONRenderer.')
+
+        payload = self.build_payload(options['page_size'])
+        if not payload['data']:
+            raise CommandError('No campaigns to render, create or import some first.')
+
+        stock, fast = JSONRenderer(), FastJSONRenderer()
+        expected = stock.render(payload)
+        if fast.render(payload) != expected:
+            raise CommandError('FastJSONRenderer output differs from JSONRenderer.')
+
+        number = options['number']
+        results = {}
+        for name, renderer in (('JSONRenderer', stock), ('FastJSONRenderer', fast)):
+            best = min(timeit.repeat(lambda: renderer.render(payload), number=number, repeat=options['repeat']))
+            results[name] = best / number
+            self.stdout.write(f'{name:<18} {results[name] * 1e6:9.1f} us/render')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(payload['data'])} campaigns, {len(expected)} bytes, output identical, "
+            f"{results['JSONRenderer'] / results['FastJSONRenderer']:.1f}x faster."
+        ))
+
+    def build_payload(self, page_size):
+        """
+        Build the envelope CampaignListView returns, before rendering.
+        """
+        request = APIRequestFactory().get('/api/campaigns/', {'page_size': page_size})
+        view = CampaignListView.as_view()
+        response = view(request)
+        return response.data
@@ -0,0 +1,172 @@
+import json
+from base64 import b64decode, b64encode
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over a (key, id) pair.
+
+    Each page is fetched with a `WHERE (key, id) < (last_key, last_id)` range
+    condition instead of an OFFSET, so deep pages cost the same as the first
+    one as long as an index matches the ordering.
+
+    The ordering comes from the queryset when it is explicitly ordered, then
+    from `view.keyset_ordering`, then from `ordering` below. The key must be
+    non-null and the id tie-breaker is added automatically.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE or 20
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.key, self.tiebreaker = self.get_ordering(queryset, view)
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['r'])
+
+        ordering = (self.key, self.tiebreaker)
+        if reverse:
+            ordering = tuple(self._invert(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            value, pk = self.clean_cursor(queryset, cursor)
+            queryset = queryset.filter(self._after(ordering, value, pk))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = results
+        return results
+
+    def get_ordering(self, queryset, view):
+        ordering = [field for field in queryset.query.order_by if isinstance(field, str)]
+        if not ordering:
+            ordering = getattr(view, 'keyset_ordering', None) or self.ordering
+
+        key = ordering[0]
+        tiebreaker = '-id' if key.startswith('-') else 'id'
+        return key, tiebreaker
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_links(self):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self._link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({**self.get_links(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(b64decode(encoded.encode('ascii'), altchars=b'-_'))
+            if not isinstance(cursor, dict) or not {'v', 'k', 'r'} <= cursor.keys():
+                raise ValueError
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def clean_cursor(self, queryset, cursor):
+        """
+        The cursor's key and id converted by their fields, so a tampered
+        cursor is a 404 rather than a database error.
+        """
+        try:
+            if cursor['v'] is None or cursor['k'] is None:
+                raise ValueError
+            value = self._key_field(queryset).to_python(cursor['v'])
+            pk = queryset.model._meta.pk.to_python(cursor['k'])
+        except (TypeError, ValueError, ValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    def _key_field(self, queryset):
+        name = self.key.lstrip('-')
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        model = queryset.model
+        *path, name = name.split('__')
+        for part in path:
+            model = model._meta.get_field(part).related_model
+        return model._meta.get_field(name)
+
+    def encode_cursor(self, value, pk, reverse):
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        elif value is not None and not isinstance(value, (int, float, str)):
+            value = str(value)
+        cursor = json.dumps({'v': value, 'k': pk, 'r': int(reverse)}, separators=(',', ':'))
+        return b64encode(cursor.encode('utf-8'), altchars=b'-_').decode('ascii')
+
+    def _link(self, obj, reverse):
+        value = obj
+        for attr in self.key.lstrip('-').split('__'):
+            value = getattr(value, attr)
+        cursor = self.encode_cursor(value, obj.pk, reverse)
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _after(ordering, value, pk):
+        key, tiebreaker = ordering
+        lookup = 'lt' if key.startswith('-') else 'gt'
+        key, tiebreaker = key.lstrip('-'), tiebreaker.lstrip('-')
+        return Q(**{f'{key}__{lookup}': value}) | Q(**{key: value, f'{tiebreaker}__{lookup}': pk})
@@ -0,0 +1,100 @@
+import re
+from decimal import Decimal
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+
+# orjson and the json module agree on every float except these forms:
+# orjson writes exponents without "+" or a leading zero (1e16, 1e-6 against
+# 1e+16, 1e-06) and keeps 1e-5 <= x < 1e-4 positional (0.00001 against
+# 1e-05). The same goes for float keys, which both write as strings. Any
+# number token or key shaped like either sends the payload back through
+# the stock renderer. The searches below start from a literal, so the
+# regex engine can skip through the output quickly; hits inside strings
+# can only err towards the slow path.
+EXPONENT_TAIL = re.compile(rb'e-?[0-9]+(?=[,\]}]|":|$)')
+SMALL_FLOAT = b'0.0000'
+DIVERGENT_FLOAT = re.compile(rb'-?(?:[0-9]+(?:\.[0-9]+)?e-?[0-9]+|0\.0000[0-9]+)')
+MAX_FLOAT_LENGTH = 24
+LINE_SEPARATORS = (b'\xe2\x80\xa8', b'\xe2\x80\xa9')
+
+
+def _is_token(ret, start, end):
+    """
+    True if ret[start:end] is a whole number value or a whole object key.
+    """
+    if ret[end:end + 2] == b'":':
+        return ret[start - 1:start] == b'"' and ret[start - 2:start - 1] in (b'{', b',')
+    return (start == 0 or ret[start - 1] in b':,[') and (end == len(ret) or ret[end] in b',]}')
+
+
+def has_divergent_float(ret):
+    """
+    True if the orjson output has a number token or float key the json
+    module would write differently.
+    """
+    for match in EXPONENT_TAIL.finditer(ret):
+        head = ret[max(match.start() - MAX_FLOAT_LENGTH, 0):match.start()]
+        start = match.start() - (len(head) - len(head.rstrip(b'-.0123456789')))
+        if DIVERGENT_FLOAT.fullmatch(ret, start, match.end()) and _is_token(ret, start, match.end()):
+            return True
+
+    index = ret.find(SMALL_FLOAT)
+    while index != -1:
+        start = index - 1 if ret[index - 1:index] == b'-' else index
+        match = DIVERGENT_FLOAT.match(ret, start)
+        if match and _is_token(ret, start, match.end()):
+            return True
+        index = ret.find(SMALL_FLOAT, index + 1)
+    return False
+
+
+def _default(obj):
+    # Decimals are the common case; skip the isinstance chain for them.
+    if type(obj) is Decimal:
+        return float(obj)
+    return _encoder_default(obj)
+
+
+_encoder_default = JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed, producing
+    the same bytes as the stock renderer. Datetimes, dates, times and UUIDs
+    are encoded natively and Decimals become floats as in DRF's encoder;
+    anything else orjson cannot handle (lazy strings, querysets) goes
+    through DRF's own encoder. Indented output,
+    non-default JSON settings and payloads orjson rejects fall back to the
+    stock renderer. The one difference: NaN and Infinity, which the stock
+    renderer refuses, come out as null.
+    """
+    options = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.can_render_fast(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_default, option=self.options)
+        except (orjson.JSONEncodeError, TypeError, ValueError):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if has_divergent_float(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Match JSONRenderer, which escapes these for JavaScript eval.
+        if b'\xe2\x80' in ret:
+            ret = ret.replace(LINE_SEPARATORS[0], b'\\u2028').replace(LINE_SEPARATORS[1], b'\\u2029')
+        return ret
+
+    def can_render_fast(self, accepted_media_type, renderer_context):
+        if self.encoder_class is not JSONEncoder or not self.compact or self.ensure_ascii or not self.strict:
+            return False
+        return not self.get_indent(accepted_media_type or '', renderer_context or {})
@@ -0,0 +1,87 @@
+from drf_yasg import openapi
+
+
+
+SPARSE_FIELDSET_PARAMETERS = [
+    openapi.Parameter('fields', openapi.IN_QUERY, description="Comma-separated fields to return", type=openapi.TYPE_STRING),
+    openapi.Parameter('omit', openapi.IN_QUERY, description="Comma-separated fields to leave out", type=openapi.TYPE_STRING),
+]
+
+
+def _split(value):
+    return {name.strip() for name in value.split(',') if name.strip()} if value else set()
+
+
+def fieldset_key(request):
+    """
+    Normalised `fields`/`omit` selection of a request, for cache keys and
+    ETags of responses that are not already keyed by their full URL.
+    """
+    fields = ','.join(sorted(_split(request.GET.get('fields'))))
+    omit = ','.join(sorted(_split(request.GET.get('omit'))))
+    return f"fields={fields};omit={omit}"
+
+
+def is_sparse_request(request):
+    # Writes validate against the full serializer whatever the query string says.
+    return request is not None and request.method in ('GET', 'HEAD')
+
+
+def _select_related_paths(tree, prefix=''):
+    for name, children in tree.items():
+        path = f"{prefix}{name}"
+        yield path
+        yield from _select_related_paths(children, f"{path}__")
+
+
+class SparseFieldsetMixin:
+    """
+    Lets GET requests trim a serializer with `?fields=a,b` and `?omit=c`.
+    Dropped fields are removed before serialization, so their methods and
+    properties never run. Unknown names are ignored.
+
+    `Meta.sparse_related` and `Meta.sparse_columns` map a select_related path
+    or model column to the fields that read it; `prune_queryset` drops the
+    join or defers the column once none of those fields are left.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if not is_sparse_request(request):
+            return
+        for name in set(self.fields) - self.requested_fields(request, self.fields):
+            self.fields.pop(name)
+
+    @staticmethod
+    def requested_fields(request, available):
+        requested = _split(request.GET.get('fields'))
+        keep = set(available) & requested if requested else set(available)
+        return keep - _split(request.GET.get('omit'))
+
+    @classmethod
+    def prune_queryset(cls, queryset, request):
+        if not is_sparse_request(request):
+            return queryset
+        meta = cls.Meta
+        available = list(getattr(meta, 'fields', []))
+        kept = cls.requested_fields(request, available)
+        if kept == set(available):
+            return queryset
+
+        related = getattr(meta, 'sparse_related', {})
+        if related and isinstance(queryset.query.select_related, dict):
+            unused = {path for path, names in related.items() if not kept & set(names)}
+            paths = [
+                path for path in _select_related_paths(queryset.query.select_related)
+                if not any(path == prefix or path.startswith(f"{prefix}__") for prefix in unused)
+            ]
+            queryset = queryset.select_related(None)
+            if paths:
+                queryset = queryset.select_related(*paths)
+
+        columns = [
+            column for column, names in getattr(meta, 'sparse_columns', {}).items()
+            if not kept & set(names)
+        ]
+        return queryset.defer(*columns) if columns else queryset
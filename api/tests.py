@@ -1,3 +1,245 @@
+import json
+import uuid
+from base64 import b64encode
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from authentication.models import User
+from campaign.models import Campaign, Category
+from donations.models import Donation
+from .renderers import FastJSONRenderer, orjson
 
-# Create your tests here.
+
+
+def cursor(value, pk, reverse=0):
+    raw = json.dumps({'v': value, 'k': pk, 'r': reverse}).encode('utf-8')
+    return b64encode(raw, altchars=b'-_').decode('ascii')
+
+
+
+class KeysetCursorTests(TestCase):
+    """
+    Tampered cursors are answered with 404, never a database error.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="donor@example.com", password="x", first_name="Ada", last_name="Donor")
+        category = Category.objects.create(name="Health")
+        cls.campaign = Campaign.objects.create(
+            owner=cls.user, category=category, title="Clean water", description="Wells", goal=1000
+        )
+        for amount in (10, 20, 30):
+            Donation.objects.create(campaign=cls.campaign, donor=cls.user, amount=amount)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    BAD_CURSORS = [
+        ('garbage', 1),
+        ('2026-01-01T00:00:00+00:00', 'abc'),
+        (None, 1),
+        ('2026-01-01T00:00:00+00:00', None),
+        (['a'], 1),
+        ({'a': 1}, [1]),
+    ]
+
+    def assert_rejected(self, url):
+        for value, pk in self.BAD_CURSORS:
+            with self.subTest(value=value, pk=pk):
+                cache.clear()
+                response = self.client.get(url, {'cursor': cursor(value, pk)})
+                self.assertEqual(response.status_code, 404)
+
+    def test_campaign_listing_rejects_bad_cursor_values(self):
+        self.assert_rejected("/api/campaigns/")
+        self.assert_rejected("/api/campaigns/?ordering=-progress")
+        self.assert_rejected("/api/campaigns/?ordering=goal")
+
+    def test_donation_history_rejects_bad_cursor_values(self):
+        self.assert_rejected("/api/users/donations/")
+
+    def test_malformed_cursor_is_rejected(self):
+        response = self.client.get("/api/campaigns/", {'cursor': 'not-base64!'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_next_links_still_page_through_everything(self):
+        seen, url = [], "/api/users/donations/?page_size=1"
+        while url:
+            payload = self.client.get(url).json()
+            seen += [donation['id'] for donation in payload['data']]
+            url = payload['pagination']['next']
+        self.assertEqual(sorted(seen), sorted(Donation.objects.values_list('id', flat=True)))
+
+        seen, url = [], "/api/campaigns/?ordering=-progress&page_size=1"
+        while url:
+            cache.clear()
+            payload = self.client.get(url).json()
+            seen += [campaign['slug'] for campaign in payload['data']]
+            url = payload['pagination']['next']
+        self.assertEqual(seen, [self.campaign.slug])
+
+
+
+@skipUnless(orjson, 'FastJSONRenderer only differs from JSONRenderer with orjson installed')
+class FastJSONRendererTests(TestCase):
+    """
+    FastJSONRenderer writes the same bytes as JSONRenderer, including on
+    the floats, separators and keys orjson writes differently on its own.
+    """
+
+    def assert_same_bytes(self, data):
+        expected = JSONRenderer().render(data)
+        self.assertEqual(FastJSONRenderer().render(data), expected, data)
+
+    def assert_fast_path(self, data):
+        expected = JSONRenderer().render(data)
+        with mock.patch.object(JSONRenderer, 'render', side_effect=AssertionError("fell back to JSONRenderer")):
+            self.assertEqual(FastJSONRenderer().render(data), expected, data)
+
+    def test_exponent_floats(self):
+        for value in (1e16, 1.5e300, 1e-6, -2.5e-10, 1e-7, 1.7976931348623157e308, 5e-324, 1e22, 123456789012345678.0):
+            with self.subTest(value=value):
+                self.assert_same_bytes(value)
+                self.assert_same_bytes([value, {"amount": value}, -value])
+                self.assert_same_bytes({"amount": Decimal(repr(value))})
+
+    def test_floats_between_1e5_and_1e4(self):
+        for value in (1e-5, 1.5e-5, 5e-5, 9.99e-5, 0.0000999999, 1.234e-5, 0.0001, 0.00012):
+            with self.subTest(value=value):
+                self.assert_same_bytes([value, -value, {"ratio": value}])
+                self.assert_same_bytes({"ratio": Decimal(str(value))})
+
+    def test_plain_floats_take_the_fast_path(self):
+        self.assert_fast_path({"progress": 12.5, "goal": 1000.0, "values": [0.1, 0.001, 1e15, -3.25, 0.0]})
+        # Number-like strings are strings, not floats.
+        self.assert_fast_path({"note": "1e-05 and 0.00001", "code": "5e16"})
+
+    def test_datetimes(self):
+        for value in (
+            datetime(2026, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc),
+            datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=dt_timezone.utc),
+            datetime(2026, 1, 2, 3, 4, 5, tzinfo=dt_timezone(timedelta(hours=5, minutes=30))),
+            datetime(2026, 1, 2, 3, 4, 5, 120, tzinfo=dt_timezone(timedelta(hours=-8))),
+            datetime(2026, 1, 2, 3, 4, 5),
+            date(2026, 1, 2),
+            time(3, 4, 5, 678),
+        ):
+            with self.subTest(value=value):
+                self.assert_same_bytes({"at": value, "list": [value]})
+
+    def test_uuids_and_non_string_keys(self):
+        self.assert_same_bytes({"id": uuid.UUID("12345678-1234-5678-1234-567812345678"), "ids": [uuid.uuid4()]})
+        self.assert_same_bytes({1: "a", 2.5: "b", True: "c", None: "d", -3: [1, 2]})
+        for key in (1e16, 1e-5, 5e-5, 1e-7):
+            with self.subTest(key=key):
+                self.assert_same_bytes({key: "value"})
+
+    def test_line_separators(self):
+        for text in ("a\u2028b", "a\u2029b", "\u2028\u2029", "caf\u00e9 \u20ac \u2028"):
+            with self.subTest(text=text):
+                self.assert_same_bytes({"text": text, text: [text]})
+
+    def test_campaign_listing_payload(self):
+        user = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        category = Category.objects.create(name="Health \u2028 & Care")
+        now = datetime.now(dt_timezone.utc)
+        for i, goal in enumerate((1000, Decimal("2500.50"), Decimal("0.07"))):
+            Campaign.objects.create(
+                owner=user, category=category, title=f"Clean water {i}", description="Wells\u2029",
+                goal=goal, end_date=now + timedelta(days=i, hours=1),
+            )
+        Donation.objects.create(campaign=Campaign.objects.get(title="Clean water 2"), donor=user, amount=Decimal("0.01"))
+
+        response = APIClient().get("/api/campaigns/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['data']), 3)
+        self.assert_same_bytes(response.data)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+
+
+class SparseFieldsetTests(TestCase):
+    """
+    ?fields= and ?omit= trim GET responses, and the joins and columns only
+    the dropped fields read; writes ignore both.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        category = Category.objects.create(name="Health")
+        cls.campaign = Campaign.objects.create(
+            owner=cls.user, category=category, title="Clean water", description="Wells", goal=1000
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        sql = [query['sql'] for query in queries.captured_queries if 'FROM "campaign_campaign"' in query['sql']]
+        self.assertEqual(len(sql), 1)
+        return response.json()['data'], sql[0]
+
+    def test_fields_keeps_only_the_named_fields(self):
+        for url in ("/api/campaigns/?fields=title,slug", f"/api/campaign/{self.campaign.slug}/?fields=slug,title"):
+            with self.subTest(url=url):
+                data, sql = self.get(url)
+                campaign = data[0] if isinstance(data, list) else data
+                self.assertEqual(campaign, {"title": "Clean water", "slug": self.campaign.slug})
+                self.assertNotIn('"authentication_user"', sql)
+                self.assertNotIn('"campaign_category"', sql)
+                self.assertNotIn('"description"', sql)
+
+    def test_unpruned_listing_reads_everything(self):
+        data, sql = self.get("/api/campaigns/")
+        self.assertIn("description", data[0])
+        self.assertIn('"authentication_user"', sql)
+        self.assertIn('"campaign_category"', sql)
+        self.assertIn('"description"', sql)
+
+    def test_omit_drops_the_named_fields(self):
+        data, sql = self.get("/api/campaigns/?omit=description,owner")
+        self.assertNotIn("description", data[0])
+        self.assertNotIn("owner", data[0])
+        self.assertEqual(data[0]["category"]["name"], "Health")
+        self.assertNotIn('"authentication_user"', sql)
+        self.assertIn('"campaign_category"', sql)
+        self.assertNotIn('"description"', sql)
+
+        data, _ = self.get("/api/campaigns/?fields=title,description&omit=description")
+        self.assertEqual(data[0], {"title": "Clean water"})
+
+    def test_unknown_field_names_are_ignored(self):
+        data, _ = self.get("/api/campaigns/?fields=title,nonexistent")
+        self.assertEqual(data[0], {"title": "Clean water"})
+        data, _ = self.get("/api/campaigns/?omit=nonexistent")
+        self.assertIn("description", data[0])
+        data, _ = self.get("/api/campaigns/?fields=nonexistent")
+        self.assertEqual(data[0], {})
+
+    def test_writes_ignore_fields_and_omit(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.patch("/api/users/profile/?fields=bio&omit=city", {"city": "Lagos"}, format="multipart")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["city"], "Lagos")
+        self.assertIn("country", response.data["data"])
+
+        # Omitted fields are still validated.
+        response = self.client.post("/api/campaigns/?omit=title,goal", {"description": "Wells"}, format="multipart")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("title", response.data["errors"])
+        self.assertIn("goal", response.data["errors"])
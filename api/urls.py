@@ -1,7 +1,9 @@
 from django.urls import path
 from authentication.views import UserRegistrationView, VerifyEmailView, RequestNewOTPView, LoginView, LogoutView, PasswordResetRequestView, PasswordResetView
-from users.views import UserProfileView
-from campaign.views import CategoryListView, CampaignListView, CampaignDetailView
+from users.views import UserProfileView, UserDonationHistoryView
+from campaign.views import CategoryListView, CampaignListView, CampaignSearchView, TrendingCampaignListView, CampaignDetailView, CampaignLiveView
+
+from donations.views import DonateView, CampaignStatsView, DonationExportView, PaystackWebhookView
 
 from accounts.views import PaystackBankListView, AddUserBankAccountView
 
@@ -21,13 +23,20 @@ urlpatterns = [
     
     # Users
     path("users/profile/", UserProfileView.as_view()),
+    path("users/donations/", UserDonationHistoryView.as_view()),
     
     # Category
     path("categories/", CategoryListView.as_view()),
     
     # Campaign
     path("campaigns/", CampaignListView.as_view()),
+    path("campaigns/search/", CampaignSearchView.as_view()),
+    path("campaigns/trending/", TrendingCampaignListView.as_view()),
     path("campaign/<str:slug>/", CampaignDetailView.as_view()),
+    path("campaign/<str:slug>/donate/", DonateView.as_view()),
+    path("campaign/<str:slug>/stats/", CampaignStatsView.as_view()),
+    path("campaign/<str:slug>/donations/export/", DonationExportView.as_view()),
+    path("campaign/<str:slug>/live/", CampaignLiveView.as_view()),
     
     # Accounts
     path("accounts/banks/", PaystackBankListView.as_view()),
@@ -36,4 +45,7 @@ urlpatterns = [
     # Affiliate
     path("affiliate/become-affiliate/", BecomeAffiliateView.as_view()),
     path("affiliate/wallet/", AffiliateWalletView.as_view()),
+    
+    # Webhooks
+    path("webhooks/paystack/", PaystackWebhookView.as_view()),
 ]
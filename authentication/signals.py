@@ -2,7 +2,7 @@ from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from .models import User, EmailOtp, PasswordResetToken
 from django.conf import settings
-from django.core.mail import send_mail
+from outbox.mail import queue_email
 from .utils import send_otp
 
 
@@ -27,10 +27,9 @@ def send_password_reset_email(sender, instance, created, **kwargs):
     if created:
         base_url = getattr(settings, "SITE_URL", "http://localhost:8001")
         reset_link = f"{base_url}/auth/reset-password/{instance.token}/"
-        send_mail(
+        queue_email(
             subject="Password Reset Request",
             message=f"Click the link to reset your password: {reset_link}",
             from_email="noreply@example.com",
             recipient_list=[instance.user.email],
-            fail_silently=False,
         )
\ No newline at end of file
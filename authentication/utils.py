@@ -1,5 +1,5 @@
-from django.core.mail import send_mail
 from django.conf import settings
+from outbox.mail import queue_email
 
 
 
@@ -8,4 +8,4 @@ def send_otp(email, otp_code):
     message = f"Your OTP code is {otp_code}. It will expire in 5 minutes."
     sender_email = settings.EMAIL_HOST_USER
     
-    send_mail(subject, message, sender_email, [email])
\ No newline at end of file
+    queue_email(subject, message, [email], sender_email)
@@ -3,6 +3,9 @@ ASGI config for base project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server (e.g. ``uvicorn base.asgi:application``) for the
+live campaign endpoint, whose idle connections wait on the event loop.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
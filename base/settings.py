@@ -54,11 +54,18 @@ INSTALLED_APPS = [
     "donations",
     "accounts",
     "affiliate",
+    "uploads",
+    "outbox",
 ]
 
 REST_FRAMEWORK = {
-    # 'DEFAULT_PAGINATION_CLASS': 'vendor.pagination.CombinedPagination',
-    # 'PAGE_SIZE': 2,
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
+    
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -112,6 +119,39 @@ DATABASES = {
 }
 
 
+# Cache
+# Campaign responses are cached here. Point CACHE_BACKEND/CACHE_LOCATION at a
+# shared backend such as django.core.cache.backends.redis.RedisCache in
+# production so every worker sees the same version keys.
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+CAMPAIGN_CACHE_TIMEOUT = config('CAMPAIGN_CACHE_TIMEOUT', default=300, cast=int)
+CAMPAIGN_CACHE_VERSION_TIMEOUT = config('CAMPAIGN_CACHE_VERSION_TIMEOUT', default=CAMPAIGN_CACHE_TIMEOUT * 12, cast=int)
+
+# Campaigns receiving more than CAMPAIGN_TOTAL_SHARD_ABOVE donations per
+# second spread their totals over CAMPAIGN_TOTAL_SHARDS rows, and go back to
+# the campaign row below CAMPAIGN_TOTAL_UNSHARD_BELOW. 0 turns it off.
+CAMPAIGN_TOTAL_SHARDS = config('CAMPAIGN_TOTAL_SHARDS', default=16, cast=int)
+CAMPAIGN_TOTAL_SHARD_ABOVE = config('CAMPAIGN_TOTAL_SHARD_ABOVE', default=0, cast=float)
+CAMPAIGN_TOTAL_UNSHARD_BELOW = config('CAMPAIGN_TOTAL_UNSHARD_BELOW', default=2, cast=float)
+
+# Live campaign progress (/campaign/<slug>/live/). PollingBackend pushes
+# donations saved by the same process at once and reads the others, such as
+# those of process_paystack_events, every CAMPAIGN_LIVE_POLL_INTERVAL
+# seconds. campaign.live.RedisBackend with CAMPAIGN_LIVE_REDIS_URL pushes
+# every donation at once, to every worker and node.
+CAMPAIGN_LIVE_BACKEND = config('CAMPAIGN_LIVE_BACKEND', default='campaign.live.PollingBackend')
+CAMPAIGN_LIVE_POLL_INTERVAL = config('CAMPAIGN_LIVE_POLL_INTERVAL', default=2, cast=float)
+CAMPAIGN_LIVE_REDIS_URL = config('CAMPAIGN_LIVE_REDIS_URL', default='')
+CAMPAIGN_LIVE_HEARTBEAT = config('CAMPAIGN_LIVE_HEARTBEAT', default=20, cast=int)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -182,6 +222,14 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS', cast=bool)
 EMAIL_USE_SSL = config('EMAIL_USE_SSL', cast=bool)
 DEFAULT_FROM_EMAIL = 'Product Store'
 
+# Email is queued in the outbox and sent by the send_outgoing_email worker.
+# A failed email waits EMAIL_OUTBOX_RETRY_DELAY seconds, doubled per attempt.
+# Sent emails lose their body at once and are deleted after
+# EMAIL_OUTBOX_KEEP_DAYS days.
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+EMAIL_OUTBOX_RETRY_DELAY = config('EMAIL_OUTBOX_RETRY_DELAY', default=60, cast=int)
+EMAIL_OUTBOX_KEEP_DAYS = config('EMAIL_OUTBOX_KEEP_DAYS', default=7, cast=int)
+
 CLOUDINARY_STORAGE = {
     "CLOUD_NAME": config("CLOUDINARY_CLOUD_NAME"),
     "API_KEY": config("CLOUDINARY_API_KEY"),
@@ -198,5 +246,32 @@ cloudinary.config(
 DEFAULT_FILE_STORAGE = "cloudinary_storage.storage.MediaCloudinaryStorage"
 
 
+# Uploads
+# Images are spooled to UPLOAD_SPOOL_DIR by the API and pushed to storage by
+# the process_uploads worker, so the directory must be shared with the host
+# running it. FileSystemStorageBackend writes under MEDIA_ROOT instead of
+# Cloudinary for local development.
+
+UPLOAD_SPOOL_DIR = config('UPLOAD_SPOOL_DIR', default=str(BASE_DIR / 'spool'))
+UPLOAD_STORAGE_BACKEND = config('UPLOAD_STORAGE_BACKEND', default='uploads.storage.CloudinaryStorageBackend')
+UPLOAD_MAX_ATTEMPTS = config('UPLOAD_MAX_ATTEMPTS', default=5, cast=int)
+# A failed upload waits UPLOAD_RETRY_DELAY seconds, doubled per attempt.
+UPLOAD_RETRY_DELAY = config('UPLOAD_RETRY_DELAY', default=30, cast=int)
+UPLOAD_MAX_IMAGE_SIZE = config('UPLOAD_MAX_IMAGE_SIZE', default=5 * 1024 * 1024, cast=int)
+
+# Resized copies generated for every uploaded image, as (width, height).
+IMAGE_DERIVATIVES = {
+    'thumbnail': (150, 150),
+    'card': (480, 320),
+    'hero': (1200, 630),
+}
+
+MEDIA_ROOT = config('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
+MEDIA_URL = "media/"
+
+
 PAYSTACK_SECRET_KEY = config("PAYSTACK_SECRET_KEY")
-PAYSTACK_PUBLIC_KEY = config("PAYSTACK_PUBLIC_KEY")
\ No newline at end of file
+PAYSTACK_PUBLIC_KEY = config("PAYSTACK_PUBLIC_KEY")
+PAYSTACK_EVENT_MAX_ATTEMPTS = config('PAYSTACK_EVENT_MAX_ATTEMPTS', default=5, cast=int)
+
+AFFILIATE_COMMISSION_PERCENT = config('AFFILIATE_COMMISSION_PERCENT', default=5.0, cast=float)
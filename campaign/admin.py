@@ -13,7 +13,7 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 class CampaignAdmin(admin.ModelAdmin):
-    list_display = ('title', 'owner', 'category', 'goal', 'image', 'start_date', 'end_date', 'is_active')
+    list_display = ('title', 'owner', 'category', 'goal', 'raised_amount', 'donor_count', 'image', 'start_date', 'end_date', 'is_active')
     prepopulated_fields = {'slug': ('title',)}
     search_fields = ('title', 'description')
     ordering = ('-created_at',)
@@ -0,0 +1,115 @@
+import hashlib
+import math
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+# Cached campaign responses are keyed by a version token, so a write only
+# has to replace the token instead of finding and deleting every cached
+# page. Tokens are random rather than counters: if the cache evicts a
+# version key, the next reader starts a fresh token and can never pick up
+# a page cached under an older, reused number.
+CACHE_TIMEOUT = getattr(settings, "CAMPAIGN_CACHE_TIMEOUT", 300)
+# Versions outlive the pages cached under them. An expired version only
+# costs a miss: its successor is a fresh token.
+VERSION_TIMEOUT = max(getattr(settings, "CAMPAIGN_CACHE_VERSION_TIMEOUT", 0), CACHE_TIMEOUT * 2)
+LISTING_VERSION_KEY = "campaign:listing:version"
+
+
+def _campaign_version_key(slug):
+    return f"campaign:{slug}:version"
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def listing_version():
+    return _get_version(LISTING_VERSION_KEY)
+
+
+def campaign_version(slug, create=True):
+    """
+    Version token of a campaign. Only create one for a campaign known to
+    exist, so lookups of unknown slugs leave nothing behind; with
+    create=False this is None until the campaign has a version.
+    """
+    if not create:
+        return cache.get(_campaign_version_key(slug))
+    return _get_version(_campaign_version_key(slug))
+
+
+def start_campaign_version(slug):
+    """
+    Give a campaign its first version token after its data was read.
+    Returns None if a token appeared meanwhile: a write may have bumped
+    it, so what was read must not be cached under it.
+    """
+    version = uuid.uuid4().hex
+    return version if cache.add(_campaign_version_key(slug), version, VERSION_TIMEOUT) else None
+
+
+def bump_listing_version():
+    cache.set(LISTING_VERSION_KEY, uuid.uuid4().hex, VERSION_TIMEOUT)
+
+
+def bump_campaign_versions(slugs):
+    """
+    Invalidate the cached detail pages of the given campaigns and every
+    cached listing page.
+    """
+    cache.set_many({_campaign_version_key(slug): uuid.uuid4().hex for slug in slugs}, VERSION_TIMEOUT)
+    bump_listing_version()
+
+
+def bump_campaign_versions_on_commit(slugs):
+    slugs = list(slugs)
+    transaction.on_commit(lambda: bump_campaign_versions(slugs))
+
+
+def listing_cache_key(request, version):
+    url = hashlib.md5(request.build_absolute_uri().encode("utf-8")).hexdigest()
+    return f"campaign:listing:{version}:{url}"
+
+
+def detail_cache_key(slug, version, fieldset=""):
+    fieldset = hashlib.md5(fieldset.encode("utf-8")).hexdigest()
+    return f"campaign:{slug}:{version}:{fieldset}"
+
+
+def time_fields_change_at(campaigns, now):
+    """
+    When remaining_days or is_expired of any of the campaigns next changes,
+    at most CACHE_TIMEOUT from `now`. remaining_days is (end_date - now).days,
+    so it steps down at end_date less a whole number of days, and is_expired
+    flips on the step at end_date itself.
+    """
+    change_at = now + timedelta(seconds=CACHE_TIMEOUT)
+    for campaign in campaigns:
+        if campaign.end_date:
+            change_at = min(change_at, now + (campaign.end_date - now) % timedelta(days=1))
+    return change_at
+
+
+def get_page(key, now):
+    """
+    (change_at, payload) of a cached response, or (None, None) once its
+    time-dependent fields changed.
+    """
+    cached = cache.get(key)
+    if cached is None or cached[0] <= now:
+        return None, None
+    return cached
+
+
+def set_page(key, payload, change_at, now):
+    timeout = (change_at - now).total_seconds()
+    if timeout > 0:
+        cache.set(key, (change_at, payload), math.ceil(timeout))
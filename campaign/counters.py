@@ -0,0 +1,118 @@
+import math
+import random
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Exp
+from django.utils import timezone
+from . import trending
+from .models import Campaign, CampaignTotalShard
+
+
+# Every donation updates its campaign's totals inside the donation's
+# transaction, so on a busy campaign donations queue on that row's lock.
+# Past CAMPAIGN_TOTAL_SHARD_ABOVE donations per second a campaign switches
+# to CAMPAIGN_TOTAL_SHARDS counter rows picked at random, and
+# fold_campaign_totals adds them back into the campaign row every few
+# seconds. Readers add the unfolded part, see Campaign.total_raised.
+# The campaign's TrendingScore row would be just as hot, so while sharded
+# new donations add their trending weight to the shard too, and the
+# rollup buckets queue their changes (see donations.rollups); both catch
+# up when the campaign is folded.
+SHARDS = getattr(settings, "CAMPAIGN_TOTAL_SHARDS", 16)
+SHARD_ABOVE = getattr(settings, "CAMPAIGN_TOTAL_SHARD_ABOVE", 0)
+UNSHARD_BELOW = getattr(settings, "CAMPAIGN_TOTAL_UNSHARD_BELOW", 2)
+# Write rates are counted in the cache over windows of this many seconds.
+RATE_WINDOW = 10
+
+
+def add_to_totals(campaign_id, amount, count, donated_at=None):
+    """
+    Add a donation delta to a campaign's totals, on the campaign row or on
+    one of its shards. A new donation passes `donated_at` so it is also
+    added to the campaign's trending score.
+    """
+    shards = Campaign.objects.filter(pk=campaign_id).values_list("total_shards", flat=True).first()
+    if not shards:
+        Campaign.objects.filter(pk=campaign_id).adjust_totals(amount, count)
+        note_write(campaign_id)
+        if donated_at is not None:
+            trending.record_donation(campaign_id, amount, donated_at)
+        return
+
+    shard = random.randrange(shards)
+    rows = CampaignTotalShard.objects.filter(campaign_id=campaign_id, shard=shard)
+    changes = {"amount": F("amount") + amount, "count": F("count") + count}
+    if donated_at is not None:
+        weight = Value(float(amount)) * Exp(Value(trending.DECAY) * (Value(donated_at.timestamp()) - F("trending_epoch")))
+        changes.update(trending_velocity=F("trending_velocity") + weight, last_donation_at=donated_at)
+    if not rows.update(**changes):
+        CampaignTotalShard.objects.bulk_create(
+            [CampaignTotalShard(campaign_id=campaign_id, shard=shard)], ignore_conflicts=True
+        )
+        rows.update(**changes)
+
+
+def note_write(campaign_id):
+    """
+    Count a write to an unsharded campaign and shard it once the count
+    passes the threshold within one window.
+    """
+    if not SHARD_ABOVE:
+        return
+    key = f"campaign:{campaign_id}:writes:{int(time.time() // RATE_WINDOW)}"
+    cache.add(key, 0, RATE_WINDOW * 2)
+    try:
+        writes = cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr.
+        return
+    if writes == int(SHARD_ABOVE * RATE_WINDOW):
+        transaction.on_commit(lambda: shard_totals(campaign_id))
+
+
+def shard_totals(campaign_id, shards=None):
+    return Campaign.objects.filter(pk=campaign_id, total_shards=0).update(total_shards=shards or SHARDS)
+
+
+def fold(campaign_id, unshard=False):
+    """
+    Move a campaign's shards into its totals. Returns the donations folded
+    per second since the previous fold, or None if there were no shards.
+    With `unshard`, the campaign goes back to updating its row directly;
+    donations that picked a shard just before are folded on the next run.
+    """
+    with transaction.atomic():
+        shards = list(
+            CampaignTotalShard.objects.select_for_update().filter(campaign_id=campaign_id).order_by("shard")
+        )
+        if unshard:
+            Campaign.objects.filter(pk=campaign_id).update(total_shards=0)
+        if not shards:
+            return None
+
+        now = timezone.now()
+        amount = sum(shard.amount for shard in shards)
+        count = sum(shard.count for shard in shards)
+        if amount or count:
+            Campaign.objects.filter(pk=campaign_id).adjust_totals(amount, count)
+        latest = max((shard.last_donation_at for shard in shards if shard.last_donation_at), default=None)
+        if latest is not None:
+            # The shards' weights, scaled to the newest donation among them.
+            weight = sum(
+                shard.trending_velocity * math.exp(trending.DECAY * (shard.trending_epoch - latest.timestamp()))
+                for shard in shards
+            )
+            trending.record_donation(campaign_id, weight, latest)
+        ids = [shard.id for shard in shards]
+        if unshard:
+            CampaignTotalShard.objects.filter(id__in=ids).delete()
+        else:
+            CampaignTotalShard.objects.filter(id__in=ids).update(
+                amount=0, count=0, folded_at=now, trending_velocity=0, trending_epoch=now.timestamp(), last_donation_at=None
+            )
+
+    elapsed = (now - min(shard.folded_at for shard in shards)).total_seconds()
+    return max(count, 0) / max(elapsed, 1)
@@ -0,0 +1,61 @@
+import django_filters
+from django.db.models import Q
+from django.utils import timezone
+from .models import END_DATE_KEY, PROGRESS_KEY, Campaign
+
+
+
+class CampaignOrderingFilter(django_filters.OrderingFilter):
+    """
+    Single-key ordering so every allowed sort maps onto one declared index
+    and can be keyset-paginated. end_date and progress sort on their
+    non-null keys, so no campaign drops out of the listing.
+    """
+
+    SORT_KEYS = {
+        'end_date': ('end_date_key', END_DATE_KEY),
+        'progress_ratio': ('progress_ratio', PROGRESS_KEY),
+    }
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+
+        ordering = self.get_ordering_value(value[0])
+        field = ordering.lstrip('-')
+        if field in self.SORT_KEYS:
+            name, key = self.SORT_KEYS[field]
+            qs = qs.annotate(**{name: key})
+            ordering = ordering.replace(field, name)
+        return qs.order_by(ordering)
+
+
+
+class CampaignFilterSet(django_filters.FilterSet):
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('expired', 'Expired'),
+    ]
+
+    category = django_filters.CharFilter(field_name='category__slug')
+    status = django_filters.ChoiceFilter(choices=STATUS_CHOICES, method='filter_status')
+    min_goal = django_filters.NumberFilter(field_name='goal', lookup_expr='gte')
+    max_goal = django_filters.NumberFilter(field_name='goal', lookup_expr='lte')
+    ordering = CampaignOrderingFilter(
+        fields=(
+            ('created_at', 'created_at'),
+            ('end_date', 'end_date'),
+            ('goal', 'goal'),
+            ('progress_ratio', 'progress'),
+        )
+    )
+
+    class Meta:
+        model = Campaign
+        fields = ['category', 'status', 'min_goal', 'max_goal']
+
+    def filter_status(self, queryset, name, value):
+        now = timezone.now()
+        if value == 'active':
+            return queryset.filter(Q(end_date__isnull=True) | Q(end_date__gt=now), is_active=True)
+        return queryset.filter(end_date__lte=now)
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import logging
+import threading
+import weakref
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+from .models import Campaign
+
+
+# Live campaign progress for the SSE endpoint. Each ASGI worker keeps one
+# Hub: a set of queues per campaign, one queue per connected client, all
+# served by the worker's event loop. Publishing goes through a backend:
+# LocalBackend hands updates straight to this process's hub, PollingBackend
+# also reads the database for donations saved by other processes, and
+# RedisBackend broadcasts them so every worker's hub receives them.
+logger = logging.getLogger(__name__)
+
+HEARTBEAT = getattr(settings, "CAMPAIGN_LIVE_HEARTBEAT", 20)
+POLL_INTERVAL = getattr(settings, "CAMPAIGN_LIVE_POLL_INTERVAL", 2)
+RETRY_MS = 5000
+
+
+class Hub:
+    """
+    Fan-out of campaign updates to the SSE clients of this process.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        # Queues are only referenced by their stream, so a client whose
+        # stream was dropped without running its cleanup goes away too.
+        self.subscribers = {}
+        self.loop = None
+        self.listener = None
+
+    def subscribe(self, campaign_id):
+        """
+        Register a client. Must be called from the event loop.
+        """
+        self.loop = asyncio.get_running_loop()
+        # A client only needs the latest progress, see deliver.
+        queue = asyncio.Queue(maxsize=1)
+        self.subscribers.setdefault(campaign_id, weakref.WeakSet()).add(queue)
+        if self.listener is None or self.listener.done():
+            self.listener = self.loop.create_task(self.backend.listen(self))
+        return queue
+
+    def unsubscribe(self, campaign_id, queue):
+        queues = self.subscribers.get(campaign_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[campaign_id]
+
+    def has_subscribers(self, campaign_id):
+        return bool(self.subscribers.get(campaign_id))
+
+    def dispatch(self, campaign_id, message):
+        """
+        Hand an update to this process's clients. Safe to call from any
+        thread.
+        """
+        loop = self.loop
+        if loop is None or loop.is_closed() or not self.has_subscribers(campaign_id):
+            return
+        loop.call_soon_threadsafe(self.deliver, campaign_id, message)
+
+    def deliver(self, campaign_id, message):
+        for queue in list(self.subscribers.get(campaign_id, ())):
+            # A slow client skips straight to the newest update.
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+
+class LocalBackend:
+    """
+    Updates reach clients connected to the same process only. Donations
+    saved anywhere else, such as by process_paystack_events, are never
+    seen; use PollingBackend or RedisBackend outside of tests.
+    """
+
+    def publish(self, hub, campaign_id, message):
+        hub.dispatch(campaign_id, message)
+
+    def wants(self, hub, campaign_id):
+        return hub.has_subscribers(campaign_id)
+
+    async def listen(self, hub):
+        return
+
+
+class PollingBackend(LocalBackend):
+    """
+    Updates from this process are delivered right away, like LocalBackend.
+    Every POLL_INTERVAL seconds the progress of the campaigns with clients
+    here is also read from the database, one query for all of them, so
+    donations saved by other workers and processes arrive too.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = POLL_INTERVAL if interval is None else interval
+
+    async def listen(self, hub):
+        while True:
+            await asyncio.sleep(self.interval)
+            campaign_ids = [campaign_id for campaign_id, queues in hub.subscribers.items() if queues]
+            if not campaign_ids:
+                # Nobody is connected; the next subscribe restarts polling.
+                return
+            try:
+                progress = await sync_to_async(campaigns_progress)(campaign_ids)
+            except Exception:
+                logger.exception("Polling campaign live updates failed.")
+                continue
+            for campaign_id, message in progress.items():
+                # Streams skip messages equal to the last one they sent.
+                hub.deliver(campaign_id, message)
+
+
+class RedisBackend:
+    """
+    Updates go through Redis pub/sub, so every worker on every node sees
+    them. Needs the redis package and CAMPAIGN_LIVE_REDIS_URL.
+    """
+
+    CHANNEL_PREFIX = "campaign:live:"
+
+    def __init__(self):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("RedisBackend needs the redis package.")
+        self.redis = redis
+        self.url = getattr(settings, "CAMPAIGN_LIVE_REDIS_URL", None)
+        if not self.url:
+            raise ImproperlyConfigured("RedisBackend needs CAMPAIGN_LIVE_REDIS_URL.")
+        self.client = redis.Redis.from_url(self.url)
+
+    def publish(self, hub, campaign_id, message):
+        self.client.publish(f"{self.CHANNEL_PREFIX}{campaign_id}", json.dumps(message))
+
+    def wants(self, hub, campaign_id):
+        # Clients may be connected to any node.
+        return True
+
+    async def listen(self, hub):
+        from redis import asyncio as redis_asyncio
+
+        while True:
+            client = redis_asyncio.Redis.from_url(self.url)
+            try:
+                pubsub = client.pubsub()
+                await pubsub.psubscribe(f"{self.CHANNEL_PREFIX}*")
+                async for item in pubsub.listen():
+                    if item["type"] != "pmessage":
+                        continue
+                    campaign_id = int(item["channel"][len(self.CHANNEL_PREFIX):])
+                    hub.deliver(campaign_id, json.loads(item["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Campaign live updates lost their Redis subscription, reconnecting.")
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            backend = getattr(settings, "CAMPAIGN_LIVE_BACKEND", "campaign.live.PollingBackend")
+            _hub = Hub(import_string(backend)())
+        return _hub
+
+
+def campaign_progress(campaign):
+    return {
+        "slug": campaign.slug,
+        "total_raised": float(campaign.total_raised),
+        "progress": round(float(campaign.progress), 2),
+    }
+
+
+def campaign_state(slug):
+    """
+    (campaign id, current progress) of a campaign, or None. Releases the
+    database connection, a stream holds none while it waits.
+    """
+    try:
+        campaign = (
+            Campaign.objects.with_unfolded_totals()
+            .only("id", "slug", "goal", "raised_amount")
+            .filter(slug=slug)
+            .first()
+        )
+        return (campaign.id, campaign_progress(campaign)) if campaign else None
+    finally:
+        connection.close()
+
+
+def campaigns_progress(campaign_ids):
+    """
+    {campaign id: current progress} of the given campaigns. Releases the
+    database connection like campaign_state.
+    """
+    try:
+        return {
+            campaign.id: campaign_progress(campaign)
+            for campaign in Campaign.objects.with_unfolded_totals()
+            .only("id", "slug", "goal", "raised_amount")
+            .filter(pk__in=campaign_ids)
+        }
+    finally:
+        connection.close()
+
+
+def publish_campaign(campaign_id):
+    """
+    Send a campaign's current progress to its live clients.
+    """
+    hub = get_hub()
+    if not hub.backend.wants(hub, campaign_id):
+        return
+    campaign = (
+        Campaign.objects.with_unfolded_totals()
+        .only("id", "slug", "goal", "raised_amount")
+        .filter(pk=campaign_id)
+        .first()
+    )
+    if campaign is not None:
+        hub.backend.publish(hub, campaign_id, campaign_progress(campaign))
+
+
+def publish_campaign_on_commit(campaign_id):
+    # A failed publish must not fail the donation that triggered it.
+    transaction.on_commit(lambda: publish_campaign(campaign_id), robust=True)
+
+
+def sse_event(message):
+    return f"event: progress\ndata: {json.dumps(message)}\n\n"
+
+
+async def stream(hub, campaign_id, queue, state):
+    """
+    The body of an SSE response: the current progress, then every change,
+    with a comment line when idle so proxies keep the connection open.
+    """
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        yield sse_event(state)
+        last = state
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if message != last:
+                yield sse_event(message)
+                last = message
+    finally:
+        hub.unsubscribe(campaign_id, queue)
@@ -0,0 +1,105 @@
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from authentication.models import User
+from campaign import counters
+from campaign.models import Campaign
+from donations import rollups
+from donations.models import Donation
+
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures concurrent donations to one campaign through the full Donation.save path (totals, trending '
+        'score, rollups), with the totals on the campaign row and spread over shards. The donations are deleted '
+        'afterwards. Run it on Postgres; SQLite locks the whole database on every write.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('campaign', help='Slug of the campaign to donate to')
+        parser.add_argument('--donor', help='Email of the user the donations are made as, anonymous by default')
+        parser.add_argument('--workers', type=int, default=16, help='Concurrent donations')
+        parser.add_argument('--writes', type=int, default=2000, help='Donations per mode')
+        parser.add_argument('--shards', type=int, default=counters.SHARDS, help='Shards in sharded mode')
+        parser.add_argument('--fold-interval', type=float, default=1, help='Seconds between folds in sharded mode')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            raise CommandError('SQLite serializes all writes, benchmark against Postgres.')
+        campaign = Campaign.objects.filter(slug=options['campaign']).only('id', 'total_shards').first()
+        if campaign is None:
+            raise CommandError(f"Campaign {options['campaign']} does not exist.")
+        self.donor = None
+        if options['donor']:
+            self.donor = User.objects.filter(email=options['donor']).first()
+            if self.donor is None:
+                raise CommandError(f"User {options['donor']} does not exist.")
+        self.campaign_id = campaign.id
+        self.tag = f'benchmark-{uuid.uuid4().hex[:8]}'
+
+        # The benchmark picks the mode itself.
+        shard_above, counters.SHARD_ABOVE = counters.SHARD_ABOVE, 0
+        results = {}
+        try:
+            self.fold(unshard=True)
+            results['campaign row'] = self.run(options['workers'], options['writes'])
+            counters.shard_totals(self.campaign_id, options['shards'])
+            results[f"{options['shards']} shards"] = self.run(
+                options['workers'], options['writes'], fold_interval=options['fold_interval']
+            )
+        finally:
+            counters.SHARD_ABOVE = shard_above
+            self.fold(unshard=True)
+            for donation in Donation.objects.filter(campaign_id=self.campaign_id, comment=self.tag).iterator():
+                donation.delete()
+            if campaign.total_shards:
+                counters.shard_totals(self.campaign_id, campaign.total_shards)
+
+        for mode, (throughput, latencies) in results.items():
+            self.stdout.write(
+                f'{mode:<14} {throughput:8.0f} donations/s   save p50 {self.ms(latencies, 50):7.2f} ms'
+                f'   p99 {self.ms(latencies, 99):7.2f} ms'
+            )
+        (row_throughput, _), (sharded_throughput, _) = results.values()
+        self.stdout.write(self.style.SUCCESS(f'Sharded totals: {sharded_throughput / row_throughput:.1f}x throughput.'))
+
+    def run(self, workers, writes, fold_interval=None):
+        stop = threading.Event()
+        folder = None
+        if fold_interval:
+            # fold_campaign_totals --loop, as it runs next to the web workers.
+            folder = threading.Thread(target=self.keep_folding, args=(stop, fold_interval))
+            folder.start()
+        started = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                latencies = list(executor.map(self.donate, range(writes)))
+        finally:
+            stop.set()
+            if folder:
+                folder.join()
+        return writes / (time.monotonic() - started), latencies
+
+    def donate(self, _):
+        started = time.monotonic()
+        Donation.objects.create(campaign_id=self.campaign_id, donor=self.donor, amount=1, comment=self.tag)
+        return time.monotonic() - started
+
+    def keep_folding(self, stop, interval):
+        try:
+            while not stop.wait(interval):
+                self.fold()
+        finally:
+            connections.close_all()
+
+    def fold(self, unshard=False):
+        counters.fold(self.campaign_id, unshard=unshard)
+        rollups.apply_pending(self.campaign_id)
+
+    def ms(self, latencies, percentile):
+        return statistics.quantiles(latencies, n=100)[percentile - 1] * 1000
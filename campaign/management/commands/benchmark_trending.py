@@ -0,0 +1,162 @@
+import statistics
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from authentication.models import User
+from campaign import trending
+from campaign.models import Campaign, Category, TrendingScore
+from campaign.views import TrendingCampaignListView
+from donations import partitions
+from donations.models import Donation
+
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds synthetic donations over benchmark campaigns, then times the trending feed, the per-donation '
+        'score update and compact_trending_scores. Seeding is additive, so the same campaigns can be measured '
+        'at growing donation counts. Writes real rows; run it on a scratch Postgres database.'
+    )
+
+    SLUG_PREFIX = 'trending-benchmark-'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owner', required=True, help='Email of the user who owns the benchmark campaigns')
+        parser.add_argument('--campaigns', type=int, default=10_000, help='Benchmark campaigns to spread donations over')
+        parser.add_argument('--donations', type=int, default=10_000_000, help='Donations to add before measuring')
+        parser.add_argument('--days', type=int, default=14, help='Seeded donations are spread over this many days')
+        parser.add_argument('--batch', type=int, default=1_000_000, help='Donations inserted per statement')
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per measurement')
+        parser.add_argument('--pages', type=int, default=20, help='Feed pages walked through the cursor')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Seeding uses generate_series, benchmark against Postgres.')
+        owner = User.objects.filter(email=options['owner']).first()
+        if owner is None:
+            raise CommandError(f"User {options['owner']} does not exist.")
+
+        campaign_ids = self.benchmark_campaigns(owner, options['campaigns'])
+        if options['donations']:
+            self.seed(campaign_ids, options['donations'], options['days'], options['batch'])
+        total = Donation.objects.count()
+        self.stdout.write(f'{total} donations, {TrendingScore.objects.count()} trending scores.')
+
+        factory = APIRequestFactory()
+        view = TrendingCampaignListView.as_view()
+        first_page = [self.timed(lambda: view(factory.get('/api/campaigns/trending/')).render())
+                      for _ in range(options['requests'])]
+
+        walk, url, pages = [], '/api/campaigns/trending/', 0
+        with CaptureQueriesContext(connection) as queries:
+            while url and pages < options['pages']:
+                started = time.monotonic()
+                response = view(factory.get(url)).render()
+                walk.append(time.monotonic() - started)
+                url = response.data['pagination']['next']
+                pages += 1
+        reads_donations = [query for query in queries.captured_queries if Donation._meta.db_table in query['sql']]
+
+        updates = []
+        for n in range(options['requests']):
+            campaign_id = campaign_ids[n % len(campaign_ids)]
+            with transaction.atomic():
+                updates.append(self.timed(lambda: trending.record_donation(campaign_id, 10, timezone.now())))
+                transaction.set_rollback(True)
+
+        started = time.monotonic()
+        rebased, deleted = trending.compact()
+        compact_time = time.monotonic() - started
+
+        self.stdout.write(f'feed first page   p50 {self.ms(first_page, 50):8.2f} ms   p99 {self.ms(first_page, 99):8.2f} ms')
+        self.stdout.write(f'feed {pages:>3} pages     p50 {self.ms(walk, 50):8.2f} ms   max {max(walk) * 1000:8.2f} ms')
+        self.stdout.write(f'score update      p50 {self.ms(updates, 50):8.2f} ms   p99 {self.ms(updates, 99):8.2f} ms')
+        self.stdout.write(f'compaction        {compact_time * 1000:8.2f} ms for {rebased} scores, {deleted} removed')
+        if reads_donations:
+            raise CommandError(f'The feed read the donations table: {reads_donations[0]["sql"]}')
+        self.stdout.write(self.style.SUCCESS(f'The feed never read the {total} donations.'))
+
+    def benchmark_campaigns(self, owner, count):
+        category, _ = Category.objects.get_or_create(name='Trending benchmark')
+        existing = set(Campaign.objects.filter(slug__startswith=self.SLUG_PREFIX).values_list('slug', flat=True))
+        Campaign.objects.bulk_create([
+            Campaign(
+                owner=owner,
+                category=category,
+                title=f'Trending benchmark {i}',
+                slug=f'{self.SLUG_PREFIX}{i}',
+                description='Benchmark campaign',
+                goal=100_000,
+            )
+            for i in range(count) if f'{self.SLUG_PREFIX}{i}' not in existing
+        ], batch_size=1000)
+        return list(
+            Campaign.objects.filter(slug__startswith=self.SLUG_PREFIX).order_by('id').values_list('id', flat=True)
+        )
+
+    def seed(self, campaign_ids, count, days, batch):
+        """
+        Insert donations with a long tail of campaigns, then load the scores
+        and totals the signals would have kept. This is the only place the
+        scores are computed from the donations table.
+        """
+        now = timezone.now()
+        since = now - timedelta(days=days)
+        if partitions.is_partitioned():
+            attached = {start for _, start, _ in partitions.attached_partitions()}
+            month = partitions.month_start(since)
+            while month <= now:
+                if month not in attached:
+                    partitions.create_partition(month)
+                month = partitions.add_months(month, 1)
+
+        table = Donation._meta.db_table
+        seeded = 0
+        while seeded < count:
+            size = min(batch, count - seeded)
+            started = time.monotonic()
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {table} (campaign_id, amount, donation_date, is_anonymous) "
+                    "SELECT (%s::bigint[])[1 + floor(power(random(), 3) * %s)::int], "
+                    "round((1 + random() * 99)::numeric, 2), %s + random() * (%s - %s), false "
+                    "FROM generate_series(1, %s)",
+                    [campaign_ids, len(campaign_ids), since, now, since, size],
+                )
+            seeded += size
+            self.stdout.write(f'Seeded {seeded}/{count} donations ({size / (time.monotonic() - started):.0f}/s).')
+
+        scores = TrendingScore._meta.db_table
+        campaigns = Campaign._meta.db_table
+        epoch = trending.current_epoch()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {campaigns} c SET raised_amount = d.amount, donor_count = d.donations "
+                f"FROM (SELECT campaign_id, SUM(amount) AS amount, COUNT(*) AS donations FROM {table} "
+                "WHERE campaign_id = ANY(%s) GROUP BY campaign_id) d WHERE c.id = d.campaign_id",
+                [campaign_ids],
+            )
+            cursor.execute(
+                f"INSERT INTO {scores} (campaign_id, velocity, rank, epoch, last_donation_at) "
+                "SELECT s.campaign_id, s.velocity, "
+                "s.velocity * (1 + %s * LEAST(c.raised_amount / NULLIF(c.goal, 0), 1)::float), %s, s.latest "
+                f"FROM (SELECT campaign_id, SUM(amount::float * EXP(%s * (EXTRACT(EPOCH FROM donation_date) - %s))) "
+                f"AS velocity, MAX(donation_date) AS latest FROM {table} WHERE campaign_id = ANY(%s) "
+                f"GROUP BY campaign_id) s JOIN {campaigns} c ON c.id = s.campaign_id "
+                "ON CONFLICT (campaign_id) DO UPDATE SET velocity = EXCLUDED.velocity, rank = EXCLUDED.rank, "
+                "epoch = EXCLUDED.epoch, last_donation_at = EXCLUDED.last_donation_at",
+                [trending.PROGRESS_WEIGHT, epoch, trending.DECAY, epoch, campaign_ids],
+            )
+            cursor.execute(f"ANALYZE {scores}")
+
+    def timed(self, call):
+        started = time.monotonic()
+        call()
+        return time.monotonic() - started
+
+    def ms(self, timings, percentile):
+        return statistics.quantiles(timings, n=100)[percentile - 1] * 1000
@@ -0,0 +1,19 @@
+import time
+from django.core.management.base import BaseCommand
+from campaign.trending import compact
+
+
+
+class Command(BaseCommand):
+    help = 'Rebases trending scores to the current time and drops campaigns that stopped trending'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--min-rank', type=float, default=0.01, help='Scores that decayed below this are deleted')
+    
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rebased, deleted = compact(min_rank=options['min_rank'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebased {rebased} trending scores and removed {deleted} in {elapsed:.2f}s.'
+        ))
@@ -0,0 +1,69 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from campaign import counters
+from campaign.models import Campaign, CampaignTotalShard
+from donations import rollups
+from donations.models import PendingRollupChange
+
+
+
+class Command(BaseCommand):
+    help = (
+        'Folds sharded campaign totals back into Campaign.raised_amount and donor_count, applies their queued '
+        'trending and rollup changes, and switches campaigns whose donation rate dropped back to unsharded totals'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep folding instead of exiting after one pass')
+        parser.add_argument('--interval', type=int, default=5, help='Seconds between passes with --loop')
+        parser.add_argument('--shard', metavar='SLUG', help='Shard the totals of this campaign now and exit')
+        parser.add_argument('--unshard', metavar='SLUG', help='Unshard the totals of this campaign now and exit')
+
+    def handle(self, *args, **options):
+        if options['shard'] or options['unshard']:
+            slug = options['shard'] or options['unshard']
+            campaign_id = Campaign.objects.filter(slug=slug).values_list('id', flat=True).first()
+            if campaign_id is None:
+                raise CommandError(f'Campaign {slug} does not exist.')
+            if options['shard']:
+                counters.shard_totals(campaign_id)
+            else:
+                counters.fold(campaign_id, unshard=True)
+            self.stdout.write(self.style.SUCCESS(f"{'Sharded' if options['shard'] else 'Unsharded'} {slug}."))
+            return
+
+        if not options['loop']:
+            self.fold_all()
+            return
+
+        try:
+            while True:
+                self.fold_all()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Folder stopped.')
+
+    def fold_all(self):
+        sharded = set(Campaign.objects.filter(total_shards__gt=0).values_list('id', flat=True))
+        # Unsharded campaigns can still have shards written just before the switch.
+        unfolded = ~Q(amount=0) | ~Q(count=0) | Q(last_donation_at__isnull=False)
+        leftover = set(CampaignTotalShard.objects.filter(unfolded).values_list('campaign_id', flat=True))
+
+        queued = set(PendingRollupChange.objects.values_list('campaign_id', flat=True).distinct())
+
+        folded = unsharded = 0
+        for campaign_id in sorted(sharded | leftover | queued):
+            rate = counters.fold(campaign_id)
+            rollups.apply_pending(campaign_id)
+            folded += 1
+            if campaign_id in sharded and rate is not None and rate < counters.UNSHARD_BELOW:
+                counters.fold(campaign_id, unshard=True)
+                rollups.apply_pending(campaign_id)
+                unsharded += 1
+                self.stdout.write(f'Campaign {campaign_id} unsharded at {rate:.1f} donations/s.')
+
+        if folded:
+            self.stdout.write(self.style.SUCCESS(
+                f'Folded {folded} campaigns, {len(sharded) - unsharded} still sharded.'
+            ))
@@ -0,0 +1,195 @@
+import csv
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import DecimalValidator
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from authentication.models import User
+from campaign.cache import bump_listing_version
+from campaign.models import Campaign, Category
+from campaign.search import update_search_index
+from campaign.utils import SLUG_ATTEMPTS, bulk_create_with_unique_slugs, generate_slug
+
+
+
+class Command(BaseCommand):
+    help = 'Streams campaigns from a CSV or JSONL file into the database in batched bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with a header row) or JSONL file to import')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows written per INSERT')
+        parser.add_argument('--owner', help='Email of the owner for rows without an "owner" column')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        batch_size = options['batch_size']
+        self.default_owner = options['owner']
+        self.categories = {}
+        self.owners = {}
+
+        imported = skipped = 0
+        started = time.monotonic()
+        try:
+            with open(path, newline='', encoding='utf-8') as source:
+                batch = []
+                for line_number, row in self.read_rows(source, file_format):
+                    try:
+                        batch.append(self.parse_row(row))
+                    except (KeyError, ValueError, InvalidOperation) as e:
+                        skipped += 1
+                        self.stdout.write(self.style.WARNING(f'Skipping row {line_number}: {e!r}'))
+                        continue
+
+                    if len(batch) >= batch_size:
+                        written, failed = self.write_batch(batch)
+                        imported, skipped = imported + written, skipped + failed
+                        batch = []
+                        self.report(imported, started)
+                if batch:
+                    written, failed = self.write_batch(batch)
+                    imported, skipped = imported + written, skipped + failed
+        except OSError as e:
+            raise CommandError(f'Could not read {path}: {e}')
+
+        bump_listing_version()
+        elapsed = time.monotonic() - started
+        rate = imported / elapsed if elapsed else imported
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} campaigns ({skipped} skipped) in {elapsed:.1f}s, {rate:.0f} rows/s.'
+        ))
+
+    def read_rows(self, source, file_format):
+        if file_format == 'csv':
+            for line_number, row in enumerate(csv.DictReader(source), start=2):
+                yield line_number, row
+            return
+        for line_number, line in enumerate(source, start=1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError as e:
+                    self.stdout.write(self.style.WARNING(f'Skipping row {line_number}: {e!r}'))
+
+    def parse_row(self, row):
+        if not isinstance(row, dict):
+            raise ValueError(f'expected an object, got {type(row).__name__}')
+        title = self.text(row, 'title')
+        if not title:
+            raise ValueError('title is required')
+        owner = self.text(row, 'owner') or (self.default_owner or '').strip()
+        if not owner:
+            raise ValueError('owner is required, pass --owner for a default')
+        return {
+            'title': title,
+            'description': self.text(row, 'description', strip=False),
+            'goal': self.parse_goal(row['goal']),
+            'category': self.text(row, 'category'),
+            'owner': owner,
+            'start_date': self.parse_date(row.get('start_date')) or timezone.now(),
+            'end_date': self.parse_date(row.get('end_date')),
+            'is_active': str(row.get('is_active', True)).strip().lower() not in ('0', 'false', 'no'),
+        }
+
+    def text(self, row, name, strip=True):
+        value = row.get(name)
+        if value is None:
+            return ''
+        if not isinstance(value, str):
+            raise ValueError(f'{name} must be a string, got {type(value).__name__}')
+        return value.strip() if strip else value
+
+    def parse_goal(self, value):
+        """
+        The goal as a Decimal the goal column can hold, so one bad row is
+        skipped instead of failing the INSERT of its whole batch.
+        """
+        goal = Decimal(str(value).strip())
+        if not goal.is_finite() or goal <= 0:
+            raise ValueError(f'goal must be a positive number, got {value!r}')
+        field = Campaign._meta.get_field('goal')
+        try:
+            DecimalValidator(field.max_digits, field.decimal_places)(goal)
+        except ValidationError as e:
+            raise ValueError(f'goal {value!r}: {e.messages[0]}')
+        return goal
+
+    def parse_date(self, value):
+        if not value:
+            return None
+        parsed = parse_datetime(str(value))
+        if parsed is None:
+            raise ValueError(f'invalid date {value!r}')
+        return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+    def write_batch(self, rows):
+        """
+        Insert one batch and return (written, skipped) counts.
+        """
+        self.resolve_owners({row['owner'] for row in rows})
+        self.resolve_categories({row['category'] for row in rows if row['category']})
+
+        slug_length = Campaign._meta.get_field('slug').max_length
+        now = timezone.now()
+        campaigns = []
+        for row in rows:
+            owner_id = self.owners.get(row['owner'])
+            if owner_id is None:
+                self.stdout.write(self.style.WARNING(f"Skipping {row['title']!r}: unknown owner {row['owner']}"))
+                continue
+            campaign = Campaign(
+                owner_id=owner_id,
+                category_id=self.categories.get(row['category']),
+                title=row['title'],
+                slug=generate_slug(row['title'], slug_length),
+                description=row['description'],
+                goal=row['goal'],
+                start_date=row['start_date'],
+                end_date=row['end_date'],
+                is_active=row['is_active'],
+            )
+            campaign.schedule(now)
+            campaigns.append(campaign)
+
+        with transaction.atomic():
+            bulk_create_with_unique_slugs(Campaign, campaigns, 'title')
+            # bulk_create skips signals, so index the batch in one statement.
+            update_search_index(Campaign.objects.filter(slug__in=[campaign.slug for campaign in campaigns]))
+        return len(campaigns), len(rows) - len(campaigns)
+
+    def resolve_owners(self, emails):
+        missing = emails - self.owners.keys()
+        if missing:
+            self.owners.update(User.objects.filter(email__in=missing).values_list('email', 'id'))
+
+    def resolve_categories(self, names):
+        missing = names - self.categories.keys()
+        if not missing:
+            return
+        self.categories.update(Category.objects.filter(name__in=missing).values_list('name', 'id'))
+        new = missing - self.categories.keys()
+        slug_length = Category._meta.get_field('slug').max_length
+        for _ in range(SLUG_ATTEMPTS):
+            if not new:
+                return
+            # Another import may create the same names; those conflicts are
+            # ignored and the existing rows used.
+            Category.objects.bulk_create(
+                [Category(name=name, slug=generate_slug(name, slug_length)) for name in new],
+                ignore_conflicts=True,
+            )
+            self.categories.update(Category.objects.filter(name__in=new).values_list('name', 'id'))
+            # Names still missing lost their slug to another category.
+            new -= self.categories.keys()
+        if new:
+            raise CommandError(f'Could not find free slugs for categories {sorted(new)}.')
+
+    def report(self, imported, started):
+        elapsed = time.monotonic() - started
+        rate = imported / elapsed if elapsed else imported
+        self.stdout.write(f'{imported} campaigns imported, {rate:.0f} rows/s')
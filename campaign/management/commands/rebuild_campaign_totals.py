@@ -0,0 +1,96 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from campaign.models import Campaign, CampaignTotalShard
+from campaign.cache import bump_campaign_versions
+from donations.models import DailyDonationRollup, Donation
+from donations.partitions import archived_before
+
+
+
+class Command(BaseCommand):
+    help = 'Recomputes Campaign.raised_amount and donor_count from donations and reports any drift'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Campaigns checked per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Only report drift, do not fix it')
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        
+        # Donations of detached partitions only survive in the daily rollups,
+        # so their totals are read from there and the donation aggregates
+        # only scan the partitions still attached.
+        self.archived_before = archived_before()
+        donations = self.donations().filter(campaign=OuterRef('pk')).order_by().values('campaign')
+        actual_amount = donations.annotate(total=Sum('amount')).values('total')
+        actual_count = donations.annotate(total=Count('id')).values('total')
+        archived = self.archived_rollups().filter(campaign=OuterRef('pk')).order_by().values('campaign')
+        archived_amount = archived.annotate(total=Sum('amount')).values('total')
+        archived_count = archived.annotate(total=Sum('donation_count')).values('total')
+        
+        shards = CampaignTotalShard.objects.filter(campaign=OuterRef('pk')).order_by().values('campaign')
+        unfolded_amount = shards.annotate(total=Sum('amount')).values('total')
+        unfolded_count = shards.annotate(total=Sum('count')).values('total')
+        
+        amount_field = DecimalField(max_digits=14, decimal_places=2)
+        campaigns = Campaign.objects.annotate(
+            stored_amount=F('raised_amount') + Coalesce(Subquery(unfolded_amount), Value(0), output_field=amount_field),
+            stored_count=F('donor_count') + Coalesce(Subquery(unfolded_count), Value(0), output_field=IntegerField()),
+            actual_amount=Coalesce(Subquery(actual_amount), Value(0), output_field=amount_field)
+            + Coalesce(Subquery(archived_amount), Value(0), output_field=amount_field),
+            actual_count=Coalesce(Subquery(actual_count), Value(0), output_field=IntegerField())
+            + Coalesce(Subquery(archived_count), Value(0), output_field=IntegerField()),
+        ).only('id', 'title', 'slug', 'raised_amount', 'donor_count').order_by('id')
+        
+        checked = 0
+        drifted = []
+        last_id = 0
+        while True:
+            batch = list(campaigns.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            checked += len(batch)
+            
+            for campaign in batch:
+                if campaign.stored_amount == campaign.actual_amount and campaign.stored_count == campaign.actual_count:
+                    continue
+                drifted.append(campaign.slug)
+                self.stdout.write(self.style.WARNING(
+                    f'{campaign.title} (id={campaign.id}): stored {campaign.stored_amount}/{campaign.stored_count}, '
+                    f'actual {campaign.actual_amount}/{campaign.actual_count}'
+                ))
+                if not dry_run:
+                    # Recompute under the row lock so concurrent donations are not lost.
+                    with transaction.atomic():
+                        locked = Campaign.objects.select_for_update().only('id').get(pk=campaign.pk)
+                        # The recomputed totals include whatever the shards held.
+                        list(CampaignTotalShard.objects.select_for_update().filter(campaign=locked))
+                        CampaignTotalShard.objects.filter(campaign=locked).update(amount=0, count=0)
+                        totals = self.donations().filter(campaign=locked).aggregate(amount=Sum('amount'), count=Count('id'))
+                        archived = self.archived_rollups().filter(campaign=locked).aggregate(
+                            amount=Sum('amount'), count=Sum('donation_count')
+                        )
+                        Campaign.objects.filter(pk=locked.pk).update(
+                            raised_amount=(totals['amount'] or 0) + (archived['amount'] or 0),
+                            donor_count=totals['count'] + (archived['count'] or 0),
+                        )
+        
+        if drifted and not dry_run:
+            bump_campaign_versions(drifted)
+        
+        action = 'found' if dry_run else 'fixed'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} campaigns, {action} {len(drifted)} with drifted totals.'))
+    
+    def donations(self):
+        if self.archived_before is None:
+            return Donation.objects.all()
+        return Donation.objects.filter(donation_date__gte=self.archived_before)
+    
+    def archived_rollups(self):
+        if self.archived_before is None:
+            return DailyDonationRollup.objects.none()
+        return DailyDonationRollup.objects.filter(bucket__lt=self.archived_before)
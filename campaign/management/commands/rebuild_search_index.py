@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from campaign.models import Campaign
+from campaign.search import update_search_index
+
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the campaign full-text search index in batches'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Campaigns reindexed per statement')
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = Campaign.objects.order_by('id').values_list('id', flat=True)
+        
+        indexed = 0
+        last_id = 0
+        while True:
+            batch = list(ids.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1]
+            update_search_index(Campaign.objects.filter(id__in=batch))
+            indexed += len(batch)
+        
+        self.stdout.write(self.style.SUCCESS(f'Reindexed {indexed} campaigns.'))
@@ -0,0 +1,82 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, Q, Value, When
+from django.utils import timezone
+from campaign.cache import bump_campaign_versions
+from campaign.models import Campaign
+
+
+
+class Command(BaseCommand):
+    help = (
+        'Deactivates campaigns past their end_date, reactivates ended ones whose end_date was moved later and '
+        'launches scheduled ones whose start_date has arrived'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Campaigns updated per statement')
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping instead of exiting after one pass')
+        parser.add_argument('--interval', type=int, default=60, help='Seconds between sweeps with --loop')
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        if not options['loop']:
+            self.sweep()
+            return
+
+        try:
+            while True:
+                self.sweep()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Sweeper stopped.')
+
+    def sweep(self):
+        started = time.monotonic()
+        now = timezone.now()
+
+        # Range scans on campaign_active_end_idx and campaign_scheduled_idx.
+        expired = Campaign.objects.filter(is_active=True, end_date__lte=now).order_by('end_date', 'id')
+        deactivated = self.update_in_batches(expired, is_active=False, ended_at=now, updated_at=now)
+
+        # Range scans on campaign_ended_idx. Campaigns deactivated by their
+        # owner have no ended_at and stay inactive.
+        reopened = Campaign.objects.filter(
+            Q(end_date__isnull=True) | Q(end_date__gt=now), ended_at__isnull=False, is_active=False
+        ).order_by('end_date', 'id')
+        reactivated = self.update_in_batches(reopened, is_active=True, ended_at=None, updated_at=now)
+
+        # Campaigns whose whole window passed before a sweep ran are marked
+        # launched but stay inactive.
+        due = Campaign.objects.filter(launched_at__isnull=True, start_date__lte=now).order_by('start_date', 'id')
+        launched = self.update_in_batches(
+            due,
+            is_active=Case(When(end_date__lte=now, then=Value(False)), default=Value(True)),
+            ended_at=Case(When(end_date__lte=now, then=Value(now)), default=Value(None)),
+            launched_at=now,
+            updated_at=now,
+        )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Deactivated {deactivated} expired, reactivated {reactivated} extended and launched {launched} '
+            f'scheduled campaigns in {elapsed:.2f}s.'
+        ))
+
+    def update_in_batches(self, queryset, **changes):
+        """
+        Apply `changes` to the campaigns matched by `queryset` a batch at a
+        time. Updated rows stop matching, so every batch re-reads from the
+        start of the range.
+        """
+        total = 0
+        while True:
+            with transaction.atomic():
+                batch = list(queryset.values_list('id', 'slug')[:self.batch_size])
+                if not batch:
+                    break
+                Campaign.objects.filter(id__in=[campaign_id for campaign_id, _ in batch]).update(**changes)
+            bump_campaign_versions([slug for _, slug in batch])
+            total += len(batch)
+        return total
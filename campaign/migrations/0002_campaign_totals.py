@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-18 14:59
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_totals(apps, schema_editor):
+    Campaign = apps.get_model("campaign", "Campaign")
+    Donation = apps.get_model("donations", "Donation")
+    totals = (
+        Donation.objects.order_by()
+        .values("campaign")
+        .annotate(amount=Sum("amount"), count=Count("id"))
+    )
+    for row in totals.iterator():
+        Campaign.objects.filter(pk=row["campaign"]).update(
+            raised_amount=row["amount"] or 0,
+            donor_count=row["count"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("campaign", "0001_initial"),
+        ("donations", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="campaign",
+            name="donor_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="campaign",
+            name="raised_amount",
+            field=models.DecimalField(
+                decimal_places=2, default=0, editable=False, max_digits=14
+            ),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 15:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("campaign", "0002_campaign_totals"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="campaign",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="campaign_created_id_idx"
+            ),
+        ),
+    ]
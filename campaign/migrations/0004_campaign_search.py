@@ -0,0 +1,56 @@
+# Generated by Django 5.2 on 2026-10-18 15:10
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+POSTGRES_FORWARD = """
+CREATE INDEX campaign_search_vector_gin ON campaign_campaign USING gin (search_vector);
+UPDATE campaign_campaign c SET search_vector =
+    setweight(to_tsvector('english', coalesce(c.title, '')), 'A')
+    || setweight(to_tsvector('english', coalesce((SELECT name FROM campaign_category WHERE id = c.category_id), '')), 'B')
+    || setweight(to_tsvector('english', coalesce(c.description, '')), 'C');
+"""
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE campaign_campaign_fts USING fts5("
+    "title, description, category, tokenize='porter unicode61')",
+    "INSERT INTO campaign_campaign_fts (rowid, title, description, category) "
+    "SELECT c.id, c.title, c.description, COALESCE(cat.name, '') "
+    "FROM campaign_campaign c LEFT JOIN campaign_category cat ON cat.id = c.category_id",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(POSTGRES_FORWARD)
+    elif vendor == "sqlite":
+        for statement in SQLITE_FORWARD:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS campaign_search_vector_gin")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS campaign_campaign_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("campaign", "0003_campaign_campaign_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="campaign",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2 on 2026-10-18 15:03
+
+import django.db.models.expressions
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("campaign", "0004_campaign_search"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="campaign",
+            index=models.Index(
+                fields=["category", "-created_at", "-id"],
+                name="campaign_category_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="campaign",
+            index=models.Index(
+                fields=["is_active", "end_date", "id"], name="campaign_active_end_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="campaign",
+            index=models.Index(
+                condition=models.Q(("end_date__isnull", False)),
+                fields=["end_date", "id"],
+                name="campaign_end_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="campaign",
+            index=models.Index(fields=["goal", "id"], name="campaign_goal_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="campaign",
+            index=models.Index(
+                django.db.models.expressions.CombinedExpression(
+                    models.F("raised_amount"), "/", models.F("goal")
+                ),
+                models.F("id"),
+                condition=models.Q(("goal__gt", 0)),
+                name="campaign_progress_idx",
+            ),
+        ),
+    ]
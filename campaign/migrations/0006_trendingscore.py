@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 15:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("campaign", "0005_campaign_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrendingScore",
+            fields=[
+                (
+                    "campaign",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="trending",
+                        serialize=False,
+                        to="campaign.campaign",
+                    ),
+                ),
+                ("velocity", models.FloatField(default=0)),
+                ("rank", models.FloatField(db_index=True, default=0)),
+                ("epoch", models.FloatField(db_index=True)),
+                ("last_donation_at", models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-18 15:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_existing_launched(apps, schema_editor):
+    # Campaigns that predate scheduling were all live from the start.
+    Campaign = apps.get_model("campaign", "Campaign")
+    Campaign.objects.update(launched_at=models.F("start_date"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("campaign", "0006_trendingscore"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="campaign",
+            name="launched_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(mark_existing_launched, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="campaign",
+            index=models.Index(
+                condition=models.Q(("launched_at__isnull", True)),
+                fields=["start_date", "id"],
+                name="campaign_scheduled_idx",
+            ),
+        ),
+    ]
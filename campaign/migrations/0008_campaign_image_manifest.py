@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("campaign", "0007_campaign_launched_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="campaign",
+            name="image_manifest",
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2 on 2026-10-18 15:33
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("campaign", "0008_campaign_image_manifest"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="campaign",
+            name="total_shards",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name="CampaignTotalShard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("shard", models.PositiveSmallIntegerField()),
+                (
+                    "amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("count", models.IntegerField(default=0)),
+                ("folded_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "campaign",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="campaign.campaign",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("campaign", "shard"), name="campaign_total_shard_unique"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 16:01
+
+import time
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("campaign", "0009_campaign_total_shards"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="campaigntotalshard",
+            name="last_donation_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="campaigntotalshard",
+            name="trending_epoch",
+            field=models.FloatField(default=time.time),
+        ),
+        migrations.AddField(
+            model_name="campaigntotalshard",
+            name="trending_velocity",
+            field=models.FloatField(default=0),
+        ),
+    ]
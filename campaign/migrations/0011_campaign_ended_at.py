@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-18 16:22
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_existing_ended(apps, schema_editor):
+    # Inactive campaigns past their end_date were deactivated by the
+    # sweeper, or would have been.
+    Campaign = apps.get_model("campaign", "Campaign")
+    Campaign.objects.filter(
+        is_active=False, launched_at__isnull=False, end_date__lte=timezone.now()
+    ).update(ended_at=models.F("end_date"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("campaign", "0010_campaigntotalshard_trending"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="campaign",
+            name="ended_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(mark_existing_ended, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="campaign",
+            index=models.Index(
+                condition=models.Q(("ended_at__isnull", False)),
+                fields=["end_date", "id"],
+                name="campaign_ended_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2 on 2026-10-18 17:03
+
+import datetime
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("campaign", "0011_campaign_ended_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="campaign",
+            name="campaign_end_date_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="campaign",
+            name="campaign_progress_idx",
+        ),
+        migrations.AddIndex(
+            model_name="campaign",
+            index=models.Index(
+                django.db.models.functions.comparison.Coalesce(
+                    models.F("end_date"),
+                    models.Value(
+                        datetime.datetime(
+                            9999, 12, 31, 0, 0, tzinfo=datetime.timezone.utc
+                        )
+                    ),
+                    output_field=models.DateTimeField(),
+                ),
+                models.F("id"),
+                name="campaign_end_date_key_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="campaign",
+            index=models.Index(
+                models.Case(
+                    models.When(
+                        goal__gt=0,
+                        then=django.db.models.expressions.CombinedExpression(
+                            django.db.models.functions.comparison.Cast(
+                                "raised_amount", models.FloatField()
+                            ),
+                            "/",
+                            django.db.models.functions.comparison.Cast(
+                                "goal", models.FloatField()
+                            ),
+                        ),
+                    ),
+                    default=models.Value(0.0),
+                    output_field=models.FloatField(),
+                ),
+                models.F("id"),
+                name="campaign_progress_key_idx",
+            ),
+        ),
+    ]
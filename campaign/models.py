@@ -1,7 +1,12 @@
+import time
+from datetime import datetime, timezone as dt_timezone
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Case, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
 from authentication.models import User
 from django.utils import timezone
-from django.utils.text import slugify
+from .utils import save_with_unique_slug
 from cloudinary.models import CloudinaryField
 
 
@@ -15,17 +20,63 @@ class Category(models.Model):
         verbose_name_plural = "Categories"
     
     def save(self, *args, **kwargs):
-        if not self.pk:  # Only set slug if the object is being created
-            super().save(*args, **kwargs)
-
-        if not self.slug or str(self.id) not in self.slug:
-            self.slug = f"{slugify(self.name)}-{self.id}"
-            kwargs['force_update'] = True
-            super().save(*args, **kwargs)
+        if self._state.adding or not self.slug:
+            save_with_unique_slug(self, self.name, super().save, *args, **kwargs)
+            return
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return self.name
 
+AMOUNT_FIELD = DecimalField(max_digits=14, decimal_places=2)
+
+# Sort keys of the end_date and progress orderings. Open-ended campaigns
+# sort as ending last and campaigns without a goal as 0% funded, so every
+# campaign has a non-null key to paginate on and an index entry.
+OPEN_ENDED = datetime(9999, 12, 31, tzinfo=dt_timezone.utc)
+END_DATE_KEY = Coalesce(F('end_date'), Value(OPEN_ENDED), output_field=models.DateTimeField())
+# Floats, so whole-number amounts do not divide as integers on SQLite.
+PROGRESS_KEY = Case(
+    When(goal__gt=0, then=Cast('raised_amount', models.FloatField()) / Cast('goal', models.FloatField())),
+    default=Value(0.0),
+    output_field=models.FloatField(),
+)
+
+
+
+class CampaignQuerySet(models.QuerySet):
+    
+    def with_listing_data(self):
+        """
+        Fetch everything CampaignSerializer reads in a single query.
+        Donation totals are stored columns, so no aggregation is needed.
+        """
+        return self.select_related('owner', 'category').defer('search_vector').with_unfolded_totals()
+    
+    def with_unfolded_totals(self):
+        """
+        Annotate `unfolded_amount`, the donations of sharded campaigns not
+        yet folded into raised_amount. Unsharded campaigns skip the lookup.
+        """
+        shards = (
+            CampaignTotalShard.objects.filter(campaign=OuterRef('pk'))
+            .order_by().values('campaign').annotate(total=Sum('amount')).values('total')
+        )
+        return self.annotate(unfolded_amount=Case(
+            When(total_shards__gt=0, then=Coalesce(Subquery(shards), Value(0), output_field=AMOUNT_FIELD)),
+            default=Value(0),
+            output_field=AMOUNT_FIELD,
+        ))
+    
+    def adjust_totals(self, amount, count):
+        """
+        Atomically add a donation delta to the stored totals.
+        """
+        return self.update(
+            raised_amount=F('raised_amount') + amount,
+            donor_count=F('donor_count') + count,
+        )
+
 
 
 class Campaign(models.Model):
@@ -36,25 +87,122 @@ class Campaign(models.Model):
     description = models.TextField()
     goal = models.DecimalField(max_digits=10, decimal_places=2)
     image = CloudinaryField("Campaign Image", blank=True, null=True)
+    image_manifest = models.JSONField(null=True, blank=True, editable=False)
     start_date = models.DateTimeField(default=timezone.now)
     end_date = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
+    launched_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Set when the campaign was deactivated because its end_date passed, so
+    # it can be reactivated if the end_date is moved later. Campaigns their
+    # owner deactivated keep it empty.
+    ended_at = models.DateTimeField(null=True, blank=True, editable=False)
+    raised_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    donor_count = models.PositiveIntegerField(default=0, editable=False)
+    # Number of CampaignTotalShard rows donations are spread over, 0 while
+    # the totals are updated on this row directly.
+    total_shards = models.PositiveSmallIntegerField(default=0, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CampaignQuerySet.as_manager()
+    
+    MAINTAINED_FIELDS = ('raised_amount', 'donor_count', 'total_shards', 'search_vector', 'image_manifest')
+    # Also flipped by sweep_campaigns, see save.
+    SCHEDULE_FIELDS = ('is_active', 'launched_at', 'ended_at')
+    
+    class Meta:
+        indexes = [
+            # Keyset pagination order for the campaign listing.
+            models.Index(fields=['-created_at', '-id'], name='campaign_created_id_idx'),
+            # One index per CampaignFilterSet filter and ordering.
+            models.Index(fields=['category', '-created_at', '-id'], name='campaign_category_created_idx'),
+            models.Index(fields=['is_active', 'end_date', 'id'], name='campaign_active_end_idx'),
+            models.Index(END_DATE_KEY, F('id'), name='campaign_end_date_key_idx'),
+            models.Index(fields=['goal', 'id'], name='campaign_goal_idx'),
+            models.Index(PROGRESS_KEY, F('id'), name='campaign_progress_key_idx'),
+            # Scheduled campaigns the sweeper still has to launch.
+            models.Index(fields=['start_date', 'id'], name='campaign_scheduled_idx', condition=Q(launched_at__isnull=True)),
+            # Ended campaigns whose end_date was moved later.
+            models.Index(fields=['end_date', 'id'], name='campaign_ended_idx', condition=Q(ended_at__isnull=False)),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_schedule()
+        return instance
+    
+    def _remember_schedule(self):
+        fields = ('start_date', 'end_date') + self.SCHEDULE_FIELDS
+        self._loaded_schedule = {name: self.__dict__[name] for name in fields if name in self.__dict__}
+    
+    def _changed(self, name):
+        loaded = getattr(self, '_loaded_schedule', {})
+        if name not in loaded:
+            # Deferred fields that were never loaded are not changed.
+            return name in self.__dict__
+        return self.__dict__.get(name) != loaded[name]
+    
     def save(self, *args, **kwargs):
-        creating = not self.pk
-        if creating:
-            super().save(*args, **kwargs)  # Save to get the ID first
-
-        if not self.slug or str(self.id) not in self.slug:
-            self.slug = f"{slugify(self.title)}-{self.id}"
-            # Save only if slug is updated
-            super().save(update_fields=["slug"])
+        update_fields = kwargs.get('update_fields')
+        if self._state.adding:
+            self.schedule()
+        elif any(
+            self._changed(name) for name in ('start_date', 'end_date')
+            if update_fields is None or name in update_fields
+        ):
+            self.schedule()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *self.SCHEDULE_FIELDS}
+        
+        if not self._state.adding and update_fields is None:
+            # Totals and their sharding, the search vector and the image
+            # manifest are maintained by their own UPDATEs, so a full save
+            # must not write back stale copies. The same goes for the
+            # schedule fields the sweeper flips, unless they were changed
+            # on this instance.
+            skipped = set(self.MAINTAINED_FIELDS) | self.get_deferred_fields()
+            skipped |= {name for name in self.SCHEDULE_FIELDS if not self._changed(name)}
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in skipped
+            ]
+        if self._state.adding or not self.slug:
+            save_with_unique_slug(self, self.title, super().save, *args, **kwargs)
+        else:
+            super().save(*args, **kwargs)
+        self._remember_schedule()
     
     def __str__(self):
         return self.title
     
+    def schedule(self, now=None):
+        """
+        Set is_active, launched_at and ended_at for the campaign's window,
+        the way sweep_campaigns would. A campaign that starts in the future
+        is held inactive until the sweeper launches it. Runs on create and
+        whenever start_date or end_date change.
+        """
+        now = now or timezone.now()
+        if self.start_date > now:
+            self.is_active = False
+            self.launched_at = None
+            self.ended_at = None
+            return
+        if self.launched_at is None:
+            if not self._state.adding:
+                # A held campaign whose start was moved up.
+                self.is_active = True
+            self.launched_at = now
+        if self.end_date and self.end_date <= now:
+            if self.is_active:
+                self.is_active = False
+                self.ended_at = now
+        elif self.ended_at:
+            self.is_active = True
+            self.ended_at = None
+    
     @property
     def remaining_days(self):
         if self.end_date:
@@ -63,7 +211,8 @@ class Campaign(models.Model):
     
     @property
     def total_raised(self):
-        return self.donations.aggregate(models.Sum('amount'))['amount__sum'] or 0
+        # Donations still sitting in total shards, see with_listing_data.
+        return self.raised_amount + (getattr(self, 'unfolded_amount', None) or 0)
     
     @property
     def progress(self):
@@ -75,3 +224,51 @@ class Campaign(models.Model):
 
 
 
+class CampaignTotalShard(models.Model):
+    """
+    A slice of a busy campaign's donation totals. While a campaign is
+    sharded, each donation adds to a random shard instead of queueing on
+    the campaign row lock; fold_campaign_totals moves the shards into
+    Campaign.raised_amount and donor_count.
+    
+    New donations also add their trending weight here, scaled to
+    `trending_epoch` like TrendingScore.velocity, and the fold adds it to
+    the campaign's TrendingScore.
+    """
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='+')
+    shard = models.PositiveSmallIntegerField()
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+    folded_at = models.DateTimeField(default=timezone.now)
+    trending_velocity = models.FloatField(default=0)
+    trending_epoch = models.FloatField(default=time.time)
+    last_donation_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'shard'], name='campaign_total_shard_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.campaign_id}/{self.shard}: {self.amount} ({self.count})"
+
+
+
+class TrendingScore(models.Model):
+    """
+    Precomputed trending score of a campaign, maintained incrementally as
+    donations arrive (see campaign.trending).
+    
+    `velocity` is the time-decayed sum of donations scaled to `epoch`, and
+    `rank` is velocity weighted by progress toward the goal. All rows share
+    the same epoch, so ordering by rank orders by current trendiness.
+    """
+    campaign = models.OneToOneField(Campaign, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    velocity = models.FloatField(default=0)
+    rank = models.FloatField(default=0, db_index=True)
+    epoch = models.FloatField(db_index=True)
+    last_donation_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.campaign_id} - {self.rank:.2f}"
+
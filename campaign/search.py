@@ -0,0 +1,95 @@
+import re
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, FloatField, OuterRef, Subquery
+from django.db.models.expressions import RawSQL
+from .models import Campaign, Category
+
+
+# Postgres keeps a weighted tsvector on Campaign.search_vector behind a GIN
+# index. SQLite (local development and tests) keeps an FTS5 table keyed by
+# the campaign id instead.
+SEARCH_CONFIG = "english"
+FTS_TABLE = "campaign_campaign_fts"
+FTS_WEIGHTS = "10.0, 1.0, 4.0"  # title, description, category
+
+
+def is_postgres():
+    return connection.vendor == "postgresql"
+
+
+def search_vector():
+    """
+    Expression building the search vector of a campaign row.
+    """
+    category_name = Category.objects.filter(pk=OuterRef("category_id")).values("name")[:1]
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector(Subquery(category_name), weight="B", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def update_search_index(campaigns):
+    """
+    Rebuild the search entries of the given campaign queryset in one statement.
+    """
+    if is_postgres():
+        campaigns.update(search_vector=search_vector())
+    elif connection.vendor == "sqlite":
+        ids_sql, params = campaigns.values("pk").query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({ids_sql})", params)
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, description, category) "
+                f"SELECT c.id, c.title, c.description, COALESCE(cat.name, '') "
+                f"FROM campaign_campaign c LEFT JOIN campaign_category cat ON cat.id = c.category_id "
+                f"WHERE c.id IN ({ids_sql})",
+                params,
+            )
+
+
+def remove_from_search_index(campaign_ids):
+    """
+    Drop deleted campaigns from the FTS table. Postgres needs nothing here,
+    the vector is deleted along with the row.
+    """
+    if connection.vendor == "sqlite" and campaign_ids:
+        placeholders = ", ".join(["%s"] * len(campaign_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", list(campaign_ids))
+
+
+def search_campaigns(queryset, text):
+    """
+    Filter a campaign queryset down to matches for `text`, annotated with
+    `search_rank` (higher is better) and ordered by it.
+    """
+    if is_postgres():
+        query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+        queryset = queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F("search_vector"), query)
+        )
+    else:
+        match = fts_query(text)
+        if not match:
+            return queryset.none()
+        queryset = queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT -bm25({FTS_TABLE}, {FTS_WEIGHTS}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = {Campaign._meta.db_table}.id",
+                [match],
+                output_field=FloatField(),
+            )
+        )
+    return queryset.order_by("-search_rank")
+
+
+def fts_query(text):
+    """
+    Turn free text into an FTS5 query of quoted prefix terms, so user input
+    can never be parsed as FTS5 syntax.
+    """
+    return " ".join(f'"{term}"*' for term in re.findall(r"\w+", text))
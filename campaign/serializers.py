@@ -1,19 +1,23 @@
 from rest_framework import serializers
+from api.serializers import SparseFieldsetMixin
+from uploads.pipeline import queue_upload
 from .models import Campaign, Category
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['name', 'slug']
 
 
 
-class CampaignSerializer(serializers.ModelSerializer):
+class CampaignSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), write_only=True)
     owner = serializers.StringRelatedField(read_only=True)
     image = serializers.ImageField(required=True)
+    # Derivative URLs keyed by size name, filled in by the upload worker.
+    image_manifest = serializers.JSONField(read_only=True)
     remaining_days = serializers.SerializerMethodField()
     # Uncomment when Donation model is implemented
     
@@ -24,15 +28,31 @@ class CampaignSerializer(serializers.ModelSerializer):
         model = Campaign
         fields = [
             'owner', 'category', 'category_id', 'title', 'slug', 'description',
-            'goal', 'image', 'start_date', 'end_date', 'is_active',
+            'goal', 'image', 'image_manifest', 'start_date', 'end_date', 'is_active',
             'created_at', 'updated_at', 'remaining_days', 'total_raised',
             'progress', 'is_expired'
         ]
+        sparse_related = {'owner': ['owner'], 'category': ['category']}
+        sparse_columns = {'description': ['description'], 'image_manifest': ['image_manifest']}
     
     def create(self, validated_data):
         validated_data['owner'] = self.context['request'].user
         validated_data['category'] = validated_data.pop('category_id')
-        return super().create(validated_data)
+        image = validated_data.pop('image', None)
+        campaign = super().create(validated_data)
+        # The image is pushed to storage by the process_uploads worker.
+        if image:
+            queue_upload(campaign, 'image', image)
+        return campaign
+
+    def update(self, instance, validated_data):
+        if 'category_id' in validated_data:
+            validated_data['category'] = validated_data.pop('category_id')
+        image = validated_data.pop('image', None)
+        campaign = super().update(instance, validated_data)
+        if image:
+            queue_upload(campaign, 'image', image)
+        return campaign
 
     def get_remaining_days(self, obj):
         return obj.remaining_days
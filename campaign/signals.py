@@ -0,0 +1,57 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from .models import Campaign, Category
+from .search import update_search_index, remove_from_search_index
+from .cache import bump_campaign_versions_on_commit
+
+
+SEARCHABLE_FIELDS = {'title', 'description', 'category'}
+
+
+@receiver(post_save, sender=Campaign)
+@receiver(post_delete, sender=Campaign)
+def invalidate_campaign_cache(sender, instance, **kwargs):
+    """
+    Drop cached responses for the campaign and the listing once the write commits.
+    """
+    bump_campaign_versions_on_commit([instance.slug])
+
+
+@receiver(post_save, sender=Campaign)
+def index_campaign(sender, instance, update_fields=None, **kwargs):
+    """
+    Keep the campaign's search entry in step with its title, description and category.
+    """
+    if update_fields is not None and not SEARCHABLE_FIELDS & set(update_fields):
+        return
+    update_search_index(Campaign.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Campaign)
+def unindex_campaign(sender, instance, **kwargs):
+    remove_from_search_index([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_campaigns(sender, instance, created, **kwargs):
+    """
+    A renamed category changes the search entries of all its campaigns.
+    """
+    if not created:
+        campaigns = Campaign.objects.filter(category=instance)
+        update_search_index(campaigns)
+        bump_campaign_versions_on_commit(campaigns.values_list('slug', flat=True))
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_campaigns(sender, instance, **kwargs):
+    instance._campaign_ids = list(instance.campaigns.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def reindex_uncategorized_campaigns(sender, instance, **kwargs):
+    campaign_ids = getattr(instance, '_campaign_ids', None)
+    if campaign_ids:
+        campaigns = Campaign.objects.filter(pk__in=campaign_ids)
+        update_search_index(campaigns)
+        bump_campaign_versions_on_commit(campaigns.values_list('slug', flat=True))
@@ -1,3 +1,786 @@
-from django.test import TestCase
+import asyncio
+import json
+import math
+import os
+import tempfile
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from itertools import combinations, product
+from unittest import mock, skipUnless
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from asgiref.sync import sync_to_async
+from rest_framework.test import APIClient
+from django.utils import timezone
+from authentication.models import User
+from donations.models import Donation
+from .cache import CACHE_TIMEOUT
+from .live import Hub, PollingBackend, RedisBackend
+from .models import Campaign, CampaignTotalShard, Category, TrendingScore
+from . import trending
+from .utils import generate_slug
 
-# Create your tests here.
+try:
+    import redislite
+except ImportError:
+    redislite = None
+
+
+
+def make_campaigns(owner, category, count, **fields):
+    """
+    Insert `count` campaigns in one statement, skipping Campaign.save.
+    """
+    campaigns = Campaign.objects.bulk_create([
+        Campaign(
+            owner=owner,
+            category=category,
+            title=f"Campaign {i}",
+            slug=f"campaign-{i}",
+            description="Description",
+            goal=1000,
+            **fields,
+        )
+        for i in range(count)
+    ])
+    return campaigns
+
+
+
+class CampaignQueryBudgetTests(TestCase):
+    """
+    The campaign listing and detail views cost the same number of queries
+    however many campaigns there are.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        cls.category = Category.objects.create(name="Health")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_listing_query_count_is_constant(self):
+        campaigns = make_campaigns(self.owner, self.category, 10)
+        # A sharded campaign reads its unfolded totals in the same query.
+        Campaign.objects.filter(pk=campaigns[0].pk).update(total_shards=2)
+        CampaignTotalShard.objects.create(campaign=campaigns[0], shard=0, amount=5, count=1)
+        small = self.count_queries("/api/campaigns/")
+
+        Campaign.objects.all().delete()
+        make_campaigns(self.owner, self.category, 10_000)
+        large = self.count_queries("/api/campaigns/")
+        largest_page = self.count_queries("/api/campaigns/?page_size=100")
+
+        self.assertEqual(small, 1)
+        self.assertEqual(large, small)
+        self.assertEqual(largest_page, small)
+
+    def test_detail_query_count_is_constant(self):
+        make_campaigns(self.owner, self.category, 10)
+        small = self.count_queries("/api/campaign/campaign-3/")
+
+        Campaign.objects.all().delete()
+        make_campaigns(self.owner, self.category, 10_000)
+        large = self.count_queries("/api/campaign/campaign-3/")
+
+        self.assertEqual(small, 1)
+        self.assertEqual(large, small)
+
+    def test_filtered_listing_query_count_is_constant(self):
+        url = f"/api/campaigns/?category={self.category.slug}&status=active&min_goal=1&ordering=-progress"
+        make_campaigns(self.owner, self.category, 10)
+        small = self.count_queries(url)
+
+        Campaign.objects.all().delete()
+        make_campaigns(self.owner, self.category, 10_000)
+        large = self.count_queries(url)
+
+        self.assertEqual(small, 1)
+        self.assertEqual(large, small)
+
+
+
+class CampaignOrderingTests(TestCase):
+    """
+    Sorting the listing never changes which campaigns it returns.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        cls.category = Category.objects.create(name="Health")
+        campaigns = make_campaigns(cls.owner, cls.category, 6)
+        now = timezone.now()
+        for offset, campaign in enumerate(campaigns):
+            # Every other campaign is open-ended, one has no goal.
+            campaign.end_date = now + timedelta(days=offset) if offset % 2 else None
+            campaign.goal = 1000 * offset
+            campaign.raised_amount = 100 * (6 - offset)
+        Campaign.objects.bulk_update(campaigns, ['end_date', 'goal', 'raised_amount'])
+        cls.campaigns = campaigns
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def walk(self, ordering):
+        """
+        Slugs of every page of the listing in the given order.
+        """
+        slugs = []
+        url = f"/api/campaigns/?ordering={ordering}&page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            slugs += [campaign['slug'] for campaign in response.json()['data']]
+            url = response.json()['pagination']['next']
+        return slugs
+
+    def test_end_date_sorts_open_ended_campaigns_last(self):
+        by_end = sorted(self.campaigns, key=lambda campaign: (campaign.end_date is None, campaign.end_date or 0, campaign.pk))
+        expected = [campaign.slug for campaign in by_end]
+        self.assertEqual(self.walk("end_date"), expected)
+        self.assertEqual(self.walk("-end_date"), expected[::-1])
+
+    def test_progress_sorts_campaigns_without_a_goal_first(self):
+        def progress(campaign):
+            return campaign.raised_amount / campaign.goal if campaign.goal > 0 else 0
+
+        by_progress = sorted(self.campaigns, key=lambda campaign: (progress(campaign), campaign.pk))
+        expected = [campaign.slug for campaign in by_progress]
+        self.assertEqual(self.walk("progress"), expected)
+        self.assertEqual(self.walk("-progress"), expected[::-1])
+
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN checks target the Postgres indexes')
+class CampaignFilterPlanTests(TestCase):
+    """
+    Every CampaignFilterSet filter combination and ordering is served by an
+    index. Sequential scans and sorts are disabled while planning, so the
+    planner only picks one when no index can be used instead.
+    """
+
+    FILTERS = {
+        'category': None,
+        'status': 'active',
+        'min_goal': '100',
+        'max_goal': '5000',
+    }
+    DECLARED_INDEXES = {index.name for index in Campaign._meta.indexes}
+    ORDERINGS = [None] + [f"{sign}{key}" for key, sign in product(('created_at', 'end_date', 'goal', 'progress'), ('', '-'))]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        cls.category = Category.objects.create(name="Health")
+        campaigns = make_campaigns(cls.owner, cls.category, 3)
+        now = timezone.now()
+        for offset, campaign in enumerate(campaigns):
+            campaign.end_date = now + timedelta(days=offset - 1)
+            campaign.goal = 1000 * (offset + 1)
+        Campaign.objects.bulk_update(campaigns, ['end_date', 'goal'])
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def listing_queries(self, url, params=None):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        sql = [query['sql'] for query in queries.captured_queries if 'FROM "campaign_campaign"' in query['sql']]
+        next_link = response.json()['pagination']['next']
+        return sql, next_link
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_sort = off")
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            plan = cursor.fetchone()[0]
+        return plan[0]['Plan'] if isinstance(plan, list) else json.loads(plan)[0]['Plan']
+
+    def campaign_scans(self, node, sorted_above=False):
+        """
+        (node, whether a Sort sits above it) for every scan of campaign_campaign.
+        """
+        if node.get('Relation Name') == 'campaign_campaign':
+            yield node, sorted_above
+        sorted_above = sorted_above or node['Node Type'] in ('Sort', 'Incremental Sort')
+        for child in node.get('Plans', []):
+            yield from self.campaign_scans(child, sorted_above)
+
+    def combinations(self):
+        filters = dict(self.FILTERS, category=self.category.slug)
+        for size in range(len(filters) + 1):
+            for names in combinations(filters, size):
+                for ordering in self.ORDERINGS:
+                    params = {name: filters[name] for name in names}
+                    if ordering:
+                        params['ordering'] = ordering
+                    yield params
+        yield {'status': 'expired'}
+        yield {'status': 'expired', 'ordering': '-end_date'}
+
+    def test_no_filter_combination_scans_the_table(self):
+        for params in self.combinations():
+            params['page_size'] = 1
+            with self.subTest(**params):
+                sql, next_link = self.listing_queries("/api/campaigns/", params)
+                if next_link:
+                    # The keyset condition of the next page must use the index too.
+                    sql += self.listing_queries(next_link)[0]
+                self.assertTrue(sql)
+                for query in sql:
+                    plan = self.plan(query)
+                    scans = list(self.campaign_scans(plan))
+                    self.assertTrue(scans)
+                    for scan, sorted_above in scans:
+                        message = f"{query}\n{json.dumps(plan, indent=1)}"
+                        self.assertNotEqual(scan['Node Type'], 'Seq Scan', message)
+                        if scan['Node Type'] == 'Bitmap Heap Scan':
+                            scan = scan['Plans'][0]
+                        self.assertIn(scan.get('Index Name'), self.DECLARED_INDEXES, message)
+                        if not sorted_above:
+                            # The index supplies the page order, the scan
+                            # stops after page_size rows.
+                            continue
+                        # No index has both the category and this order, so
+                        # only the category's campaigns may be sorted.
+                        self.assertIn('category', params, message)
+                        self.assertEqual(scan['Index Name'], 'campaign_category_created_idx', message)
+                        self.assertIn('Index Cond', scan, message)
+
+
+
+class CampaignResponseCacheTests(TestCase):
+    """
+    Detail pages are cached under a per-campaign version token that
+    expires, and unknown slugs leave nothing in the cache.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        cls.category = Category.objects.create(name="Health")
+        cls.campaign = make_campaigns(cls.owner, cls.category, 1)[0]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def version_key(self, slug):
+        return cache.make_and_validate_key(f"campaign:{slug}:version")
+
+    def test_unknown_slugs_leave_no_cache_keys(self):
+        for i in range(20):
+            response = self.client.get(f"/api/campaign/missing-{i}/")
+            self.assertEqual(response.status_code, 404)
+        self.assertEqual(len(cache._cache), 0)
+
+    def test_versions_expire(self):
+        self.client.get(f"/api/campaign/{self.campaign.slug}/")
+        self.client.get("/api/campaigns/")
+        for key in (self.version_key(self.campaign.slug), cache.make_and_validate_key("campaign:listing:version")):
+            self.assertIsNotNone(cache._expire_info.get(key))
+            self.assertGreater(cache._expire_info[key], time.time() + CACHE_TIMEOUT)
+
+    def test_cached_detail_is_served_without_sql_until_a_donation(self):
+        url = f"/api/campaign/{self.campaign.slug}/"
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Donation.objects.create(campaign=self.campaign, amount=100)
+        third = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(third.status_code, 200)
+        self.assertEqual(third.json()['data']['total_raised'], 100)
+
+    def test_time_fields_are_not_served_stale(self):
+        now = timezone.now()
+        Campaign.objects.filter(pk=self.campaign.pk).update(end_date=now + timedelta(days=1, minutes=2))
+        detail_url = f"/api/campaign/{self.campaign.slug}/"
+        detail = self.client.get(detail_url)
+        listing = self.client.get("/api/campaigns/")
+        self.assertEqual(detail.json()['data']['remaining_days'], 1)
+        self.assertEqual(listing.json()['data'][0]['remaining_days'], 1)
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail['ETag']).status_code, 304)
+
+        # No write happened, but remaining_days stepped down meanwhile.
+        with mock.patch('django.utils.timezone.now', return_value=now + timedelta(minutes=3)):
+            detail = self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail['ETag'])
+            listing = self.client.get("/api/campaigns/", HTTP_IF_NONE_MATCH=listing['ETag'])
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(detail.json()['data']['remaining_days'], 0)
+        self.assertEqual(listing.status_code, 200)
+        self.assertEqual(listing.json()['data'][0]['remaining_days'], 0)
+
+    def test_read_racing_a_write_is_not_cached(self):
+        url = f"/api/campaign/{self.campaign.slug}/"
+        # A write bumps the version between the read and start_campaign_version.
+        with mock.patch('campaign.views.start_campaign_version', return_value=None):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        self.assertIsNone(cache.get(self.version_key(self.campaign.slug)))
+
+
+
+class SlugCollisionTests(TestCase):
+    """
+    A generated slug that is already taken gets a fresh suffix, on save and
+    in the bulk import.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        cls.category = Category.objects.create(name="Health")
+
+    def colliding(self, *slugs):
+        """
+        generate_slug returning `slugs` first, then random suffixes again.
+        """
+        queue = list(slugs)
+        fake = mock.Mock(side_effect=lambda *args: queue.pop(0) if queue else generate_slug(*args))
+        patches = ExitStack()
+        for target in ('campaign.utils.generate_slug', 'campaign.management.commands.import_campaigns.generate_slug'):
+            patches.enter_context(mock.patch(target, fake))
+        return patches
+
+    def test_save_retries_a_taken_slug(self):
+        with self.colliding('clean-water', 'clean-water', 'clean-water-2', 'education'):
+            first = Campaign.objects.create(owner=self.owner, category=self.category, title="Clean water", description="Wells", goal=1000)
+            second = Campaign.objects.create(owner=self.owner, category=self.category, title="Clean water", description="Wells", goal=1000)
+            category = Category.objects.create(name="Education")
+        self.assertEqual(first.slug, 'clean-water')
+        self.assertEqual(second.slug, 'clean-water-2')
+        self.assertEqual(category.slug, 'education')
+        self.assertEqual(Campaign.objects.filter(title="Clean water").count(), 2)
+
+    def test_other_integrity_errors_are_raised(self):
+        with self.assertRaises(IntegrityError):
+            Category.objects.create(name="Health")
+
+    def import_rows(self, *rows):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as source:
+            source.write('\n'.join(json.dumps(row) for row in rows))
+        self.addCleanup(os.remove, source.name)
+        output = StringIO()
+        call_command('import_campaigns', source.name, owner=self.owner.email, stdout=output)
+        return output.getvalue()
+
+    def test_import_retries_taken_slugs(self):
+        make_campaigns(self.owner, self.category, 1)
+        # The category is resolved first, then the campaigns are inserted.
+        with self.colliding(self.category.slug, 'water', 'campaign-0', 'wells'):
+            self.import_rows(
+                {'title': 'Campaign 0', 'goal': 10},
+                {'title': 'Wells', 'goal': 10, 'category': 'Water'},
+            )
+        self.assertEqual(Campaign.objects.filter(title='Campaign 0').count(), 2)
+        self.assertEqual(Campaign.objects.get(title='Wells').category.name, 'Water')
+        self.assertEqual(Category.objects.get(name='Water').slug, 'water')
+        self.assertEqual(Campaign.objects.get(title='Wells').slug, 'wells')
+
+    def test_import_skips_goals_the_column_cannot_hold(self):
+        bad_goals = [float('nan'), 'NaN', 'Infinity', '-Infinity', -5, '0', '100000000', '12.345', 'ten']
+        output = self.import_rows(
+            {'title': 'Wells', 'goal': '99999999.99'},
+            *[{'title': f'Bad {goal}', 'goal': goal} for goal in bad_goals],
+            {'title': 'Books', 'goal': 12.5},
+        )
+        self.assertIn(f'Imported 2 campaigns ({len(bad_goals)} skipped)', output)
+        self.assertEqual(output.count('Skipping row'), len(bad_goals))
+        self.assertEqual(
+            dict(Campaign.objects.values_list('title', 'goal')),
+            {'Wells': Decimal('99999999.99'), 'Books': Decimal('12.5')},
+        )
+
+    def test_import_reports_rows_of_the_wrong_type(self):
+        output = self.import_rows(
+            [1, 2], "title", 5, None,
+            {'title': 5, 'goal': 10},
+            {'title': 'Wells', 'goal': [1]},
+            {'title': 'Wells', 'goal': 10, 'category': ['Water']},
+            {'title': 'Wells', 'goal': 10, 'owner': {'email': 'x'}},
+            {'title': 'Wells', 'goal': 10},
+        )
+        self.assertIn('Imported 1 campaigns (8 skipped)', output)
+        self.assertEqual(output.count('Skipping row'), 8)
+
+
+
+class RebuildCampaignTotalsTests(TestCase):
+    """
+    rebuild_campaign_totals finds campaigns whose stored totals drifted
+    from their donations, and repairs them unless run with --dry-run.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        cls.category = Category.objects.create(name="Health")
+
+    def setUp(self):
+        cache.clear()
+        self.drifted, self.exact = make_campaigns(self.owner, self.category, 2)
+        for campaign in (self.drifted, self.exact):
+            Donation.objects.create(campaign=campaign, amount=10)
+            Donation.objects.create(campaign=campaign, amount=15)
+        # A lost update.
+        Campaign.objects.filter(pk=self.drifted.pk).update(raised_amount=10, donor_count=1)
+
+    def rebuild(self, **options):
+        output = StringIO()
+        call_command('rebuild_campaign_totals', stdout=output, **options)
+        return output.getvalue()
+
+    def totals(self, campaign):
+        campaign.refresh_from_db()
+        return campaign.raised_amount, campaign.donor_count
+
+    def test_dry_run_only_reports(self):
+        output = self.rebuild(dry_run=True, batch_size=1)
+        self.assertRegex(output, rf"id={self.drifted.id}\): stored 10(\.00)?/1, actual 25(\.00)?/2")
+        self.assertNotIn(f"id={self.exact.id})", output)
+        self.assertIn("Checked 2 campaigns, found 1 with drifted totals.", output)
+        self.assertEqual(self.totals(self.drifted), (10, 1))
+
+    def test_drift_is_repaired(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Donation.objects.create(campaign=self.drifted, amount=5)
+        self.client.get(f"/api/campaign/{self.drifted.slug}/")
+
+        self.assertIn("fixed 1 with drifted totals", self.rebuild())
+        self.assertEqual(self.totals(self.drifted), (30, 3))
+        self.assertEqual(self.totals(self.exact), (25, 2))
+        self.assertIn("fixed 0 with drifted totals", self.rebuild())
+        # The repaired totals are served, not the cached ones.
+        self.assertEqual(self.client.get(f"/api/campaign/{self.drifted.slug}/").json()['data']['total_raised'], 30)
+
+    def test_sharded_totals_are_repaired(self):
+        Campaign.objects.filter(pk=self.drifted.pk).update(raised_amount=0, donor_count=0, total_shards=2)
+        CampaignTotalShard.objects.create(campaign=self.drifted, shard=0, amount=40, count=4)
+        self.assertRegex(self.rebuild(), r"stored 40(\.00)?/4, actual 25(\.00)?/2")
+        self.assertEqual(self.totals(self.drifted), (25, 2))
+        self.assertFalse(CampaignTotalShard.objects.filter(campaign=self.drifted).exclude(amount=0, count=0).exists())
+
+
+
+class TrendingCampaignTests(TestCase):
+    """
+    The trending feed ranks recent donations above older ones of the same
+    size, and compact() rebases scores without changing their order.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        cls.category = Category.objects.create(name="Health")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.now = timezone.now()
+        self.campaigns = make_campaigns(self.owner, self.category, 4)
+
+    def feed(self):
+        response = self.client.get("/api/campaigns/trending/")
+        self.assertEqual(response.status_code, 200)
+        return [campaign['slug'] for campaign in response.json()['data']]
+
+    def record(self, campaign, amount, hours_ago):
+        trending.record_donation(campaign.pk, amount, self.now - timedelta(hours=hours_ago))
+
+    def velocity_at(self, campaign, at):
+        score = TrendingScore.objects.get(campaign=campaign)
+        return score.velocity * math.exp(-trending.DECAY * (at.timestamp() - score.epoch))
+
+    def test_feed_follows_donations(self):
+        first, second, inactive, quiet = self.campaigns
+        Campaign.objects.filter(pk=inactive.pk).update(is_active=False)
+        Donation.objects.create(campaign=second, amount=10)
+        Donation.objects.create(campaign=first, amount=30)
+        Donation.objects.create(campaign=inactive, amount=500)
+        self.assertEqual(self.feed(), [first.slug, second.slug])
+
+        Donation.objects.create(campaign=second, amount=25)
+        self.assertEqual(self.feed(), [second.slug, first.slug])
+        self.assertNotIn(quiet.slug, self.feed())
+
+    def test_scores_decay_with_age(self):
+        old, recent, older = self.campaigns[:3]
+        half_life = trending.HALF_LIFE / 3600
+        self.record(old, 100, hours_ago=half_life)
+        self.record(recent, 60, hours_ago=0)
+        self.record(older, 100, hours_ago=2 * half_life)
+        # 100 a half-life ago weighs 50 now, 100 two half-lives ago 25.
+        self.assertAlmostEqual(self.velocity_at(old, self.now), 50, places=3)
+        self.assertAlmostEqual(self.velocity_at(recent, self.now), 60, places=3)
+        self.assertAlmostEqual(self.velocity_at(older, self.now), 25, places=3)
+        self.assertEqual(self.feed(), [recent.slug, old.slug, older.slug])
+
+        self.record(older, 40, hours_ago=0)
+        self.assertEqual(self.feed(), [older.slug, recent.slug, old.slug])
+
+    def test_compact_rebases_and_drops_quiet_campaigns(self):
+        old, recent, forgotten = self.campaigns[:3]
+        self.record(old, 100, hours_ago=trending.HALF_LIFE / 3600)
+        self.record(recent, 60, hours_ago=0)
+        self.record(forgotten, 1, hours_ago=30 * trending.HALF_LIFE / 3600)
+        later = self.now + timedelta(hours=1)
+        expected = {campaign.pk: self.velocity_at(campaign, later) for campaign in (old, recent)}
+        order = self.feed()
+
+        with mock.patch('campaign.trending.time.time', return_value=later.timestamp()):
+            rebased, deleted = trending.compact(min_rank=0.01)
+        self.assertEqual((rebased, deleted), (3, 1))
+        self.assertFalse(TrendingScore.objects.filter(campaign=forgotten).exists())
+        for score in TrendingScore.objects.all():
+            self.assertEqual(score.epoch, later.timestamp())
+            self.assertAlmostEqual(score.velocity, expected[score.campaign_id], places=3)
+            self.assertAlmostEqual(score.rank, expected[score.campaign_id], places=3)
+        self.assertEqual(self.feed(), [slug for slug in order if slug != forgotten.slug])
+
+
+
+class CampaignSearchTests(TestCase):
+    """
+    Search ranks title matches above category and description matches, and
+    its index follows category renames, deletes and bulk imports.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        cls.health = Category.objects.create(name="Health")
+        cls.water = Category.objects.create(name="Water")
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def create(self, title, description, category):
+        return Campaign.objects.create(owner=self.owner, category=category, title=title, description=description, goal=1000)
+
+    def search(self, query):
+        response = self.client.get("/api/campaigns/search/", {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return [campaign['slug'] for campaign in response.json()['data']]
+
+    def test_title_matches_rank_first(self):
+        in_description = self.create("Village clinic", "Digging wells for clean water", self.health)
+        in_title = self.create("Clean water now", "Digging wells for the village", self.health)
+        in_category = self.create("Village wells", "Digging wells for the clinic", self.water)
+        self.create("School books", "Books for the village school", self.health)
+        self.assertEqual(self.search("water"), [in_title.slug, in_category.slug, in_description.slug])
+        if connection.vendor == 'sqlite':
+            # FTS5 terms are prefixes, Postgres websearch terms are words.
+            self.assertEqual(self.search("clean wat"), [in_title.slug, in_description.slug])
+
+    def test_renamed_and_deleted_categories_are_reindexed(self):
+        campaign = self.create("Village clinic", "Nurses and beds", self.health)
+        self.assertEqual(self.search("medicine"), [])
+
+        self.health.name = "Medicine"
+        self.health.save()
+        self.assertEqual(self.search("medicine"), [campaign.slug])
+
+        self.health.delete()
+        self.assertEqual(self.search("medicine"), [])
+        self.assertEqual(self.search("nurses"), [campaign.slug])
+
+    def test_imported_campaigns_are_indexed(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as source:
+            source.write('\n'.join(json.dumps(row) for row in (
+                {'title': 'Solar lamps', 'description': 'Light for night classes', 'goal': 500, 'category': 'Energy'},
+                {'title': 'Village clinic', 'description': 'Nurses and beds', 'goal': 900},
+            )))
+        self.addCleanup(os.remove, source.name)
+        call_command('import_campaigns', source.name, owner=self.owner.email, stdout=StringIO())
+
+        self.assertEqual(self.search("solar"), [Campaign.objects.get(title="Solar lamps").slug])
+        self.assertEqual(self.search("energy"), [Campaign.objects.get(title="Solar lamps").slug])
+        self.assertEqual(self.search("nurses"), [Campaign.objects.get(title="Village clinic").slug])
+
+    def test_empty_query_is_rejected(self):
+        for query in ("", "   "):
+            with self.subTest(query=query):
+                response = self.client.get("/api/campaigns/search/", {"q": query})
+                self.assertEqual(response.status_code, 400)
+        response = self.client.get("/api/campaigns/search/")
+        self.assertEqual(response.status_code, 400)
+        # Text without a single word matches nothing rather than failing.
+        self.assertEqual(self.search('"*:()'), [])
+
+
+
+class CampaignScheduleTests(TestCase):
+    """
+    Moving a campaign's dates reschedules it, the sweeper reactivates
+    campaigns whose end_date was extended, and a stale instance cannot
+    undo a sweep.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        cls.category = Category.objects.create(name="Health")
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.campaign = Campaign.objects.create(
+            owner=self.owner, category=self.category, title="Clean water", description="Wells", goal=1000,
+            end_date=self.now + timedelta(days=1),
+        )
+
+    def sweep(self):
+        call_command('sweep_campaigns', stdout=StringIO())
+
+    def stored(self):
+        return Campaign.objects.values_list('is_active', 'launched_at', 'ended_at').get(pk=self.campaign.pk)
+
+    def test_moving_the_start_reschedules(self):
+        self.campaign.start_date = self.now + timedelta(hours=1)
+        self.campaign.save()
+        self.assertEqual(self.stored(), (False, None, None))
+
+        self.campaign.start_date = self.now - timedelta(hours=1)
+        self.campaign.save(update_fields=['start_date'])
+        is_active, launched_at, _ = self.stored()
+        self.assertTrue(is_active)
+        self.assertIsNotNone(launched_at)
+
+    def test_moving_the_end_reschedules(self):
+        self.campaign.end_date = self.now - timedelta(hours=1)
+        self.campaign.save()
+        is_active, _, ended_at = self.stored()
+        self.assertFalse(is_active)
+        self.assertIsNotNone(ended_at)
+
+        self.campaign.end_date = self.now + timedelta(days=7)
+        self.campaign.save()
+        self.assertEqual(self.stored()[::2], (True, None))
+
+    def test_stale_instance_does_not_undo_a_sweep(self):
+        stale = Campaign.objects.get(pk=self.campaign.pk)
+        Campaign.objects.filter(pk=self.campaign.pk).update(end_date=self.now - timedelta(hours=1))
+        self.sweep()
+        stale.title = "Clean water for all"
+        stale.save()
+        self.assertFalse(self.stored()[0])
+        self.assertEqual(Campaign.objects.get(pk=self.campaign.pk).title, "Clean water for all")
+
+    def test_sweeper_reactivates_extended_campaigns(self):
+        Campaign.objects.filter(pk=self.campaign.pk).update(end_date=self.now - timedelta(hours=1))
+        self.sweep()
+        self.assertFalse(self.stored()[0])
+
+        Campaign.objects.filter(pk=self.campaign.pk).update(end_date=self.now + timedelta(days=1))
+        self.sweep()
+        self.assertEqual(self.stored()[::2], (True, None))
+
+    def test_sweeper_leaves_campaigns_deactivated_by_their_owner(self):
+        self.campaign.is_active = False
+        self.campaign.save()
+        self.sweep()
+        self.assertEqual(self.stored()[::2], (False, None))
+
+
+
+async def next_progress(queue, total_raised, timeout=5):
+    """
+    Wait for a live update showing `total_raised`, skipping older ones.
+    """
+    async def wait():
+        while True:
+            message = await queue.get()
+            if message["total_raised"] == total_raised:
+                return message
+    return await asyncio.wait_for(wait(), timeout)
+
+
+class PollingBackendTests(TransactionTestCase):
+    """
+    The default live backend delivers donations saved by other processes,
+    such as the Paystack worker, which never publish to this hub.
+    """
+
+    def setUp(self):
+        owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        category = Category.objects.create(name="Health")
+        self.campaign = Campaign.objects.create(owner=owner, category=category, title="Wells", description="Wells", goal=100)
+
+    def test_donations_from_elsewhere_arrive(self):
+        hub = Hub(PollingBackend(interval=0.05))
+
+        async def scenario():
+            queue = hub.subscribe(self.campaign.id)
+            # Published to the process-wide hub, not to this one.
+            await sync_to_async(Donation.objects.create)(campaign=self.campaign, amount=25)
+            message = await next_progress(queue, 25.0)
+            self.assertEqual(message, {"slug": self.campaign.slug, "total_raised": 25.0, "progress": 25.0})
+
+            hub.unsubscribe(self.campaign.id, queue)
+            # Polling stops once nobody is connected.
+            await asyncio.wait_for(hub.listener, 1)
+
+        asyncio.run(scenario())
+
+
+@skipUnless(redislite, "RedisBackend is tested against redislite")
+class RedisBackendTests(SimpleTestCase):
+    """
+    RedisBackend delivers what any process publishes to the clients of
+    every hub, and only to those of the campaign.
+    """
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.server = redislite.Redis(os.path.join(directory, "live.db"))
+        self.addCleanup(self.server.shutdown)
+        settings = override_settings(CAMPAIGN_LIVE_REDIS_URL=f"unix://{self.server.socket_file}")
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_published_updates_reach_every_hub(self):
+        publisher = RedisBackend()
+        hubs = [Hub(RedisBackend()) for _ in range(2)]
+        message = {"slug": "wells", "total_raised": 25.0, "progress": 25.0}
+
+        async def scenario():
+            queues = [hub.subscribe(7) for hub in hubs]
+            other = hubs[0].subscribe(8)
+            while sum(int(client["psub"]) for client in self.server.client_list()) < len(hubs):
+                await asyncio.sleep(0.01)
+
+            # Like a donation saved by another process.
+            await asyncio.to_thread(publisher.publish, None, 7, message)
+            for queue in queues:
+                self.assertEqual(await next_progress(queue, 25.0), message)
+            self.assertTrue(other.empty())
+
+            for hub in hubs:
+                hub.listener.cancel()
+            await asyncio.gather(*(hub.listener for hub in hubs), return_exceptions=True)
+
+        asyncio.run(scenario())
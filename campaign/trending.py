@@ -0,0 +1,82 @@
+import math
+import time
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Value
+from django.db.models.functions import Exp
+from .models import Campaign, TrendingScore
+
+
+# A donation's weight halves every TRENDING_HALF_LIFE_HOURS. Instead of
+# decaying every row as time passes, new donations are scaled *up* by
+# exp(DECAY * (now - epoch)); every row shares the same epoch, so relative
+# order is the same as with true decay. compact_trending_scores rebases the
+# epoch to keep the numbers small and drops campaigns that went quiet.
+HALF_LIFE = getattr(settings, "TRENDING_HALF_LIFE_HOURS", 24) * 3600
+DECAY = math.log(2) / HALF_LIFE
+PROGRESS_WEIGHT = getattr(settings, "TRENDING_PROGRESS_WEIGHT", 1.0)
+
+
+def progress_boost(raised_amount, goal):
+    """
+    Campaigns closer to their goal rank higher, up to (1 + PROGRESS_WEIGHT)x.
+    """
+    if not goal or goal <= 0:
+        return 1.0
+    return 1.0 + PROGRESS_WEIGHT * min(float(raised_amount / goal), 1.0)
+
+
+def current_epoch():
+    return TrendingScore.objects.aggregate(epoch=Max("epoch"))["epoch"] or time.time()
+
+
+def record_donation(campaign_id, amount, donated_at):
+    """
+    Add a donation to its campaign's trending score with a single UPDATE,
+    creating the score row on the campaign's first donation.
+    """
+    now = donated_at.timestamp()
+    amount = float(amount)
+    raised_amount, goal = Campaign.objects.filter(pk=campaign_id).values_list("raised_amount", "goal").get()
+    boost = progress_boost(raised_amount, goal)
+
+    velocity = F("velocity") + Value(amount) * Exp(Value(DECAY) * (Value(now) - F("epoch")))
+    updated = TrendingScore.objects.filter(campaign_id=campaign_id).update(
+        velocity=velocity,
+        rank=velocity * Value(boost),
+        last_donation_at=donated_at,
+    )
+    if updated:
+        return
+
+    epoch = current_epoch()
+    weight = amount * math.exp(DECAY * (now - epoch))
+    try:
+        with transaction.atomic():
+            TrendingScore.objects.create(
+                campaign_id=campaign_id,
+                velocity=weight,
+                rank=weight * boost,
+                epoch=epoch,
+                last_donation_at=donated_at,
+            )
+    except IntegrityError:
+        # Another donation created the row first.
+        record_donation(campaign_id, amount, donated_at)
+
+
+def compact(min_rank=0.01):
+    """
+    Rebase every score to the current time and delete the ones that have
+    decayed below `min_rank`. Returns (rebased, deleted) row counts.
+    """
+    now = time.time()
+    factor = Exp(Value(-DECAY) * (Value(now) - F("epoch")))
+    with transaction.atomic():
+        rebased = TrendingScore.objects.filter(epoch__lt=now).update(
+            velocity=F("velocity") * factor,
+            rank=F("rank") * factor,
+            epoch=now,
+        )
+        deleted, _ = TrendingScore.objects.filter(rank__lt=min_rank).delete()
+    return rebased, deleted
@@ -0,0 +1,59 @@
+import uuid
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+
+
+
+def generate_slug(text, max_length):
+    """
+    Generate a unique slug for `text` without needing the row's id, so a
+    new row (or a whole bulk_create batch) is written in a single INSERT.
+    """
+    suffix = uuid.uuid4().hex[:8]
+    base = slugify(text)[:max_length - len(suffix) - 1].strip('-')
+    return f"{base}-{suffix}" if base else suffix
+
+
+# Suffixes are random, so a clash is rare and a second one rarer still.
+SLUG_ATTEMPTS = 5
+
+
+def save_with_unique_slug(instance, text, save, *args, **kwargs):
+    """
+    Give `instance` a fresh slug for `text` and call `save`, drawing a new
+    suffix if another row took the slug first.
+    """
+    max_length = instance._meta.get_field('slug').max_length
+    for attempt in range(SLUG_ATTEMPTS):
+        instance.slug = generate_slug(text, max_length)
+        try:
+            with transaction.atomic():
+                return save(*args, **kwargs)
+        except IntegrityError:
+            taken = type(instance)._default_manager.filter(slug=instance.slug).exists()
+            if not taken or attempt == SLUG_ATTEMPTS - 1:
+                raise
+
+
+def bulk_create_with_unique_slugs(model, objs, text_field):
+    """
+    bulk_create `objs`, giving the rows whose slug is already taken a new
+    suffix and inserting the batch again.
+    """
+    max_length = model._meta.get_field('slug').max_length
+    for attempt in range(SLUG_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return model._default_manager.bulk_create(objs)
+        except IntegrityError:
+            if attempt == SLUG_ATTEMPTS - 1:
+                raise
+            taken = set(model._default_manager.filter(slug__in=[obj.slug for obj in objs]).values_list('slug', flat=True))
+            clashes = 0
+            for obj in objs:
+                if obj.slug in taken:
+                    obj.slug = generate_slug(getattr(obj, text_field), max_length)
+                    clashes += 1
+                taken.add(obj.slug)
+            if not clashes:
+                raise
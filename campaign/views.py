@@ -2,6 +2,7 @@ from django.shortcuts import render
 from .serializers import CampaignSerializer, CategorySerializer
 from rest_framework.generics import GenericAPIView
 from .models import Campaign, Category
+from django.db.models import F
 from authentication.permissions import IsAdminOrReadOnly, IsOwner
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
@@ -9,6 +10,22 @@ from rest_framework import status
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from django.db import transaction
+from .search import search_campaigns
+from .filters import CampaignFilterSet
+from django_filters.rest_framework import DjangoFilterBackend
+from .cache import (
+    listing_cache_key, listing_version, detail_cache_key, campaign_version, start_campaign_version,
+    get_page, set_page, time_fields_change_at,
+)
+from api.conditional import make_etag, not_modified, with_validators
+from api.serializers import SPARSE_FIELDSET_PARAMETERS, fieldset_key
+from uploads.handlers import StreamingUploadMixin
+from django.utils import timezone
+from django.views import View
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+from . import live
 
 
 
@@ -20,6 +37,7 @@ class CategoryListView(GenericAPIView):
     
     serializer_class = CategorySerializer
     queryset = Category.objects.all()
+    keyset_ordering = ('name',)
     
     def get_permissions(self):
         """
@@ -31,18 +49,20 @@ class CategoryListView(GenericAPIView):
     
     @swagger_auto_schema(
         operation_summary="List Categories",
-        operation_description="Retrieve a list of all categories.",
+        operation_description="Retrieve a page of categories ordered by name. Follow `pagination.next` for the next page.",
+        manual_parameters=SPARSE_FIELDSET_PARAMETERS,
         responses={
             200: openapi.Response("Categories List", CategorySerializer(many=True)),
         }
     )
     def get(self, request):
-        categories = self.get_queryset()
+        categories = self.paginate_queryset(self.get_queryset())
         serializer = self.get_serializer(categories, many=True)
         return Response({
             "success": True,
             "message": "Categories retrieved successfully." if categories else "No categories available.",
-            "data": serializer.data
+            "data": serializer.data,
+            "pagination": self.paginator.get_links(),
         }, status=status.HTTP_200_OK)
     
     @swagger_auto_schema(
@@ -72,13 +92,15 @@ class CategoryListView(GenericAPIView):
 
 
 
-class CampaignListView(GenericAPIView):
+class CampaignListView(StreamingUploadMixin, GenericAPIView):
     """"
     View to list all campaigns.
     """
     
     serializer_class = CampaignSerializer
-    queryset = Campaign.objects.all()
+    queryset = Campaign.objects.with_listing_data()
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = CampaignFilterSet
     
     def get_permissions(self,):
         if self.request.method in ['POST']:
@@ -88,19 +110,42 @@ class CampaignListView(GenericAPIView):
     
     @swagger_auto_schema(
         operation_summary="List Campaigns",
-        operation_description="Retrieve a list of all campaigns.",
+        operation_description=(
+            "Retrieve a page of campaigns, newest first. Follow `pagination.next` for the next page. "
+            "Filter with `category` (slug), `status` (active/expired), `min_goal` and `max_goal`, and sort with "
+            "`ordering` set to one of created_at, end_date, goal or progress (prefix with `-` for descending). "
+            "Trim each campaign with `fields` or `omit`."
+        ),
+        manual_parameters=SPARSE_FIELDSET_PARAMETERS,
         responses={
             200: openapi.Response("Campaigns List", CampaignSerializer(many=True)),
         }
     )
     def get(self, request):
-        campaigns = self.get_queryset()
-        serializer = self.get_serializer(campaigns, many=True)
-        return Response({
-            "success": True,
-            "message": "Campaigns retrieved successfully." if campaigns else "No campaigns available.",
-            "data": serializer.data
-        }, status=status.HTTP_200_OK)
+        # Pages are cached, and their ETag holds, only until remaining_days
+        # or is_expired of one of their campaigns changes.
+        now = timezone.now()
+        version = listing_version()
+        cache_key = listing_cache_key(request, version)
+        change_at, payload = get_page(cache_key, now)
+        if payload is None:
+            queryset = CampaignSerializer.prune_queryset(self.get_queryset(), request)
+            campaigns = self.paginate_queryset(self.filter_queryset(queryset))
+            serializer = self.get_serializer(campaigns, many=True)
+            payload = {
+                "success": True,
+                "message": "Campaigns retrieved successfully." if campaigns else "No campaigns available.",
+                "data": serializer.data,
+                "pagination": self.paginator.get_links(),
+            }
+            change_at = time_fields_change_at(campaigns, now)
+            set_page(cache_key, payload, change_at, now)
+        
+        etag = make_etag(version, request.build_absolute_uri(), change_at.isoformat())
+        response = not_modified(request, etag=etag)
+        if response:
+            return response
+        return with_validators(Response(payload, status=status.HTTP_200_OK), etag=etag)
     
     @swagger_auto_schema(
         operation_summary="Create Campaign",
@@ -132,6 +177,9 @@ class CampaignListView(GenericAPIView):
     
     @transaction.atomic
     def post(self, request):
+        rejected = self.rejected_uploads_response(request)
+        if rejected:
+            return rejected
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             campaign = serializer.save()
@@ -148,6 +196,81 @@ class CampaignListView(GenericAPIView):
 
 
 
+class CampaignSearchView(GenericAPIView):
+    """
+    View to search campaigns by title, description and category name.
+    """
+    
+    serializer_class = CampaignSerializer
+    queryset = Campaign.objects.with_listing_data()
+    permission_classes = [AllowAny]
+    
+    @swagger_auto_schema(
+        operation_summary="Search Campaigns",
+        operation_description="Full-text search over campaigns, best matches first. Follow `pagination.next` for the next page.",
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, description="Search text", type=openapi.TYPE_STRING, required=True),
+            *SPARSE_FIELDSET_PARAMETERS,
+        ],
+        responses={
+            200: openapi.Response("Matching Campaigns", CampaignSerializer(many=True)),
+            400: "Bad Request",
+        }
+    )
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({
+                "success": False,
+                "message": "A search query is required."
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        queryset = CampaignSerializer.prune_queryset(self.get_queryset(), request)
+        campaigns = self.paginate_queryset(search_campaigns(queryset, query))
+        serializer = self.get_serializer(campaigns, many=True)
+        return Response({
+            "success": True,
+            "message": "Campaigns retrieved successfully." if campaigns else "No campaigns match your search.",
+            "data": serializer.data,
+            "pagination": self.paginator.get_links(),
+        }, status=status.HTTP_200_OK)
+
+
+
+class TrendingCampaignListView(GenericAPIView):
+    """
+    View to list active campaigns ranked by recent donation activity.
+    """
+    
+    serializer_class = CampaignSerializer
+    permission_classes = [AllowAny]
+    
+    def get_queryset(self):
+        queryset = CampaignSerializer.prune_queryset(Campaign.objects.with_listing_data(), self.request)
+        return queryset.filter(
+            is_active=True, trending__rank__gt=0
+        ).annotate(trending_rank=F('trending__rank')).order_by('-trending_rank')
+    
+    @swagger_auto_schema(
+        operation_summary="Trending Campaigns",
+        operation_description="Active campaigns ranked by time-decayed donation velocity and progress toward their goal.",
+        manual_parameters=SPARSE_FIELDSET_PARAMETERS,
+        responses={
+            200: openapi.Response("Trending Campaigns", CampaignSerializer(many=True)),
+        }
+    )
+    def get(self, request):
+        campaigns = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(campaigns, many=True)
+        return Response({
+            "success": True,
+            "message": "Trending campaigns retrieved successfully." if campaigns else "No trending campaigns yet.",
+            "data": serializer.data,
+            "pagination": self.paginator.get_links(),
+        }, status=status.HTTP_200_OK)
+
+
+
 class CampaignDetailView(GenericAPIView):
     """
     View to retrieve, update, or delete a specific campaign.
@@ -164,7 +287,8 @@ class CampaignDetailView(GenericAPIView):
     
     def get_object(self, slug):
         try:
-            campaign = Campaign.objects.get(slug=slug)
+            queryset = CampaignSerializer.prune_queryset(Campaign.objects.with_listing_data(), self.request)
+            campaign = queryset.get(slug=slug)
             self.check_object_permissions(self.request, campaign)
             return campaign
         except Campaign.DoesNotExist:
@@ -174,6 +298,7 @@ class CampaignDetailView(GenericAPIView):
     @swagger_auto_schema(
         operation_summary="Retrieve Campaign",
         operation_description="Retrieve a specific campaign by slug.",
+        manual_parameters=SPARSE_FIELDSET_PARAMETERS,
         responses={
             200: openapi.Response("Campaign Details", CampaignSerializer),
             404: "Campaign Not Found"
@@ -181,19 +306,41 @@ class CampaignDetailView(GenericAPIView):
     )
     
     def get(self, request, slug):
-        campaign = self.get_object(slug)
-        if not campaign:
-            return Response({
-                "success": False,
-                "message": "Campaign not found."
-            }, status=status.HTTP_404_NOT_FOUND)
+        now = timezone.now()
+        fieldset = fieldset_key(request)
+        # Unknown slugs must not leave a version behind, so a campaign only
+        # gets one once it was found.
+        version = campaign_version(slug, create=False)
+        change_at, payload = None, None
+        if version:
+            change_at, payload = get_page(detail_cache_key(slug, version, fieldset), now)
         
-        serializer = self.get_serializer(campaign)
-        return Response({
-            "success": True,
-            "message": "Campaign retrieved successfully.",
-            "data": serializer.data
-        }, status=status.HTTP_200_OK)
+        if payload is None:
+            campaign = self.get_object(slug)
+            if not campaign:
+                return Response({
+                    "success": False,
+                    "message": "Campaign not found."
+                }, status=status.HTTP_404_NOT_FOUND)
+            
+            serializer = self.get_serializer(campaign)
+            payload = {
+                "success": True,
+                "message": "Campaign retrieved successfully.",
+                "data": serializer.data
+            }
+            # Like the listing, cached only until the time fields change.
+            change_at = time_fields_change_at([campaign], now)
+            if version is None:
+                version = start_campaign_version(slug)
+            if version:
+                set_page(detail_cache_key(slug, version, fieldset), payload, change_at, now)
+        
+        etag = make_etag(version, fieldset, change_at.isoformat()) if version else None
+        response = not_modified(request, etag=etag) if etag else None
+        if response:
+            return response
+        return with_validators(Response(payload, status=status.HTTP_200_OK), etag=etag)
     
     @swagger_auto_schema(
         operation_summary="Update Campaign",
@@ -263,3 +410,48 @@ class CampaignDetailView(GenericAPIView):
             "success": True,
             "message": "Campaign deleted successfully."
         }, status=status.HTTP_204_NO_CONTENT)
+
+
+
+
+class CampaignLiveView(View):
+    """
+    Server-sent events with a campaign's total raised and progress, pushed
+    as donations land. Async so an idle client costs a queue on the event
+    loop rather than a thread; needs the ASGI application.
+    """
+    
+    async def get(self, request, slug):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({
+                "success": False,
+                "message": "Live updates are only served by the ASGI application."
+            }, status=status.HTTP_501_NOT_IMPLEMENTED)
+        
+        state = await sync_to_async(live.campaign_state)(slug)
+        if state is None:
+            return JsonResponse({
+                "success": False,
+                "message": "Campaign not found."
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        campaign_id, _ = state
+        hub = live.get_hub()
+        queue = hub.subscribe(campaign_id)
+        # Read again after subscribing, so a donation landing in between
+        # is not missed.
+        state = await sync_to_async(live.campaign_state)(slug)
+        if state is None:
+            hub.unsubscribe(campaign_id, queue)
+            return JsonResponse({
+                "success": False,
+                "message": "Campaign not found."
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        response = StreamingHttpResponse(
+            live.stream(hub, campaign_id, queue, state[1]), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        # Stop nginx from buffering the stream.
+        response["X-Accel-Buffering"] = "no"
+        return response
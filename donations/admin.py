@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Donation
+from .models import DailyDonationRollup, Donation, HourlyDonationRollup, PaystackEvent
 
 
 @admin.register(Donation)
@@ -10,3 +10,23 @@ class DonationAdmin(admin.ModelAdmin):
     ordering = ('-donation_date',)
     list_per_page = 10
     list_editable = ('is_anonymous',)
+
+
+
+@admin.register(HourlyDonationRollup, DailyDonationRollup)
+class DonationRollupAdmin(admin.ModelAdmin):
+    list_display = ('campaign', 'bucket', 'amount', 'donation_count', 'unique_donors')
+    search_fields = ('campaign__title',)
+    ordering = ('-bucket',)
+    list_per_page = 20
+
+
+
+@admin.register(PaystackEvent)
+class PaystackEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'event_type', 'status', 'attempts', 'received_at', 'processed_at')
+    search_fields = ('event_id',)
+    list_filter = ('status', 'event_type')
+    ordering = ('-received_at',)
+    list_per_page = 20
+    readonly_fields = ('payload', 'last_error')
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from .models import ArchivedDonorTotal, Donation, DonationArchive
+from .partitions import archived_before
+
+
+# Lifetime totals of a donor, shown with their giving history. They are
+# cached per donor and dropped whenever one of the donor's donations is
+# written, so a page of history costs one indexed query after the first.
+# Archived months (see partitions.py) are counted from ArchivedDonorTotal.
+# Months archived before those rows were kept cannot be counted;
+# `counted_since` then gives the date the totals start from.
+DONOR_TOTALS_TIMEOUT = getattr(settings, "DONOR_TOTALS_CACHE_TIMEOUT", 86400)
+
+
+def _totals_key(donor_id):
+    return f"donor:{donor_id}:totals"
+
+
+def donor_totals(donor_id):
+    totals = cache.get(_totals_key(donor_id))
+    if totals is None:
+        totals = _donor_totals(donor_id)
+        cache.set(_totals_key(donor_id), totals, DONOR_TOTALS_TIMEOUT)
+    return totals
+
+
+def _donor_totals(donor_id):
+    donations = Donation.objects.filter(donor_id=donor_id)
+    archived = ArchivedDonorTotal.objects.filter(donor_id=donor_id)
+    # Months being detached already have their ArchivedDonorTotal rows,
+    # so only donations after the newest archived month are read live.
+    detached_until = archived_before()
+    if detached_until is not None:
+        donations = donations.filter(donation_date__gte=detached_until)
+
+    live = donations.aggregate(amount=Sum("amount"), count=Count("id"), last=Max("donation_date"))
+    kept = archived.aggregate(amount=Sum("amount"), count=Sum("donation_count"), last=Max("last_donation_date"))
+    campaigns = donations.values("campaign_id").union(archived.values("campaign_id")).count()
+    dates = [date for date in (live["last"], kept["last"]) if date is not None]
+    return {
+        "total_donated": f"{(live['amount'] or 0) + (kept['amount'] or 0):.2f}",
+        "donation_count": live["count"] + (kept["count"] or 0),
+        "campaigns_supported": campaigns,
+        "last_donation_date": max(dates, default=None),
+        "counted_since": DonationArchive.objects.filter(donor_totals_kept=False).aggregate(
+            end=Max("range_end")
+        )["end"],
+    }
+
+
+def forget_donor_totals_on_commit(donor_ids):
+    keys = [_totals_key(donor_id) for donor_id in set(donor_ids) if donor_id is not None]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
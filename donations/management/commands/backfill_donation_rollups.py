@@ -0,0 +1,70 @@
+import time
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from campaign.models import Campaign
+from donations.models import Donation
+from donations.partitions import archived_before
+from donations.rollups import bucket_start, rebuild
+
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds hourly and daily donation rollups from raw donations, a chunk of days at a time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='First day to rebuild (YYYY-MM-DD), defaults to the oldest donation')
+        parser.add_argument('--until', help='Day to stop before (YYYY-MM-DD), defaults to today')
+        parser.add_argument('--chunk-days', type=int, default=7, help='Days rebuilt per transaction')
+        parser.add_argument('--campaign', help='Only rebuild the campaign with this slug')
+
+    def handle(self, *args, **options):
+        campaign_ids = None
+        donations = Donation.objects.all()
+        if options['campaign']:
+            campaign_ids = list(Campaign.objects.filter(slug=options['campaign']).values_list('id', flat=True))
+            if not campaign_ids:
+                raise CommandError(f"Campaign {options['campaign']} does not exist.")
+            donations = donations.filter(campaign_id__in=campaign_ids)
+
+        # Today's buckets are still being written by the donation signals,
+        # so they are left alone unless --until says otherwise.
+        end = self.parse_day(options['until']) or bucket_start(timezone.now(), 'day')
+        start = self.parse_day(options['since'])
+        if start is None:
+            oldest = donations.aggregate(oldest=Min('donation_date'))['oldest']
+            if oldest is None:
+                self.stdout.write(self.style.WARNING('No donations to roll up.'))
+                return
+            start = bucket_start(oldest, 'day')
+
+        # Detached months have no donations left to rebuild from, their
+        # rollups are all that remains of them.
+        detached_until = archived_before()
+        if detached_until is not None and start < detached_until:
+            self.stdout.write(self.style.WARNING(
+                f'Donations before {detached_until:%Y-%m-%d} were detached, starting there instead.'
+            ))
+            start = detached_until
+
+        started = time.monotonic()
+        written = 0
+        chunk = timedelta(days=options['chunk_days'])
+        while start < end:
+            chunk_end = min(start + chunk, end)
+            written += rebuild(start, chunk_end, campaign_ids)
+            self.stdout.write(f'{start:%Y-%m-%d} to {chunk_end:%Y-%m-%d}: {written} rollup rows so far')
+            start = chunk_end
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} rollup rows in {elapsed:.1f}s.'))
+
+    def parse_day(self, value):
+        if not value:
+            return None
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f'Invalid date {value!r}, expected YYYY-MM-DD.')
+        return timezone.make_aware(datetime.combine(day, datetime.min.time()))
@@ -0,0 +1,140 @@
+import multiprocessing
+import queue
+import statistics
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from rest_framework.test import APIRequestFactory, force_authenticate
+from authentication.models import User
+from campaign.models import Campaign
+from donations.models import Donation
+from donations.views import DonateView
+
+
+
+def donate_all(slug, donor_id, amount, keys, workers):
+    """
+    Send the given keys through DonateView from `workers` threads and
+    return (status, seconds) per request. Runs in a worker process.
+    """
+    view = DonateView.as_view()
+    factory = APIRequestFactory()
+    donor = User.objects.get(pk=donor_id)
+    pending = queue.SimpleQueue()
+    for key in keys:
+        pending.put(key)
+
+    def donate(key):
+        request = factory.post(
+            f'/api/campaign/{slug}/donate/', {'amount': str(amount)}, format='json', HTTP_IDEMPOTENCY_KEY=key
+        )
+        force_authenticate(request, user=donor)
+        started = time.monotonic()
+        try:
+            status_code = view(request, slug=slug).status_code
+        except Exception:
+            status_code = 500
+            # The connection may be broken; the next request opens another.
+            connections.close_all()
+        return status_code, time.monotonic() - started
+
+    def work():
+        # Each thread reuses its connection for all its requests, as a
+        # server's persistent connections would, so the timings measure
+        # the endpoint rather than connection setup.
+        results = []
+        try:
+            while True:
+                try:
+                    key = pending.get_nowait()
+                except queue.Empty:
+                    return results
+                results.append(donate(key))
+        finally:
+            connections.close_all()
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            threads = [executor.submit(work) for _ in range(workers)]
+            return [result for thread in threads for result in thread.result()]
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Fires concurrent donations, each sent twice with the same Idempotency-Key, at one campaign through '
+        'DonateView and checks that no donation was duplicated and no total update was lost. '
+        'Writes real rows; run it against a staging database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('campaign', help='Slug of the campaign to donate to')
+        parser.add_argument('--donor', required=True, help='Email of the user the donations are made as')
+        parser.add_argument('--donations', type=int, default=1000, help='Distinct donations to make')
+        parser.add_argument('--workers', type=int, default=16, help='Concurrent requests per process')
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Processes sending requests; threads of one process share a single core',
+        )
+        parser.add_argument('--amount', default='1.00', help='Amount of every donation')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the donations afterwards')
+
+    def handle(self, *args, **options):
+        campaign = Campaign.objects.filter(slug=options['campaign']).first()
+        if campaign is None:
+            raise CommandError(f"Campaign {options['campaign']} does not exist.")
+        donor = User.objects.filter(email=options['donor']).first()
+        if donor is None:
+            raise CommandError(f"User {options['donor']} does not exist.")
+
+        amount = Decimal(options['amount'])
+        prefix = f'load-{uuid.uuid4().hex[:8]}'
+        # Every key goes out twice so retries race the first attempt.
+        keys = [f'{prefix}-{n}' for n in range(options['donations'])] * 2
+        processes = max(options['processes'], 1)
+
+        before = Campaign.objects.values_list('raised_amount', 'donor_count').get(pk=campaign.pk)
+        # Forked processes must not share the parent's connection.
+        connections.close_all()
+        started = time.monotonic()
+        with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('fork')) as executor:
+            chunks = executor.map(
+                donate_all,
+                *zip(*[(campaign.slug, donor.pk, amount, keys[n::processes], options['workers'])
+                       for n in range(processes)]),
+            )
+            results = [result for chunk in chunks for result in chunk]
+        elapsed = time.monotonic() - started
+        after = Campaign.objects.values_list('raised_amount', 'donor_count').get(pk=campaign.pk)
+
+        statuses = [status_code for status_code, _ in results]
+        latencies = [seconds * 1000 for _, seconds in results]
+        percentiles = statistics.quantiles(latencies, n=100)
+        created = Donation.objects.filter(donor=donor, idempotency_key__startswith=prefix).count()
+        expected = options['donations']
+        self.stdout.write(
+            f'{len(keys)} requests from {processes} x {options["workers"]} workers in {elapsed:.2f}s '
+            f'({len(keys) / elapsed:.0f} req/s, p50 {percentiles[49]:.1f} ms, p99 {percentiles[98]:.1f} ms): '
+            f'{statuses.count(201)} created, {statuses.count(200)} replayed, '
+            f'{len(statuses) - statuses.count(201) - statuses.count(200)} failed.'
+        )
+
+        problems = []
+        if created != expected:
+            problems.append(f'{created} donations stored, expected {expected}')
+        if after[0] - before[0] != amount * created:
+            problems.append(f'raised_amount moved by {after[0] - before[0]}, expected {amount * created}')
+        if after[1] - before[1] != created:
+            problems.append(f'donor_count moved by {after[1] - before[1]}, expected {created}')
+
+        if options['cleanup']:
+            for donation in Donation.objects.filter(donor=donor, idempotency_key__startswith=prefix).iterator():
+                donation.delete()
+
+        if problems:
+            raise CommandError('; '.join(problems))
+        self.stdout.write(self.style.SUCCESS('No duplicate donations and no lost total updates.'))
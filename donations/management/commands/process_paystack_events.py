@@ -0,0 +1,90 @@
+import json
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from donations.models import PaystackEvent
+from donations.payments import process_event, record_event
+
+
+
+class Command(BaseCommand):
+    help = 'Applies stored Paystack webhook events, creating donations and affiliate earnings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Events read per pass')
+        parser.add_argument('--max-attempts', type=int, default=settings.PAYSTACK_EVENT_MAX_ATTEMPTS, help='Attempts before an event is marked failed')
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting once the queue is empty')
+        parser.add_argument('--interval', type=int, default=5, help='Seconds between polls with --loop')
+        parser.add_argument('--fixture', nargs='+', default=[], help='Recorded webhook payload files to store before processing')
+        parser.add_argument('--campaign', help='Point the campaign of every --fixture payload at this slug')
+
+    def handle(self, *args, **options):
+        for path in options['fixture']:
+            self.record_fixture(path, options['campaign'])
+
+        self.max_attempts = options['max_attempts']
+        counts = {'processed': 0, 'ignored': 0, 'retry': 0, 'failed': 0}
+        # Events that failed in this run wait for the next poll, so one bad
+        # event is not retried in a tight loop.
+        failed_ids = set()
+        try:
+            while True:
+                candidates = list(
+                    PaystackEvent.objects.filter(status='pending')
+                    .exclude(id__in=failed_ids)
+                    .order_by('received_at')
+                    .values_list('id', flat=True)[:options['batch_size']]
+                )
+                outcomes = [self.run(event_id) for event_id in candidates]
+                for event_id, outcome in zip(candidates, outcomes):
+                    if outcome is not None:
+                        counts[outcome] += 1
+                    if outcome in ('retry', 'failed'):
+                        failed_ids.add(event_id)
+                if any(outcome is not None for outcome in outcomes):
+                    continue
+                if not options['loop']:
+                    break
+                failed_ids.clear()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Paystack event worker stopped.')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {counts['processed']} events, ignored {counts['ignored']}, "
+            f"{counts['retry']} to retry, {counts['failed']} failed."
+        ))
+
+    def run(self, event_id):
+        """
+        Apply one event while holding its row lock, so workers sharing the
+        queue never apply the same event twice. Returns None if another
+        worker has it or already applied it.
+        """
+        with transaction.atomic():
+            event = PaystackEvent.objects.select_for_update(skip_locked=True).filter(id=event_id, status='pending').first()
+            if event is None:
+                return None
+            event.attempts += 1
+            event.save(update_fields=['attempts'])
+            try:
+                return process_event(event)
+            except Exception as e:
+                event.status = 'failed' if event.attempts >= self.max_attempts else 'pending'
+                event.last_error = repr(e)
+                event.save(update_fields=['status', 'last_error'])
+                self.stdout.write(self.style.WARNING(f'Event {event.event_id} attempt {event.attempts} failed: {e!r}'))
+                return 'failed' if event.status == 'failed' else 'retry'
+
+    def record_fixture(self, path, campaign):
+        try:
+            with open(path) as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read fixture {path}: {e}')
+        if campaign:
+            payload.setdefault('data', {}).setdefault('metadata', {})['campaign'] = campaign
+        if not record_event(payload):
+            raise CommandError(f'Fixture {path} has no event name or transaction id.')
+        self.stdout.write(f'Recorded {path}.')
@@ -0,0 +1,142 @@
+import csv
+import time
+from datetime import datetime, time as day_time
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from donations.reconcile import FILE_TYPES, Reconciliation, file_type_of, normalize, read_export
+
+PROGRESS_EVERY = 100000
+REPORT_COLUMNS = ['problem', 'reference', 'donation_id', 'donation_kobo', 'export_kobo', 'count']
+
+
+
+class Command(BaseCommand):
+    help = (
+        'Checks paid donations against a Paystack transaction export and reports transactions without a '
+        'donation, donations without a transaction, duplicate transactions and amount mismatches'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('export', help='Paystack export file: .csv, .json (array or API page) or .jsonl')
+        parser.add_argument('--file-type', choices=sorted(set(FILE_TYPES.values())), help='Override the type guessed from the extension')
+        parser.add_argument(
+            '--amount-unit', choices=['kobo', 'naira'],
+            help='Unit of the amount column, defaults to naira for CSV dashboard exports and kobo for API JSON'
+        )
+        parser.add_argument('--since', help='First day (YYYY-MM-DD) of donations expected in the export')
+        parser.add_argument('--until', help='Last day (YYYY-MM-DD) of donations expected in the export')
+        parser.add_argument('--show', type=int, default=20, help='Records printed per problem, 0 prints none')
+        parser.add_argument('--output', help='Write every problem record to this CSV file')
+
+    def handle(self, *args, **options):
+        file_type = options['file_type'] or file_type_of(options['export'])
+        if file_type is None:
+            raise CommandError('Cannot tell the export type from its extension, pass --file-type.')
+        amount_unit = options['amount_unit'] or ('naira' if file_type == 'csv' else 'kobo')
+        self.show = options['show']
+
+        output = open(options['output'], 'w', newline='') if options['output'] else None
+        self.writer = csv.writer(output) if output else None
+        if self.writer:
+            self.writer.writerow(REPORT_COLUMNS)
+
+        started = time.monotonic()
+        try:
+            with Reconciliation() as reconciliation:
+                rows = (
+                    row for row in (normalize(raw, amount_unit) for raw in read_export(options['export'], file_type))
+                    if row is not None
+                )
+                loaded = reported = 0
+                for loaded in reconciliation.load(rows):
+                    if loaded - reported >= PROGRESS_EVERY:
+                        elapsed = time.monotonic() - started
+                        self.stdout.write(f'Loaded {loaded} export rows ({loaded / max(elapsed, 1e-6):.0f} rows/s)')
+                        reported = loaded
+                loaded_in = time.monotonic() - started
+                if not loaded:
+                    raise CommandError('The export has no rows with a reference.')
+
+                since, until = self.window(options, reconciliation)
+                problems = {
+                    'duplicate': self.report(
+                        'Duplicate transactions', reconciliation.duplicates(),
+                        lambda reference, count: ('duplicate', reference, '', '', '', count),
+                    ),
+                    'missing_donation': self.report(
+                        'Transactions without a donation', reconciliation.missing_donations(),
+                        lambda reference, amount: ('missing_donation', reference, '', '', amount, ''),
+                    ),
+                    'amount_mismatch': self.report(
+                        'Amount mismatches', reconciliation.mismatched_amounts(),
+                        lambda reference, donation_id, donation_amount, amount: (
+                            'amount_mismatch', reference, donation_id, int(donation_amount), amount, ''
+                        ),
+                    ),
+                }
+                if since is not None:
+                    problems['missing_transaction'] = self.report(
+                        f'Donations from {since:%Y-%m-%d %H:%M} to {until:%Y-%m-%d %H:%M} without a transaction',
+                        reconciliation.missing_transactions(since, until),
+                        lambda reference, donation_id, donation_amount: (
+                            'missing_transaction', reference or '', donation_id, int(donation_amount), '', ''
+                        ),
+                    )
+                else:
+                    self.stdout.write(self.style.WARNING(
+                        'No donation in the export and no --since/--until, skipped donations without a transaction.'
+                    ))
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read {options['export']}: {e}")
+        finally:
+            if output:
+                output.close()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{loaded} export rows loaded in {loaded_in:.1f}s, reconciled in {elapsed:.1f}s '
+            f'({loaded / max(elapsed, 1e-6):.0f} rows/s).'
+        )
+        total = sum(problems.values())
+        if total:
+            raise CommandError(', '.join(f'{count} {name}' for name, count in problems.items() if count))
+        self.stdout.write(self.style.SUCCESS('Donations match the Paystack export.'))
+
+    def window(self, options, reconciliation):
+        """
+        Donations in this window must appear in the export. Defaults to the
+        span of the donations the export matched.
+        """
+        first, last = reconciliation.matched_window()
+        since = self.parse_day(options['since'], day_time.min) or first
+        until = self.parse_day(options['until'], day_time.max) or last
+        if since is None or until is None:
+            return None, None
+        return since, until
+
+    def report(self, title, records, to_row):
+        count = 0
+        for record in records:
+            count += 1
+            row = to_row(*record)
+            if self.writer:
+                self.writer.writerow(row)
+            if count <= self.show:
+                if count == 1:
+                    self.stdout.write(self.style.WARNING(f'{title}:'))
+                self.stdout.write('  ' + ', '.join(
+                    f'{column}={value}' for column, value in zip(REPORT_COLUMNS[1:], row[1:]) if value != ''
+                ))
+        if count > self.show > 0:
+            self.stdout.write(f'  ... and {count - self.show} more')
+        self.stdout.write(f'{title}: {count}')
+        return count
+
+    def parse_day(self, value, at):
+        if not value:
+            return None
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f'Invalid date {value!r}, expected YYYY-MM-DD.')
+        return timezone.make_aware(datetime.combine(day, at))
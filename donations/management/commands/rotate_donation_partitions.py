@@ -0,0 +1,85 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from donations import partitions
+
+
+
+class Command(BaseCommand):
+    help = (
+        'Creates monthly donation partitions ahead of time and detaches partitions older than the retention '
+        'period, optionally archiving them to gzipped CSV files. Postgres only; run it daily.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=3, help='Months of partitions kept ready past the current one')
+        parser.add_argument('--retain', type=int, default=24, help='Months of donations kept attached, 0 keeps everything')
+        parser.add_argument('--archive-dir', help='Write detached partitions here as .csv.gz and drop them')
+        parser.add_argument('--dry-run', action='store_true', help='Only print what would be done')
+
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned():
+            raise CommandError('Donations are not partitioned, this needs Postgres and migration donations 0007.')
+        archive_dir = options['archive_dir']
+        if archive_dir and not os.path.isdir(archive_dir):
+            raise CommandError(f'Archive directory {archive_dir} does not exist.')
+        dry_run = options['dry_run']
+
+        if not dry_run:
+            for name in partitions.finalize_detaches():
+                self.stdout.write(self.style.WARNING(f'Finished the interrupted detach of {name}.'))
+
+        attached = partitions.attached_partitions()
+        existing = {start for _, start, _ in attached}
+        current = partitions.month_start(timezone.now())
+
+        created = 0
+        for offset in range(options['ahead'] + 1):
+            month = partitions.add_months(current, offset)
+            if month in existing:
+                continue
+            name, moved = partitions.partition_name(month), 0
+            if not dry_run:
+                name, moved = partitions.create_partition(month)
+            created += 1
+            self.stdout.write(f'Created {name}.' + (f' Moved {moved} donations into it from the default partition.' if moved else ''))
+
+        detached = 0
+        if options['retain'] > 0:
+            # Rollups and campaign totals rely on the detached months being
+            # the oldest ones, so only a run of the oldest partitions goes.
+            cutoff = partitions.add_months(current, -options['retain'])
+            for name, start, end in attached:
+                if end > cutoff:
+                    break
+                if not dry_run:
+                    partitions.detach_partition(name, start, end)
+                detached += 1
+                self.stdout.write(f'Detached {name} ({start:%Y-%m} donations).')
+
+        archived = 0
+        if archive_dir:
+            to_archive = partitions.detached_partitions()
+            if dry_run:
+                to_archive += [name for name, _, end in attached[:detached]]
+            for name in to_archive:
+                path = os.path.join(archive_dir, f'{name}.csv.gz')
+                if not dry_run:
+                    path = partitions.archive_partition(name, archive_dir)
+                archived += 1
+                self.stdout.write(f'Archived {name} to {path}.')
+
+        # Dated outside every monthly partition, e.g. further ahead than
+        # --ahead or in a detached month. They are counted, but no monthly
+        # partition holds them, so nothing detaches or archives them.
+        stray = partitions.default_partition_rows()
+        if stray:
+            self.stderr.write(self.style.WARNING(
+                f'{stray} donations are in {partitions.DEFAULT_PARTITION}, outside every monthly partition. '
+                f'Check their donation_date, or raise --ahead to give their months a partition.'
+            ))
+
+        prefix = 'Would have created' if dry_run else 'Created'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix} {created} partitions, detached {detached}, archived {archived}.'
+        ))
@@ -0,0 +1,96 @@
+# Generated by Django 5.2 on 2026-10-18 15:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("campaign", "0008_campaign_image_manifest"),
+        ("donations", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyDonationRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                (
+                    "amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("donation_count", models.PositiveIntegerField(default=0)),
+                ("unique_donors", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="HourlyDonationRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                (
+                    "amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("donation_count", models.PositiveIntegerField(default=0)),
+                ("unique_donors", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="donation",
+            index=models.Index(
+                fields=["campaign", "donor", "donation_date"],
+                name="donation_campaign_donor_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="dailydonationrollup",
+            name="campaign",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="campaign.campaign",
+            ),
+        ),
+        migrations.AddField(
+            model_name="hourlydonationrollup",
+            name="campaign",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="campaign.campaign",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="dailydonationrollup",
+            constraint=models.UniqueConstraint(
+                fields=("campaign", "bucket"), name="daily_rollup_campaign_bucket"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="hourlydonationrollup",
+            constraint=models.UniqueConstraint(
+                fields=("campaign", "bucket"), name="hourly_rollup_campaign_bucket"
+            ),
+        ),
+    ]
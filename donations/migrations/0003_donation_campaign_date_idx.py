@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 15:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("campaign", "0008_campaign_image_manifest"),
+        ("donations", "0002_donation_rollups"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="donation",
+            index=models.Index(
+                fields=["campaign", "donation_date", "id"],
+                name="donation_campaign_date_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-18 15:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("campaign", "0008_campaign_image_manifest"),
+        ("donations", "0003_donation_campaign_date_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="donation",
+            name="idempotency_key",
+            field=models.CharField(
+                blank=True, editable=False, max_length=255, null=True
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="donation",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("idempotency_key__isnull", False)),
+                fields=("donor", "idempotency_key"),
+                name="donation_donor_idempotency_key",
+            ),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2 on 2026-10-18 15:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("donations", "0004_donation_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="donation",
+            name="reference",
+            field=models.CharField(
+                blank=True, editable=False, max_length=100, null=True, unique=True
+            ),
+        ),
+        migrations.CreateModel(
+            name="PaystackEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("event_id", models.CharField(max_length=150, unique=True)),
+                ("event_type", models.CharField(max_length=100)),
+                ("payload", models.JSONField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("processed", "Processed"),
+                            ("ignored", "Ignored"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True, null=True)),
+                ("received_at", models.DateTimeField(auto_now_add=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["status", "received_at"],
+                        name="paystack_event_status_idx",
+                    )
+                ],
+            },
+        ),
+    ]
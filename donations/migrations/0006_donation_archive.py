@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 15:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("donations", "0005_paystack_events"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DonationArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("partition", models.CharField(max_length=63, unique=True)),
+                ("range_start", models.DateTimeField()),
+                ("range_end", models.DateTimeField()),
+                ("row_count", models.PositiveBigIntegerField(default=0)),
+                (
+                    "amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+                ("archive_path", models.CharField(blank=True, max_length=500)),
+                ("detached_at", models.DateTimeField(auto_now_add=True)),
+                ("archived_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,146 @@
+# Generated by Django 5.2 on 2026-10-18 15:31
+
+from datetime import datetime, timezone
+
+from django.db import migrations
+
+# On Postgres, turn donations_donation into a table range partitioned by
+# donation_date with one partition per UTC month. The table is locked and
+# copied, so run it in a maintenance window. Requires Postgres 14 or later.
+# Other databases keep the plain table.
+
+# Empty partitions created past the current month.
+MONTHS_AHEAD = 3
+
+# Unique constraints of a partitioned table must include donation_date, so
+# references and idempotency keys are claimed in a plain table instead. A
+# duplicate still fails the INSERT with a unique violation.
+CLAIM_TABLE = """
+CREATE TABLE donations_donation_key (key text PRIMARY KEY);
+
+INSERT INTO donations_donation_key (key)
+SELECT 'reference:' || reference FROM donations_donation WHERE reference IS NOT NULL
+UNION ALL
+SELECT 'idempotency:' || donor_id || ':' || idempotency_key FROM donations_donation
+WHERE donor_id IS NOT NULL AND idempotency_key IS NOT NULL;
+
+CREATE FUNCTION donations_donation_claim_keys() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM donations_donation_key WHERE key IN (
+            'reference:' || OLD.reference,
+            'idempotency:' || OLD.donor_id || ':' || OLD.idempotency_key
+        );
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        IF NEW.reference IS NOT NULL THEN
+            INSERT INTO donations_donation_key (key) VALUES ('reference:' || NEW.reference);
+        END IF;
+        IF NEW.donor_id IS NOT NULL AND NEW.idempotency_key IS NOT NULL THEN
+            INSERT INTO donations_donation_key (key)
+            VALUES ('idempotency:' || NEW.donor_id || ':' || NEW.idempotency_key);
+        END IF;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER donations_donation_claim_insert AFTER INSERT ON donations_donation
+FOR EACH ROW EXECUTE FUNCTION donations_donation_claim_keys();
+
+CREATE TRIGGER donations_donation_claim_update AFTER UPDATE ON donations_donation
+FOR EACH ROW WHEN (
+    OLD.reference IS DISTINCT FROM NEW.reference
+    OR OLD.donor_id IS DISTINCT FROM NEW.donor_id
+    OR OLD.idempotency_key IS DISTINCT FROM NEW.idempotency_key
+) EXECUTE FUNCTION donations_donation_claim_keys();
+
+CREATE TRIGGER donations_donation_claim_delete AFTER DELETE ON donations_donation
+FOR EACH ROW EXECUTE FUNCTION donations_donation_claim_keys();
+"""
+
+
+def month_start(moment):
+    moment = moment.astimezone(timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_donations(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        # Recreated on the partitioned table under the same names; unique
+        # ones become plain indexes, the claim table enforces uniqueness.
+        cursor.execute(
+            "SELECT pg_get_indexdef(indexrelid) FROM pg_index "
+            "WHERE indrelid = 'donations_donation'::regclass AND NOT indisprimary"
+        )
+        indexes = [row[0].replace("CREATE UNIQUE INDEX", "CREATE INDEX", 1) for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = 'donations_donation'::regclass AND contype = 'f'"
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute("SELECT COALESCE(MAX(id), 0), MIN(donation_date) FROM donations_donation")
+        last_id, oldest = cursor.fetchone()
+
+        cursor.execute("ALTER TABLE donations_donation RENAME TO donations_donation_legacy")
+        # Free the id sequence name, whether the column is identity or serial.
+        cursor.execute("ALTER TABLE donations_donation_legacy ALTER COLUMN id DROP IDENTITY IF EXISTS")
+        cursor.execute("ALTER TABLE donations_donation_legacy ALTER COLUMN id DROP DEFAULT")
+        cursor.execute("DROP SEQUENCE IF EXISTS donations_donation_id_seq")
+
+        cursor.execute(
+            "CREATE TABLE donations_donation (LIKE donations_donation_legacy INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (donation_date)"
+        )
+        cursor.execute(
+            f"CREATE SEQUENCE donations_donation_id_seq START {last_id + 1} OWNED BY donations_donation.id"
+        )
+        cursor.execute("ALTER TABLE donations_donation ALTER COLUMN id SET DEFAULT nextval('donations_donation_id_seq')")
+
+        now = datetime.now(timezone.utc)
+        month = month_start(oldest or now)
+        last = add_months(month_start(now), MONTHS_AHEAD)
+        while month <= last:
+            end = add_months(month, 1)
+            cursor.execute(
+                f"CREATE TABLE donations_donation_p{month:%Y_%m} PARTITION OF donations_donation "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+            )
+            month = end
+
+        cursor.execute("INSERT INTO donations_donation SELECT * FROM donations_donation_legacy")
+        cursor.execute("DROP TABLE donations_donation_legacy")
+
+        cursor.execute("ALTER TABLE donations_donation ADD CONSTRAINT donations_donation_pkey PRIMARY KEY (id, donation_date)")
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE donations_donation ADD CONSTRAINT "{name}" {definition}')
+        for definition in indexes:
+            cursor.execute(definition)
+        cursor.execute(CLAIM_TABLE)
+
+
+def merge_donations(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        raise RuntimeError(
+            "Partitioned donations cannot be merged back automatically; archived months would be lost."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("affiliate", "0004_affiliateearnings_donation_no_constraint"),
+        ("donations", "0006_donation_archive"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_donations, merge_donations),
+    ]
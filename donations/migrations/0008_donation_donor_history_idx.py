@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-18 15:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("campaign", "0009_campaign_total_shards"),
+        ("donations", "0007_partition_donations"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="donation",
+            index=models.Index(
+                fields=[
+                    "donor",
+                    "-donation_date",
+                    "-id",
+                    "campaign",
+                    "amount",
+                    "is_anonymous",
+                ],
+                name="donation_donor_history_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-18 17:05
+
+from django.db import migrations
+
+# On Postgres, give donations_donation a DEFAULT partition, so a donation
+# dated outside every monthly partition is stored instead of failing the
+# INSERT. rotate_donation_partitions moves such rows out when it creates
+# their month, and warns while any are left.
+
+
+def has_partitioned_donations(connection):
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'donations_donation'::regclass")
+        return cursor.fetchone() is not None
+
+
+def add_default_partition(apps, schema_editor):
+    if has_partitioned_donations(schema_editor.connection):
+        schema_editor.execute("CREATE TABLE donations_donation_default PARTITION OF donations_donation DEFAULT")
+
+
+def drop_default_partition(apps, schema_editor):
+    if not has_partitioned_donations(schema_editor.connection):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM donations_donation_default")
+        if cursor.fetchone()[0]:
+            raise RuntimeError(
+                "donations_donation_default holds donations; create partitions for their months before reverting."
+            )
+    schema_editor.execute("DROP TABLE donations_donation_default")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("donations", "0009_pendingrollupchange"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_default_partition, drop_default_partition),
+    ]
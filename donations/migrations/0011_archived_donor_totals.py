@@ -0,0 +1,93 @@
+# Generated by Django 5.2 on 2026-10-18 16:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def keep_detached_donor_totals(apps, schema_editor):
+    # Months detached but not yet dropped still have their table.
+    DonationArchive = apps.get_model("donations", "DonationArchive")
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for archive in DonationArchive.objects.all():
+            cursor.execute("SELECT to_regclass(%s)", [archive.partition])
+            if cursor.fetchone()[0] is None:
+                continue
+            cursor.execute(
+                "INSERT INTO donations_archiveddonortotal "
+                "(archive_id, donor_id, campaign_id, amount, donation_count, last_donation_date) "
+                "SELECT %s, donor_id, campaign_id, SUM(amount), COUNT(*), MAX(donation_date) "
+                f'FROM "{archive.partition}" WHERE donor_id IS NOT NULL GROUP BY donor_id, campaign_id',
+                [archive.pk],
+            )
+            archive.donor_totals_kept = True
+            archive.save(update_fields=["donor_totals_kept"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("campaign", "0011_campaign_ended_at"),
+        ("donations", "0010_donation_default_partition"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="donationarchive",
+            name="donor_totals_kept",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name="ArchivedDonorTotal",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=14)),
+                ("donation_count", models.PositiveIntegerField()),
+                ("last_donation_date", models.DateTimeField()),
+                (
+                    "archive",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="donor_totals",
+                        to="donations.donationarchive",
+                    ),
+                ),
+                (
+                    "campaign",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="campaign.campaign",
+                    ),
+                ),
+                (
+                    "donor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("donor", "archive", "campaign"),
+                        name="archived_donor_total_unique",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(keep_detached_donor_totals, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from campaign.models import Campaign
 from authentication.models import User
 
@@ -15,8 +15,174 @@ class Donation(models.Model):
     comment = models.TextField(blank=True, null=True)
     donation_date = models.DateTimeField(auto_now_add=True)
     is_anonymous = models.BooleanField(default=False)
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True, editable=False)
+    reference = models.CharField(max_length=100, unique=True, null=True, blank=True, editable=False)
     
+    class Meta:
+        constraints = [
+            # Retries of POST /campaign/<slug>/donate/ replay the first donation.
+            models.UniqueConstraint(
+                fields=['donor', 'idempotency_key'],
+                condition=models.Q(idempotency_key__isnull=False),
+                name='donation_donor_idempotency_key',
+            ),
+        ]
+        indexes = [
+            # Campaign donation exports stream in this order without a sort.
+            models.Index(fields=['campaign', 'donation_date', 'id'], name='donation_campaign_date_idx'),
+            # Whether a donor already gave to a campaign within a rollup bucket.
+            models.Index(fields=['campaign', 'donor', 'donation_date'], name='donation_campaign_donor_idx'),
+            # A donor's giving history and lifetime totals read only this
+            # index; the trailing columns save a visit to the table.
+            models.Index(
+                fields=['donor', '-donation_date', '-id', 'campaign', 'amount', 'is_anonymous'],
+                name='donation_donor_history_idx',
+            ),
+        ]
+    
+    def save(self, *args, **kwargs):
+        # Campaign totals are updated by signals and must commit with the row.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
     
     def __str__(self):
         donor_display = "Anonymous" if self.is_anonymous or not self.donor else self.donor.get_full_name
         return f"{self.amount} to {self.campaign.title} by {donor_display}"
+
+
+
+
+class PaystackEvent(models.Model):
+    """
+    A verified Paystack webhook, stored as received and turned into
+    donations by the process_paystack_events worker.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    ]
+    
+    event_id = models.CharField(max_length=150, unique=True)
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'received_at'], name='paystack_event_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.event_type} {self.event_id} ({self.status})"
+
+
+
+class DonationArchive(models.Model):
+    """
+    A month of donations detached from the partitioned donations table by
+    rotate_donation_partitions, and the file it was archived to.
+    """
+    partition = models.CharField(max_length=63, unique=True)
+    range_start = models.DateTimeField()
+    range_end = models.DateTimeField()
+    row_count = models.PositiveBigIntegerField(default=0)
+    amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    archive_path = models.CharField(max_length=500, blank=True)
+    detached_at = models.DateTimeField(auto_now_add=True)
+    archived_at = models.DateTimeField(null=True, blank=True)
+    # Whether the month's ArchivedDonorTotal rows were written. Months
+    # dropped before they existed are missing from donor lifetime totals.
+    donor_totals_kept = models.BooleanField(default=False)
+    
+    def __str__(self):
+        return f"{self.partition} ({self.row_count} donations)"
+
+
+
+class ArchivedDonorTotal(models.Model):
+    """
+    What a donor gave to a campaign in an archived month, written when the
+    month is detached, so lifetime totals still count it.
+    """
+    archive = models.ForeignKey(DonationArchive, on_delete=models.CASCADE, related_name="donor_totals")
+    donor = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name="+")
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    donation_count = models.PositiveIntegerField()
+    last_donation_date = models.DateTimeField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['donor', 'archive', 'campaign'], name='archived_donor_total_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.donor_id} to {self.campaign_id} in {self.archive_id}: {self.amount}"
+
+
+
+class DonationRollup(models.Model):
+    """
+    Donation totals of one campaign over one time bucket, kept up to date
+    by the donation signals. `unique_donors` counts signed-in donors only.
+    """
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name="+")
+    bucket = models.DateTimeField()
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    donation_count = models.PositiveIntegerField(default=0)
+    unique_donors = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        abstract = True
+    
+    def __str__(self):
+        return f"{self.campaign_id} @ {self.bucket}: {self.amount}"
+
+
+
+class HourlyDonationRollup(DonationRollup):
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'bucket'], name='hourly_rollup_campaign_bucket'),
+        ]
+
+
+
+class DailyDonationRollup(DonationRollup):
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'bucket'], name='daily_rollup_campaign_bucket'),
+        ]
+
+
+
+class PendingRollupChange(models.Model):
+    """
+    A donation added (sign=1) or removed (sign=-1) but not yet applied to
+    the rollup buckets. Donations to a sharded campaign queue here instead
+    of all updating the campaign's current bucket rows, and
+    fold_campaign_totals applies them (see donations.rollups).
+    """
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name="+")
+    donor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    donation_date = models.DateTimeField()
+    sign = models.SmallIntegerField(default=1)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['campaign', 'donor', 'donation_date'], name='pending_rollup_campaign_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.campaign_id} @ {self.donation_date}: {self.amount * self.sign}"
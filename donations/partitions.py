@@ -0,0 +1,269 @@
+import gzip
+import os
+import re
+from datetime import datetime, timezone as dt_timezone
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from .models import ArchivedDonorTotal, Donation, DonationArchive
+
+
+# On Postgres, donations_donation is range partitioned by donation_date with
+# one partition per UTC month (migration 0007). Postgres routes rows to their
+# partition, so the Donation model is unchanged, and queries filtering on
+# donation_date only scan the partitions they need.
+#
+# References and idempotency keys are kept unique through the
+# donations_donation_key claim table, filled by triggers. Claims of archived
+# months are kept, so an old reference can never be reused. Schema changes to
+# Donation on Postgres have to be written for the partitioned table.
+#
+# Donations dated outside every monthly partition land in the DEFAULT
+# partition (migration 0010) instead of failing. create_partition moves
+# them out when their month is created.
+PARENT = Donation._meta.db_table
+DEFAULT_PARTITION = f"{PARENT}_default"
+PARTITION_NAME = re.compile(rf"^{PARENT}_p(\d{{4}})_(\d{{2}})$")
+BOUNDS = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+# How long a detach waits for its lock on donations_donation.
+DETACH_LOCK_TIMEOUT = "5s"
+
+
+def month_start(moment):
+    moment = moment.astimezone(dt_timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month):
+    return f"{PARENT}_p{month:%Y_%m}"
+
+
+def partition_month(name):
+    match = PARTITION_NAME.match(name)
+    return datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc) if match else None
+
+
+def is_partitioned():
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [PARENT])
+        return cursor.fetchone() is not None
+
+
+def archived_before():
+    """
+    End of the newest month detached from donations_donation. Earlier
+    donations are only left in the daily rollups. None if nothing was
+    detached.
+    """
+    return DonationArchive.objects.aggregate(end=Max("range_end"))["end"]
+
+
+def attached_partitions():
+    """
+    (name, start, end) of every attached partition, oldest first.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass AND NOT i.inhdetachpending",
+            [PARENT],
+        )
+        rows = cursor.fetchall()
+    partitions = []
+    for name, bounds in rows:
+        match = BOUNDS.search(bounds)
+        if match:
+            partitions.append((name, *(_parse_bound(value) for value in match.groups())))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def _parse_bound(value):
+    # Postgres prints the UTC offset as +00, fromisoformat wants +00:00.
+    if re.search(r"[+-]\d\d$", value):
+        value += ":00"
+    return datetime.fromisoformat(value)
+
+
+def detached_partitions():
+    """
+    Names of monthly tables no longer attached to donations_donation,
+    oldest first: detached but not yet archived.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname FROM pg_class WHERE relkind = 'r' AND NOT relispartition "
+            "AND relnamespace = current_schema()::regnamespace AND relname LIKE %s",
+            [f"{PARENT}\\_p%"],
+        )
+        return sorted(name for (name,) in cursor.fetchall() if PARTITION_NAME.match(name))
+
+
+def finalize_detaches():
+    """
+    Complete detaches interrupted while running CONCURRENTLY, as they
+    were before the DEFAULT partition. Returns the partitions finalized.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass AND i.inhdetachpending",
+            [PARENT],
+        )
+        names = [name for (name,) in cursor.fetchall()]
+        for name in names:
+            cursor.execute(f"ALTER TABLE {_quote(PARENT)} DETACH PARTITION {_quote(name)} FINALIZE")
+    return names
+
+
+def default_partition_rows():
+    """
+    Number of donations in the DEFAULT partition, None if there is none.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [DEFAULT_PARTITION])
+        if cursor.fetchone()[0] is None:
+            return None
+        cursor.execute(f"SELECT COUNT(*) FROM {_quote(DEFAULT_PARTITION)}")
+        return cursor.fetchone()[0]
+
+
+def create_partition(month):
+    """
+    Create and attach the partition holding `month`. The table is built
+    standalone and then attached, which only takes a SHARE UPDATE
+    EXCLUSIVE lock on donations_donation, so donations keep flowing.
+
+    Donations of the month already in the DEFAULT partition are moved into
+    the new one first. That detaches the DEFAULT partition for the rest of
+    the transaction, which blocks writes to donations_donation meanwhile.
+    Returns (name, moved rows).
+    """
+    name, end = partition_name(month), add_months(month, 1)
+    bounds = [month, end]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {_quote(name)} (LIKE {_quote(PARENT)} INCLUDING DEFAULTS)")
+        moved = 0
+        if default_partition_rows():
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {_quote(DEFAULT_PARTITION)} WHERE donation_date >= %s AND donation_date < %s",
+                bounds,
+            )
+            moved = cursor.fetchone()[0]
+        if moved:
+            # Detached, the DEFAULT partition loses the claim triggers, so
+            # deleting the moved rows keeps their reference claims.
+            cursor.execute(f"ALTER TABLE {_quote(PARENT)} DETACH PARTITION {_quote(DEFAULT_PARTITION)}")
+            cursor.execute(
+                f"INSERT INTO {_quote(name)} SELECT * FROM {_quote(DEFAULT_PARTITION)} "
+                f"WHERE donation_date >= %s AND donation_date < %s",
+                bounds,
+            )
+            cursor.execute(
+                f"DELETE FROM {_quote(DEFAULT_PARTITION)} WHERE donation_date >= %s AND donation_date < %s", bounds
+            )
+        cursor.execute(
+            f"ALTER TABLE {_quote(PARENT)} ATTACH PARTITION {_quote(name)} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        if moved:
+            cursor.execute(f"ALTER TABLE {_quote(PARENT)} ATTACH PARTITION {_quote(DEFAULT_PARTITION)} DEFAULT")
+    return name, moved
+
+
+def detach_partition(name, start, end):
+    """
+    Detach a partition and record it, in one transaction. Postgres cannot
+    detach CONCURRENTLY while there is a DEFAULT partition, so the detach
+    briefly locks donations_donation. It is only a catalog change, taken
+    last, and gives up after DETACH_LOCK_TIMEOUT rather than queue writes
+    behind a long query; the next run tries again.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*), COALESCE(SUM(amount), 0) FROM {_quote(name)}")
+        row_count, amount = cursor.fetchone()
+        # From here on donor totals read the month from its
+        # ArchivedDonorTotal rows, see history.donor_totals.
+        archive, _ = DonationArchive.objects.update_or_create(
+            partition=name,
+            defaults={"range_start": start, "range_end": end, "row_count": row_count, "amount": amount},
+        )
+        keep_donor_totals(archive)
+        cursor.execute(f"SET LOCAL lock_timeout = '{DETACH_LOCK_TIMEOUT}'")
+        cursor.execute(f"ALTER TABLE {_quote(PARENT)} DETACH PARTITION {_quote(name)}")
+
+
+def keep_donor_totals(archive):
+    """
+    Replace the ArchivedDonorTotal rows of an archived month with what its
+    table holds now.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        ArchivedDonorTotal.objects.filter(archive=archive).delete()
+        cursor.execute(
+            f"INSERT INTO {_quote(ArchivedDonorTotal._meta.db_table)} "
+            "(archive_id, donor_id, campaign_id, amount, donation_count, last_donation_date) "
+            "SELECT %s, donor_id, campaign_id, SUM(amount), COUNT(*), MAX(donation_date) "
+            f"FROM {_quote(archive.partition)} WHERE donor_id IS NOT NULL GROUP BY donor_id, campaign_id",
+            [archive.pk],
+        )
+        archive.donor_totals_kept = True
+        archive.save(update_fields=["donor_totals_kept"])
+
+
+def archive_partition(name, directory):
+    """
+    Write a detached partition to `<directory>/<name>.csv.gz`, check every
+    row made it, then drop the table. Returns the archive path.
+    """
+    month = partition_month(name)
+    archive, _ = DonationArchive.objects.get_or_create(
+        partition=name, defaults={"range_start": month, "range_end": add_months(month, 1)}
+    )
+    if not archive.donor_totals_kept:
+        keep_donor_totals(archive)
+    path = os.path.join(directory, f"{name}.csv.gz")
+    partial = f"{path}.partial"
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*), COALESCE(SUM(amount), 0) FROM {_quote(name)}")
+        expected, amount = cursor.fetchone()
+        with open(partial, "wb") as f:
+            with gzip.GzipFile(filename=os.path.basename(path)[:-3], mode="wb", fileobj=f) as compressed:
+                copied = _copy_out(cursor.cursor, f"COPY {_quote(name)} TO STDOUT WITH (FORMAT csv, HEADER)", compressed)
+            f.flush()
+            os.fsync(f.fileno())
+        if copied != expected:
+            os.remove(partial)
+            raise RuntimeError(f"Archived {copied} of {expected} rows of {name}, the table was kept.")
+        os.replace(partial, path)
+        cursor.execute(f"DROP TABLE {_quote(name)}")
+
+    archive.row_count, archive.amount = expected, amount
+    archive.archive_path = path
+    archive.archived_at = timezone.now()
+    archive.save(update_fields=["row_count", "amount", "archive_path", "archived_at"])
+    return path
+
+
+def _copy_out(raw_cursor, sql, f):
+    if hasattr(raw_cursor, "copy_expert"):
+        # psycopg2
+        raw_cursor.copy_expert(sql, f)
+    else:
+        # psycopg 3
+        with raw_cursor.copy(sql) as copy:
+            for data in copy:
+                f.write(data)
+    return raw_cursor.rowcount
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
@@ -0,0 +1,172 @@
+import hashlib
+import hmac
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from authentication.models import User
+from campaign.models import Campaign
+from .models import Donation, PaystackEvent
+
+
+def verify_signature(body, signature):
+    """
+    Paystack signs the raw request body with HMAC-SHA512 keyed by the
+    secret key and sends the hex digest in x-paystack-signature.
+    """
+    if not signature:
+        return False
+    expected = hmac.new(settings.PAYSTACK_SECRET_KEY.encode(), body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def event_id(payload):
+    """
+    Paystack webhooks carry no delivery id, but a retried delivery repeats
+    the same event name and transaction id, which together identify it.
+    """
+    data = payload.get('data') or {}
+    identifier = data.get('id') or data.get('reference')
+    if not payload.get('event') or not identifier:
+        return None
+    return f"{payload['event']}:{identifier}"
+
+
+def record_event(payload):
+    """
+    Store a webhook for the worker. A redelivery of a stored event is
+    dropped by the unique event_id. Returns False if the payload carries
+    nothing to identify it by.
+    """
+    identifier = event_id(payload)
+    if identifier is None:
+        return False
+    PaystackEvent.objects.bulk_create(
+        [PaystackEvent(event_id=identifier, event_type=payload['event'], payload=payload)],
+        ignore_conflicts=True,
+    )
+    return True
+
+
+def process_event(event):
+    """
+    Apply one stored event and mark it processed, or ignored when nothing
+    handles its type. Runs in one transaction, so an event whose
+    processing fails leaves no rows behind and can simply be retried.
+    """
+    handler = EVENT_HANDLERS.get(event.event_type)
+    with transaction.atomic():
+        applied = handler(event.payload['data']) if handler else False
+        event.status = 'processed' if applied else 'ignored'
+        event.last_error = None
+        event.processed_at = timezone.now()
+        event.save(update_fields=['status', 'last_error', 'processed_at'])
+    return event.status
+
+
+def handle_charge_success(data):
+    """
+    Record the donation a successful charge paid for. The metadata is set
+    when the payment is initialized: `campaign` (slug), and optionally
+    `donation_id`, `donor_id`, `comment`, `is_anonymous` and
+    `referral_code`. A charge for a donation made through
+    POST /campaign/<slug>/donate/ carries its `donation_id` and settles
+    that donation instead of adding another.
+    """
+    if data.get('status') != 'success':
+        return False
+    # Already applied by an earlier delivery, e.g. one that was recorded
+    # under another event name for the same charge.
+    if Donation.objects.filter(reference=data['reference']).exists():
+        return True
+
+    metadata = data.get('metadata') or {}
+    if not isinstance(metadata, dict) or not metadata.get('campaign'):
+        # Not a donation, e.g. a charge made outside the platform.
+        return False
+    campaign = Campaign.objects.only('id').get(slug=metadata['campaign'])
+    # Paystack amounts are in kobo.
+    amount = Decimal(data['amount']) / 100
+
+    donation = None
+    if metadata.get('donation_id'):
+        donation = settle_donation(metadata['donation_id'], campaign, amount, data['reference'])
+    if donation is None:
+        donation = create_donation(campaign, amount, data, metadata)
+
+    if metadata.get('referral_code'):
+        credit_affiliate(metadata['referral_code'], donation)
+    return True
+
+
+def settle_donation(donation_id, campaign, amount, reference):
+    """
+    Attach the charge to an unpaid donation of the campaign. The donation
+    already counts towards the totals, which move only if the paid amount
+    differs. Returns None if there is no such donation.
+    """
+    try:
+        donation_id = int(donation_id)
+    except (TypeError, ValueError):
+        return None
+    donation = (
+        Donation.objects.select_for_update()
+        .filter(id=donation_id, campaign=campaign, reference__isnull=True)
+        .first()
+    )
+    if donation is None:
+        return None
+    donation.amount = amount
+    donation.reference = reference
+    donation.save(update_fields=['amount', 'reference'])
+    return donation
+
+
+def create_donation(campaign, amount, data, metadata):
+    donor = None
+    if metadata.get('donor_id'):
+        donor = User.objects.filter(id=metadata['donor_id']).first()
+    elif (data.get('customer') or {}).get('email'):
+        donor = User.objects.filter(email__iexact=data['customer']['email']).first()
+
+    return Donation.objects.create(
+        campaign=campaign,
+        donor=donor,
+        amount=amount,
+        comment=metadata.get('comment') or None,
+        is_anonymous=bool(metadata.get('is_anonymous')),
+        reference=data['reference'],
+    )
+
+
+def credit_affiliate(referral_code, donation):
+    """
+    Pay the referring affiliate their commission on a donation into their
+    wallet. Affiliates do not earn on their own donations.
+    """
+    # affiliate.models imports donations.models, so import it here.
+    from affiliate.models import Affiliate, AffiliateEarnings, AffiliateTransaction, AffiliateWallet
+
+    affiliate = Affiliate.objects.filter(referral_code=referral_code).first()
+    if affiliate is None or affiliate.user_id == donation.donor_id:
+        return None
+
+    percent = Decimal(str(settings.AFFILIATE_COMMISSION_PERCENT))
+    earned = (donation.amount * percent / 100).quantize(Decimal('0.01'))
+    earning = AffiliateEarnings.objects.create(affiliate=affiliate, donation=donation, amount_earned=earned)
+
+    wallet, _ = AffiliateWallet.objects.get_or_create(affiliate=affiliate)
+    AffiliateWallet.objects.filter(id=wallet.id).update(balance=F('balance') + earned, last_updated=timezone.now())
+    AffiliateTransaction.objects.create(
+        wallet=wallet,
+        amount=earned,
+        transaction_type='EARNING',
+        Description=f"Commission on donation {donation.reference}",
+    )
+    return earning
+
+
+EVENT_HANDLERS = {
+    'charge.success': handle_charge_success,
+}
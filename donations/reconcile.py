@@ -0,0 +1,217 @@
+import csv
+import json
+import os
+from decimal import Decimal, InvalidOperation
+from django.db import connection
+from django.db.models import Max, Min
+from django.db.models.expressions import RawSQL
+from .models import Donation
+
+
+# Paystack export rows are loaded into this temporary table, indexed by
+# reference, and joined against donations by the database. Memory stays
+# flat however long the export is.
+EXPORT_TABLE = "reconcile_paystack_export"
+INSERT_BATCH_SIZE = 5000
+FETCH_SIZE = 2000
+
+# Column names the Paystack dashboard and API use for each field.
+REFERENCE_KEYS = ("reference", "transaction reference")
+AMOUNT_KEYS = ("amount", "amount paid")
+STATUS_KEYS = ("status", "transaction status")
+
+
+FILE_TYPES = {".csv": "csv", ".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+def file_type_of(path):
+    return FILE_TYPES.get(os.path.splitext(path)[1].lower())
+
+
+def read_export(path, file_type):
+    """
+    Yield the rows of a Paystack transaction export as dicts. CSV and
+    JSON Lines are streamed, and a JSON array is decoded one element at a
+    time. A JSON object, such as a saved API page, is read whole and its
+    `data` list is returned. Raises ValueError on a row that is not an
+    object.
+    """
+    for number, row in enumerate(_read_rows(path, file_type), 1):
+        if not isinstance(row, dict):
+            raise ValueError(f"Row {number} is a JSON {type(row).__name__}, expected an object.")
+        yield row
+
+
+def _read_rows(path, file_type):
+    with open(path, newline="" if file_type == "csv" else None, encoding="utf-8-sig") as f:
+        if file_type == "csv":
+            yield from csv.DictReader(f)
+        elif file_type == "jsonl":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from iter_json(f)
+
+
+def iter_json(f, chunk_size=1 << 16):
+    decoder = json.JSONDecoder()
+    buffer = f.read(chunk_size).lstrip()
+    if buffer.startswith("{"):
+        document = json.loads(buffer + f.read())
+        yield from document.get("data") or []
+        return
+    if not buffer.startswith("["):
+        raise ValueError("Expected a JSON array or object.")
+
+    pos = 1
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # The element continues past the buffer; read more.
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise ValueError("The JSON array ends early.")
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield item
+        pos = end
+        if pos > chunk_size:
+            buffer, pos = buffer[pos:], 0
+
+
+def normalize(row, amount_unit):
+    """
+    Reduce an export row to (reference, amount in kobo, successful).
+    Returns None for rows without a reference.
+    """
+    fields = {str(key).strip().lower(): value for key, value in row.items()}
+    reference = _first(fields, REFERENCE_KEYS)
+    if not reference:
+        return None
+    try:
+        amount = Decimal(str(_first(fields, AMOUNT_KEYS)).replace(",", ""))
+    except InvalidOperation:
+        amount = None
+    if amount is not None and amount_unit == "naira":
+        amount *= 100
+    status = str(_first(fields, STATUS_KEYS) or "").strip().lower()
+    return str(reference).strip(), None if amount is None else int(amount.to_integral_value()), status == "success"
+
+
+def _first(fields, keys):
+    for key in keys:
+        if fields.get(key) not in (None, ""):
+            return fields[key]
+    return None
+
+
+class Reconciliation:
+    """
+    Load an export into the temporary table, then query discrepancies.
+    Use as a context manager so the table is always dropped.
+    """
+
+    def __init__(self):
+        self.donations = connection.ops.quote_name(Donation._meta.db_table)
+
+    def __enter__(self):
+        self.cursor = connection.cursor()
+        self.cursor.execute(f"DROP TABLE IF EXISTS {EXPORT_TABLE}")
+        self.cursor.execute(
+            f"CREATE TEMPORARY TABLE {EXPORT_TABLE} "
+            f"(reference varchar(100) NOT NULL, amount bigint, successful boolean NOT NULL)"
+        )
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cursor.execute(f"DROP TABLE IF EXISTS {EXPORT_TABLE}")
+        self.cursor.close()
+
+    def load(self, rows):
+        """
+        Insert normalized rows in batches. Yields the running row count
+        after every batch.
+        """
+        sql = f"INSERT INTO {EXPORT_TABLE} (reference, amount, successful) VALUES (%s, %s, %s)"
+        batch, loaded = [], 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH_SIZE:
+                self.cursor.executemany(sql, batch)
+                loaded += len(batch)
+                batch = []
+                yield loaded
+        if batch:
+            self.cursor.executemany(sql, batch)
+            loaded += len(batch)
+        self.cursor.execute(f"CREATE INDEX {EXPORT_TABLE}_reference ON {EXPORT_TABLE} (reference)")
+        yield loaded
+
+    def duplicates(self):
+        """
+        References that appear as more than one successful export row.
+        """
+        return self._stream(
+            f"SELECT reference, COUNT(*) FROM {EXPORT_TABLE} WHERE successful "
+            f"GROUP BY reference HAVING COUNT(*) > 1 ORDER BY reference"
+        )
+
+    def missing_donations(self):
+        """
+        Successful transactions with no donation, once per reference even
+        if the export repeats it; duplicates() reports the repeats.
+        """
+        return self._stream(
+            f"SELECT e.reference, MAX(e.amount) FROM {EXPORT_TABLE} e "
+            f"LEFT JOIN {self.donations} d ON d.reference = e.reference "
+            f"WHERE e.successful AND d.id IS NULL GROUP BY e.reference ORDER BY e.reference"
+        )
+
+    def mismatched_amounts(self):
+        """
+        Donations whose amount differs from the settled transaction.
+        """
+        return self._stream(
+            f"SELECT d.reference, d.id, ROUND(d.amount * 100), e.amount FROM {EXPORT_TABLE} e "
+            f"JOIN {self.donations} d ON d.reference = e.reference "
+            f"WHERE e.successful AND (e.amount IS NULL OR ROUND(d.amount * 100) <> e.amount) ORDER BY d.reference"
+        )
+
+    def matched_window(self):
+        """
+        The first and last donation_date of donations found in the export.
+        """
+        window = Donation.objects.filter(
+            reference__in=RawSQL(f"SELECT reference FROM {EXPORT_TABLE} WHERE successful", [])
+        ).aggregate(first=Min("donation_date"), last=Max("donation_date"))
+        return window["first"], window["last"]
+
+    def missing_transactions(self, since, until):
+        """
+        Donations in [since, until] with no successful transaction. That
+        includes donations made through the API whose charge never settled
+        them, which count towards the totals without a reference.
+        """
+        return self._stream(
+            f"SELECT d.reference, d.id, ROUND(d.amount * 100) FROM {self.donations} d "
+            f"WHERE d.donation_date >= %s AND d.donation_date <= %s AND (d.reference IS NULL "
+            f"OR NOT EXISTS (SELECT 1 FROM {EXPORT_TABLE} e WHERE e.reference = d.reference AND e.successful)) "
+            f"ORDER BY d.reference, d.id",
+            [connection.ops.adapt_datetimefield_value(since), connection.ops.adapt_datetimefield_value(until)],
+        )
+
+    def _stream(self, sql, params=None):
+        # A server-side cursor on Postgres, so results arrive in batches.
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(FETCH_SIZE)
+                if not rows:
+                    return
+                yield from rows
@@ -0,0 +1,179 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDay, TruncHour
+from django.utils import timezone
+from campaign.cache import bump_campaign_versions_on_commit
+from campaign.models import Campaign
+from .models import DailyDonationRollup, Donation, HourlyDonationRollup, PendingRollupChange
+
+
+# Each rollup table with the Trunc function that maps a donation_date to
+# its bucket. Buckets are aligned to the current time zone, like TruncHour
+# and TruncDay themselves, so the signal path and the backfill agree.
+ROLLUPS = {
+    'hour': (HourlyDonationRollup, TruncHour),
+    'day': (DailyDonationRollup, TruncDay),
+}
+INTERVALS = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+
+
+def bucket_start(moment, interval):
+    moment = timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if interval == 'day' else moment
+
+
+def bucket_end(start, interval):
+    return start + INTERVALS[interval]
+
+
+def record_donation(campaign_id, donor_id, amount, donated_at, exclude_pk, sign=1):
+    """
+    Apply a donation change to the rollups now, or queue it for
+    apply_pending while the campaign is sharded. Changes keep queueing
+    until the ones queued before an unshard are applied, so a donor is
+    never checked against donations the buckets do not count yet.
+    """
+    queued = PendingRollupChange.objects.filter(campaign_id=OuterRef('pk'))
+    defer = Campaign.objects.filter(Q(total_shards__gt=0) | Exists(queued), pk=campaign_id).exists()
+    if not defer:
+        apply_donation(campaign_id, donor_id, amount, donated_at, exclude_pk, sign)
+        return
+    PendingRollupChange.objects.create(
+        campaign_id=campaign_id, donor_id=donor_id, amount=amount, donation_date=donated_at, sign=sign
+    )
+
+
+def apply_donation(campaign_id, donor_id, amount, donated_at, exclude_pk, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) one donation in every rollup table.
+    The amount and count UPDATE runs first so it holds the bucket row lock
+    while checking whether the donor already has another donation in the
+    bucket; concurrent donations from the same donor cannot both count.
+    """
+    for interval, (model, _) in ROLLUPS.items():
+        start = bucket_start(donated_at, interval)
+        rows = model.objects.filter(campaign_id=campaign_id, bucket=start)
+        changes = {'amount': F('amount') + amount * sign, 'donation_count': F('donation_count') + sign}
+        if not rows.update(**changes):
+            if sign < 0:
+                # Nothing to take away from, e.g. the campaign is being deleted.
+                continue
+            model.objects.bulk_create([model(campaign_id=campaign_id, bucket=start)], ignore_conflicts=True)
+            rows.update(**changes)
+
+        if donor_id is None:
+            continue
+        seen = Donation.objects.filter(
+            campaign_id=campaign_id,
+            donor_id=donor_id,
+            donation_date__gte=start,
+            donation_date__lt=bucket_end(start, interval),
+        ).exclude(pk=exclude_pk).exists()
+        if not seen:
+            rows.update(unique_donors=F('unique_donors') + sign)
+
+
+def applied_donations(campaign_id, donor_id, start, end):
+    """
+    How many of a donor's donations to a campaign in [start, end) the
+    buckets already count: the stored donations less the queued changes.
+    Both counts come from one statement, so a donation committing meanwhile
+    is seen on both sides or on neither.
+    """
+    in_bucket = Q(campaign_id=campaign_id, donor_id=donor_id, donation_date__gte=start, donation_date__lt=end)
+    stored = Donation.objects.filter(in_bucket).values('campaign_id').annotate(n=Count('pk')).values('n')
+    queued = PendingRollupChange.objects.filter(in_bucket).values('campaign_id').annotate(n=Sum('sign')).values('n')
+    return Campaign.objects.filter(pk=campaign_id).annotate(
+        applied=Coalesce(Subquery(stored), 0) - Coalesce(Subquery(queued), 0)
+    ).values_list('applied', flat=True).get()
+
+
+def apply_pending(campaign_id):
+    """
+    Apply a campaign's queued rollup changes, one UPDATE per touched bucket.
+    Returns the number of changes applied.
+    """
+    with transaction.atomic():
+        changes = list(PendingRollupChange.objects.select_for_update().filter(campaign_id=campaign_id).order_by('id'))
+        if not changes:
+            return 0
+
+        for interval, (model, _) in ROLLUPS.items():
+            totals = defaultdict(lambda: [0, 0])
+            donors = Counter()
+            for change in changes:
+                start = bucket_start(change.donation_date, interval)
+                totals[start][0] += change.amount * change.sign
+                totals[start][1] += change.sign
+                if change.donor_id is not None:
+                    donors[start, change.donor_id] += change.sign
+
+            # Counted while the changes are still queued, see applied_donations.
+            newcomers = Counter()
+            for (start, donor_id), net in donors.items():
+                before = applied_donations(campaign_id, donor_id, start, bucket_end(start, interval))
+                newcomers[start] += (before + net > 0) - (before > 0)
+
+            for start, (amount, count) in totals.items():
+                rows = model.objects.filter(campaign_id=campaign_id, bucket=start)
+                deltas = {
+                    'amount': F('amount') + amount,
+                    'donation_count': F('donation_count') + count,
+                    'unique_donors': F('unique_donors') + newcomers[start],
+                }
+                if not rows.update(**deltas):
+                    if count < 0:
+                        continue
+                    model.objects.bulk_create([model(campaign_id=campaign_id, bucket=start)], ignore_conflicts=True)
+                    rows.update(**deltas)
+
+        PendingRollupChange.objects.filter(id__in=[change.id for change in changes]).delete()
+        # Stats responses are cached under the campaign version.
+        bump_campaign_versions_on_commit(Campaign.objects.filter(pk=campaign_id).values_list('slug', flat=True))
+    return len(changes)
+
+
+def rebuild(start, end, campaign_ids=None):
+    """
+    Recompute every hourly and daily bucket in [start, end) from the raw
+    donations. `start` and `end` must fall on day boundaries. Returns the
+    number of rollup rows written.
+    """
+    donations = Donation.objects.filter(donation_date__gte=start, donation_date__lt=end)
+    if campaign_ids is not None:
+        donations = donations.filter(campaign_id__in=campaign_ids)
+
+    written = 0
+    with transaction.atomic():
+        # Queued changes in the range are part of the recount already.
+        queued = PendingRollupChange.objects.filter(donation_date__gte=start, donation_date__lt=end)
+        if campaign_ids is not None:
+            queued = queued.filter(campaign_id__in=campaign_ids)
+        queued.delete()
+
+        for model, trunc in ROLLUPS.values():
+            stale = model.objects.filter(bucket__gte=start, bucket__lt=end)
+            if campaign_ids is not None:
+                stale = stale.filter(campaign_id__in=campaign_ids)
+            stale.delete()
+
+            buckets = (
+                donations.annotate(rollup_bucket=trunc('donation_date'))
+                .values('campaign_id', 'rollup_bucket')
+                .annotate(total=Sum('amount'), donations=Count('id'), donors=Count('donor', distinct=True))
+                .order_by()
+            )
+            rows = model.objects.bulk_create([
+                model(
+                    campaign_id=bucket['campaign_id'],
+                    bucket=bucket['rollup_bucket'],
+                    amount=bucket['total'],
+                    donation_count=bucket['donations'],
+                    unique_donors=bucket['donors'],
+                )
+                for bucket in buckets
+            ], batch_size=1000)
+            written += len(rows)
+    return written
@@ -0,0 +1,36 @@
+from decimal import Decimal
+from rest_framework import serializers
+from .models import Donation, HourlyDonationRollup
+
+
+class DonationSerializer(serializers.ModelSerializer):
+    campaign = serializers.SlugRelatedField(slug_field='slug', read_only=True)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+
+    class Meta:
+        model = Donation
+        fields = ['id', 'campaign', 'amount', 'comment', 'is_anonymous', 'donation_date']
+        read_only_fields = ['id', 'campaign', 'donation_date']
+
+
+
+class DonationHistorySerializer(serializers.ModelSerializer):
+    """
+    A donation in the donor's giving history. Expects the campaign to be
+    selected with the donation, see UserDonationHistoryView.
+    """
+    campaign = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Donation
+        fields = ['id', 'campaign', 'amount', 'is_anonymous', 'donation_date']
+
+    def get_campaign(self, donation):
+        return {'title': donation.campaign.title, 'slug': donation.campaign.slug}
+
+
+
+class DonationRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = HourlyDonationRollup
+        fields = ['bucket', 'amount', 'donation_count', 'unique_donors']
@@ -0,0 +1,84 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from campaign.models import Campaign
+from campaign.cache import bump_campaign_versions_on_commit
+from campaign import counters, live
+from .models import Donation
+from . import history, rollups
+
+
+
+@receiver(pre_save, sender=Donation)
+def remember_previous_donation(sender, instance, **kwargs):
+    """
+    Keep the stored campaign, amount and donor of an existing donation so
+    post_save can move the campaign totals and rollups by the right delta.
+    """
+    instance._previous = None
+    if instance.pk:
+        instance._previous = Donation.objects.filter(pk=instance.pk).values_list('campaign_id', 'amount', 'donor_id').first()
+
+
+@receiver(post_save, sender=Donation)
+def update_campaign_totals(sender, instance, created, **kwargs):
+    """
+    Update the denormalized totals on Campaign whenever a donation is written.
+    """
+    previous = getattr(instance, '_previous', None)
+    if previous:
+        campaign_id, amount, _ = previous
+        if campaign_id == instance.campaign_id and amount == instance.amount:
+            return
+        counters.add_to_totals(campaign_id, -amount, -1)
+        if campaign_id != instance.campaign_id:
+            bump_campaign_versions_on_commit(Campaign.objects.filter(pk=campaign_id).values_list('slug', flat=True))
+            live.publish_campaign_on_commit(campaign_id)
+    # New donations also feed the campaign's trending score.
+    counters.add_to_totals(instance.campaign_id, instance.amount, 1, donated_at=instance.donation_date if created else None)
+    bump_campaign_versions_on_commit([instance.campaign.slug])
+    live.publish_campaign_on_commit(instance.campaign_id)
+
+
+@receiver(post_save, sender=Donation)
+def update_donation_rollups(sender, instance, created, **kwargs):
+    """
+    Move the donation's hourly and daily rollup buckets.
+    """
+    previous = getattr(instance, '_previous', None)
+    if previous:
+        if previous == (instance.campaign_id, instance.amount, instance.donor_id):
+            return
+        campaign_id, amount, donor_id = previous
+        rollups.record_donation(campaign_id, donor_id, amount, instance.donation_date, instance.pk, sign=-1)
+    rollups.record_donation(instance.campaign_id, instance.donor_id, instance.amount, instance.donation_date, instance.pk)
+
+
+@receiver(post_delete, sender=Donation)
+def remove_from_campaign_totals(sender, instance, **kwargs):
+    """
+    Take a deleted donation back out of the campaign totals.
+    """
+    counters.add_to_totals(instance.campaign_id, -instance.amount, -1)
+    bump_campaign_versions_on_commit(Campaign.objects.filter(pk=instance.campaign_id).values_list('slug', flat=True))
+    live.publish_campaign_on_commit(instance.campaign_id)
+
+
+@receiver(post_save, sender=Donation)
+@receiver(post_delete, sender=Donation)
+def forget_donor_totals(sender, instance, **kwargs):
+    """
+    Drop the cached lifetime totals of the donor, and of the previous donor
+    if the donation moved.
+    """
+    previous = getattr(instance, '_previous', None)
+    history.forget_donor_totals_on_commit([instance.donor_id, previous[2] if previous else None])
+
+
+@receiver(post_delete, sender=Donation)
+def remove_from_donation_rollups(sender, instance, **kwargs):
+    """
+    Take a deleted donation back out of its rollup buckets.
+    """
+    rollups.record_donation(
+        instance.campaign_id, instance.donor_id, instance.amount, instance.donation_date, instance.pk, sign=-1
+    )
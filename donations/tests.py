@@ -1,3 +1,677 @@
+import csv
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from affiliate.models import Affiliate, AffiliateEarnings
+from authentication.models import User
+from campaign import counters
+from campaign.models import Campaign, Category, TrendingScore
+from .history import donor_totals
+from .models import (
+    ArchivedDonorTotal, DailyDonationRollup, Donation, DonationArchive, HourlyDonationRollup, PaystackEvent,
+    PendingRollupChange,
+)
+from .payments import record_event
+from . import partitions, rollups
 
-# Create your tests here.
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'paystack')
+
+
+
+class CampaignTotalsTests(TestCase):
+    """
+    Creating, changing and deleting donations keeps raised_amount and
+    donor_count of their campaigns in step.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        category = Category.objects.create(name="Health")
+        cls.wells = Campaign.objects.create(owner=cls.owner, category=category, title="Wells", description="Wells", goal=1000)
+        cls.books = Campaign.objects.create(owner=cls.owner, category=category, title="Books", description="Books", goal=1000)
+
+    def totals(self, campaign):
+        campaign.refresh_from_db()
+        return campaign.raised_amount, campaign.donor_count
+
+    def test_created_donations_are_added(self):
+        Donation.objects.create(campaign=self.wells, amount=Decimal("10.50"))
+        Donation.objects.create(campaign=self.wells, donor=self.owner, amount=20)
+        self.assertEqual(self.totals(self.wells), (Decimal("30.50"), 2))
+        self.assertEqual(self.totals(self.books), (Decimal("0"), 0))
+
+    def test_changed_amount_moves_the_total(self):
+        donation = Donation.objects.create(campaign=self.wells, amount=10)
+        donation.amount = 25
+        donation.save()
+        self.assertEqual(self.totals(self.wells), (Decimal("25"), 1))
+
+        # Saving without a change leaves the totals alone.
+        donation.comment = "Thanks"
+        donation.save()
+        self.assertEqual(self.totals(self.wells), (Decimal("25"), 1))
+
+    def test_moved_donation_moves_between_campaigns(self):
+        Donation.objects.create(campaign=self.wells, amount=5)
+        donation = Donation.objects.create(campaign=self.wells, amount=10)
+        donation.campaign = self.books
+        donation.amount = 12
+        donation.save()
+        self.assertEqual(self.totals(self.wells), (Decimal("5"), 1))
+        self.assertEqual(self.totals(self.books), (Decimal("12"), 1))
+
+    def test_deleted_donation_is_removed(self):
+        keep = Donation.objects.create(campaign=self.wells, amount=5)
+        Donation.objects.create(campaign=self.wells, amount=10).delete()
+        self.assertEqual(self.totals(self.wells), (Decimal("5"), 1))
+        keep.delete()
+        self.assertEqual(self.totals(self.wells), (Decimal("0"), 0))
+
+
+
+class ShardedCampaignDonationTests(TestCase):
+    """
+    Donations to a sharded campaign leave its trending score and rollup
+    buckets alone, and folding brings both to where they would have been.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        cls.donors = [
+            User.objects.create_user(email=f"donor{i}@example.com", password="x", first_name="Ada", last_name="Donor")
+            for i in range(3)
+        ]
+        category = Category.objects.create(name="Health")
+        cls.sharded, cls.direct = [
+            Campaign.objects.create(owner=cls.owner, category=category, title=title, description="Wells", goal=1000)
+            for title in ("Sharded", "Direct")
+        ]
+
+    def setUp(self):
+        cache.clear()
+        counters.shard_totals(self.sharded.id, shards=4)
+
+    def donate(self, campaign):
+        """
+        The same donations, edits and deletes for either campaign.
+        """
+        first, second, third = self.donors
+        donations = [
+            Donation.objects.create(campaign=campaign, donor=donor, amount=amount)
+            for donor, amount in ((first, 10), (first, 20), (second, 5), (None, 7), (third, 1))
+        ]
+        donations[1].amount = 25
+        donations[1].save()
+        donations[2].donor = third
+        donations[2].save()
+        donations[4].delete()
+
+    def rollup_rows(self, campaign, model):
+        return list(
+            model.objects.filter(campaign=campaign).order_by('bucket')
+            .values_list('bucket', 'amount', 'donation_count', 'unique_donors')
+        )
+
+    def fold(self):
+        call_command('fold_campaign_totals', stdout=StringIO())
+
+    def test_sharded_donations_do_not_touch_trending_or_rollups(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.donate(self.sharded)
+        tables = ('campaign_trendingscore', 'donations_hourlydonationrollup', 'donations_dailydonationrollup')
+        for query in queries.captured_queries:
+            self.assertFalse(any(table in query['sql'] for table in tables), query['sql'])
+        self.assertTrue(PendingRollupChange.objects.filter(campaign=self.sharded).exists())
+
+    def test_fold_matches_unsharded_campaign(self):
+        self.donate(self.sharded)
+        self.donate(self.direct)
+        self.fold()
+
+        self.assertFalse(PendingRollupChange.objects.exists())
+        for model in (HourlyDonationRollup, DailyDonationRollup):
+            expected = self.rollup_rows(self.direct, model)
+            self.assertEqual(self.rollup_rows(self.sharded, model), expected)
+            self.assertEqual(expected[0][1:], (47, 4, 2))
+
+        # Donors the buckets already count.
+        for campaign in (self.sharded, self.direct):
+            Donation.objects.create(campaign=campaign, donor=self.donors[0], amount=3)
+            Donation.objects.get(campaign=campaign, donor=self.donors[2]).delete()
+        self.fold()
+        for model in (HourlyDonationRollup, DailyDonationRollup):
+            expected = self.rollup_rows(self.direct, model)
+            self.assertEqual(self.rollup_rows(self.sharded, model), expected)
+            self.assertEqual(expected[0][1:], (45, 4, 1))
+
+        sharded = TrendingScore.objects.get(campaign=self.sharded)
+        direct = TrendingScore.objects.get(campaign=self.direct)
+        self.assertAlmostEqual(sharded.velocity / direct.velocity, 1, places=3)
+        self.sharded.refresh_from_db()
+        self.assertEqual(self.sharded.raised_amount, 45)
+
+    def test_fold_after_unshard_catches_up(self):
+        self.donate(self.sharded)
+        counters.fold(self.sharded.id, unshard=True)
+        # Still queued changes keep new donations queued too.
+        Donation.objects.create(campaign=self.sharded, donor=self.donors[0], amount=8)
+        self.assertFalse(HourlyDonationRollup.objects.filter(campaign=self.sharded).exists())
+        self.fold()
+
+        [(_, amount, count, donors)] = self.rollup_rows(self.sharded, HourlyDonationRollup)
+        self.assertEqual((amount, count, donors), (55, 5, 2))
+        Donation.objects.create(campaign=self.sharded, donor=self.donors[1], amount=1)
+        self.assertFalse(PendingRollupChange.objects.exists())
+
+    def test_rebuild_drops_queued_changes(self):
+        self.donate(self.sharded)
+        start = rollups.bucket_start(Donation.objects.earliest('donation_date').donation_date, 'day')
+        rollups.rebuild(start, start + rollups.INTERVALS['day'] * 2)
+        rebuilt = self.rollup_rows(self.sharded, DailyDonationRollup)
+        self.fold()
+        self.assertEqual(self.rollup_rows(self.sharded, DailyDonationRollup), rebuilt)
+
+
+
+class DonateViewTests(TestCase):
+    """
+    POST /campaign/<slug>/donate/ creates a donation once per
+    Idempotency-Key and replays it for retries of the same request.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        cls.donor = User.objects.create_user(email="donor@example.com", password="x", first_name="Ada", last_name="Donor")
+        category = Category.objects.create(name="Health")
+        cls.campaign = Campaign.objects.create(
+            owner=cls.owner, category=category, title="Wells", description="Wells", goal=1000
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.donor)
+
+    def donate(self, amount, key=None, slug=None):
+        headers = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+        return self.client.post(
+            f"/api/campaign/{slug or self.campaign.slug}/donate/", {"amount": amount}, format="json", **headers
+        )
+
+    def totals(self):
+        self.campaign.refresh_from_db()
+        return self.campaign.raised_amount, self.campaign.donor_count
+
+    def test_donation_is_created(self):
+        response = self.donate("25.00", key="checkout-1")
+        self.assertEqual(response.status_code, 201, response.data)
+        donation = Donation.objects.get()
+        self.assertEqual(response.data["data"]["id"], donation.id)
+        self.assertEqual(response.data["data"]["campaign"], self.campaign.slug)
+        self.assertEqual((donation.donor, donation.amount, donation.idempotency_key), (self.donor, Decimal("25"), "checkout-1"))
+        self.assertEqual(self.totals(), (Decimal("25"), 1))
+
+    def test_retry_with_the_same_key_is_replayed(self):
+        first = self.donate("25.00", key="checkout-1")
+        retry = self.donate("25.00", key="checkout-1")
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.data["data"], first.data["data"])
+        self.assertEqual(Donation.objects.count(), 1)
+        self.assertEqual(self.totals(), (Decimal("25"), 1))
+
+        # Without a key every request is a new donation.
+        self.assertEqual(self.donate("25.00").status_code, 201)
+        self.assertEqual(self.donate("25.00").status_code, 201)
+        self.assertEqual(self.totals(), (Decimal("75"), 3))
+
+    def test_key_reused_for_another_amount_is_refused(self):
+        self.donate("25.00", key="checkout-1")
+        response = self.donate("30.00", key="checkout-1")
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Donation.objects.get().amount, Decimal("25"))
+        self.assertEqual(self.totals(), (Decimal("25"), 1))
+
+    def test_closed_campaigns_refuse_donations(self):
+        Campaign.objects.filter(pk=self.campaign.pk).update(is_active=False)
+        self.assertEqual(self.donate("25.00", key="checkout-1").status_code, 400)
+
+        Campaign.objects.filter(pk=self.campaign.pk).update(is_active=True, end_date=timezone.now() - timedelta(days=1))
+        self.assertEqual(self.donate("25.00", key="checkout-2").status_code, 400)
+        self.assertFalse(Donation.objects.exists())
+        self.assertEqual(self.totals(), (Decimal("0"), 0))
+
+    def test_bad_requests_are_refused(self):
+        self.assertEqual(self.donate("0.00").status_code, 400)
+        self.assertEqual(self.donate("25.00", key="k" * 256).status_code, 400)
+        self.assertEqual(self.donate("25.00", slug="missing").status_code, 404)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.donate("25.00").status_code, 401)
+        self.assertFalse(Donation.objects.exists())
+
+
+
+class CampaignStatsETagTests(TestCase):
+    """
+    A stats window that ends now by default gets a new ETag once a new
+    bucket starts, even if no donation came in.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        category = Category.objects.create(name="Health")
+        cls.campaign = Campaign.objects.create(
+            owner=cls.owner, category=category, title="Wells", description="Wells", goal=1000
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def get(self, at, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        with mock.patch("django.utils.timezone.now", return_value=at):
+            return self.client.get(f"/api/campaign/{self.campaign.slug}/stats/?interval=hour", **headers)
+
+    def test_etag_follows_the_current_bucket(self):
+        at = datetime(2026, 3, 1, 10, 5, tzinfo=dt_timezone.utc)
+        first = self.get(at)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(first.data["data"]["buckets"]), 48)
+
+        self.assertEqual(self.get(at + timedelta(minutes=50), first["ETag"]).status_code, 304)
+
+        later = self.get(at + timedelta(hours=1), first["ETag"])
+        self.assertEqual(later.status_code, 200)
+        self.assertNotEqual(later["ETag"], first["ETag"])
+        self.assertEqual(later.data["data"]["end"] - first.data["data"]["end"], timedelta(hours=1))
+
+
+
+class PaystackWebhookTests(TestCase):
+    """
+    Recorded Paystack webhooks create or settle donations, and each charge
+    counts towards the campaign totals once.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        cls.donor = User.objects.create_user(email="donor@example.com", password="x", first_name="Ada", last_name="Donor")
+        category = Category.objects.create(name="Health")
+        cls.campaign = Campaign.objects.create(
+            owner=cls.owner, category=category, title="Wells", description="Wells", goal=100000
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def fixture(self, name, **metadata):
+        with open(os.path.join(FIXTURES, name)) as f:
+            payload = json.load(f)
+        payload['data']['metadata'].update(campaign=self.campaign.slug, **metadata)
+        return payload
+
+    def deliver(self, payload):
+        record_event(payload)
+        call_command('process_paystack_events', stdout=StringIO())
+
+    def totals(self):
+        self.campaign.refresh_from_db()
+        return self.campaign.raised_amount, self.campaign.donor_count
+
+    def donate_through_api(self, amount):
+        client = APIClient()
+        client.force_authenticate(self.donor)
+        response = client.post(
+            f"/api/campaign/{self.campaign.slug}/donate/", {"amount": amount}, format="json",
+            HTTP_IDEMPOTENCY_KEY="checkout-1",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data["data"]["id"]
+
+    def test_charge_creates_one_donation(self):
+        payload = self.fixture('charge_success.json')
+        self.deliver(payload)
+        self.deliver(payload)
+
+        donation = Donation.objects.get()
+        self.assertEqual(donation.reference, 'don_7PVGX8MEk85tgeEpVDtD')
+        self.assertEqual(donation.donor, self.donor)
+        self.assertEqual(donation.amount, Decimal('5000'))
+        self.assertEqual(self.totals(), (Decimal('5000'), 1))
+        self.assertEqual(PaystackEvent.objects.get().status, 'processed')
+
+    def test_charge_settles_the_api_donation(self):
+        donation_id = self.donate_through_api('5000.00')
+        self.assertEqual(self.totals(), (Decimal('5000'), 1))
+
+        self.deliver(self.fixture('charge_success.json', donation_id=donation_id))
+
+        donation = Donation.objects.get()
+        self.assertEqual(donation.id, donation_id)
+        self.assertEqual(donation.reference, 'don_7PVGX8MEk85tgeEpVDtD')
+        self.assertEqual(self.totals(), (Decimal('5000'), 1))
+
+    def test_settled_amount_is_what_was_paid(self):
+        donation_id = self.donate_through_api('4000.00')
+        self.deliver(self.fixture('charge_success.json', donation_id=donation_id))
+        self.assertEqual(Donation.objects.get().amount, Decimal('5000'))
+        self.assertEqual(self.totals(), (Decimal('5000'), 1))
+
+    def test_settled_donation_is_not_settled_again(self):
+        donation_id = self.donate_through_api('5000.00')
+        self.deliver(self.fixture('charge_success.json', donation_id=donation_id))
+        # Another charge naming the same donation is another payment.
+        self.deliver(self.fixture('charge_success_referral.json', donation_id=donation_id))
+        self.assertEqual(Donation.objects.count(), 2)
+        self.assertEqual(self.totals(), (Decimal('17500'), 2))
+
+    def test_referral_is_credited(self):
+        referrer = User.objects.create_user(email="ref@example.com", password="x", first_name="Ada", last_name="Ref")
+        affiliate = Affiliate.objects.create(user=referrer, referral_code="SAMPLEREF", subaccount_code="ACCT_1")
+        self.deliver(self.fixture('charge_success_referral.json'))
+
+        earning = AffiliateEarnings.objects.get()
+        self.assertEqual(earning.affiliate, affiliate)
+        self.assertEqual(earning.donation.reference, 'don_Qm3c8ZsTfJd2NwYk4RbL')
+        self.assertIsNone(earning.donation.donor)
+
+    def test_other_events_are_ignored(self):
+        with open(os.path.join(FIXTURES, 'transfer_success.json')) as f:
+            self.deliver(json.load(f))
+        self.assertFalse(Donation.objects.exists())
+        self.assertEqual(PaystackEvent.objects.get().status, 'ignored')
+
+    def test_reconcile_reports_unpaid_api_donations(self):
+        self.deliver(self.fixture('charge_success.json'))
+        unpaid = self.donate_through_api('300.00')
+        today = timezone.localdate().isoformat()
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as export:
+            export.write(json.dumps({'reference': 'don_7PVGX8MEk85tgeEpVDtD', 'amount': 500000, 'status': 'success'}))
+        self.addCleanup(os.remove, export.name)
+
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, '1 missing_transaction'):
+            call_command('reconcile_donations', export.name, '--since', today, '--until', today, stdout=out)
+        self.assertIn(f'donation_id={unpaid}', out.getvalue())
+
+
+
+class ReconcileDonationsTests(TestCase):
+    """
+    reconcile_donations reads every export format, refuses rows that are
+    not objects and reports each problem reference once.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        category = Category.objects.create(name="Health")
+        campaign = Campaign.objects.create(owner=owner, category=category, title="Wells", description="Wells", goal=1000)
+        Donation.objects.create(campaign=campaign, amount=50, reference='don_paid')
+
+    def export(self, suffix, content):
+        with tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False) as f:
+            f.write(content)
+        self.addCleanup(os.remove, f.name)
+        return f.name
+
+    def reconcile(self, path):
+        out = StringIO()
+        try:
+            call_command('reconcile_donations', path, stdout=out)
+        except CommandError as e:
+            return out.getvalue(), str(e)
+        return out.getvalue(), None
+
+    def test_non_object_rows_are_refused(self):
+        for suffix, content in (('.json', '[[1, 2]]'), ('.jsonl', '{"reference": "don_paid"}\n42\n'), ('.json', '{"data": [1]}')):
+            with self.subTest(content=content):
+                with self.assertRaisesMessage(CommandError, 'expected an object'):
+                    call_command('reconcile_donations', self.export(suffix, content), stdout=StringIO())
+
+    def test_repeated_missing_reference_is_reported_once(self):
+        rows = [
+            {'reference': 'don_paid', 'amount': 5000, 'status': 'success'},
+            {'reference': 'don_lost', 'amount': 700, 'status': 'success'},
+            {'reference': 'don_lost', 'amount': 700, 'status': 'success'},
+        ]
+        out, error = self.reconcile(self.export('.json', json.dumps(rows)))
+        self.assertEqual(error, '1 duplicate, 1 missing_donation')
+        self.assertIn('Transactions without a donation: 1', out)
+
+    def test_matching_export_passes(self):
+        out, error = self.reconcile(self.export('.csv', 'Reference,Amount Paid,Status\ndon_paid,50.00,success\n'))
+        self.assertIsNone(error)
+        self.assertIn('Donations match the Paystack export.', out)
+
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Donations are only partitioned on Postgres')
+class DefaultPartitionTests(TestCase):
+    """
+    Donations dated outside every monthly partition are kept in the DEFAULT
+    partition until their month is created, then moved into it.
+    """
+
+    MONTH = datetime(2031, 1, 1, tzinfo=dt_timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        category = Category.objects.create(name="Health")
+        cls.campaign = Campaign.objects.create(owner=owner, category=category, title="Wells", description="Wells", goal=1000)
+
+    def stray_donation(self):
+        donation = Donation.objects.create(campaign=self.campaign, amount=5, reference='don_future')
+        Donation.objects.filter(pk=donation.pk).update(donation_date=self.MONTH + timedelta(days=3))
+        return donation
+
+    def partition_of(self, donation):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT tableoid::regclass::text FROM {partitions.PARENT} WHERE id = %s", [donation.pk])
+            return cursor.fetchone()[0]
+
+    def test_creating_the_month_moves_its_donations(self):
+        donation = self.stray_donation()
+        self.assertEqual(self.partition_of(donation), partitions.DEFAULT_PARTITION)
+
+        name, moved = partitions.create_partition(self.MONTH)
+
+        self.assertEqual((name, moved), (partitions.partition_name(self.MONTH), 1))
+        self.assertEqual(self.partition_of(donation), name)
+        self.assertEqual(partitions.default_partition_rows(), 0)
+        self.assertIn(name, [name for name, _, _ in partitions.attached_partitions()])
+        # The reference is still claimed, and the claim triggers are back.
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Donation.objects.create(campaign=self.campaign, amount=5, reference='don_future')
+        Donation.objects.filter(pk=donation.pk).delete()
+        Donation.objects.create(campaign=self.campaign, amount=5, reference='don_future')
+
+    def test_detach_keeps_the_default_partition(self):
+        donation = self.stray_donation()
+        Donation.objects.filter(pk=donation.pk).update(donor=User.objects.get(email="owner@example.com"))
+        name, _ = partitions.create_partition(self.MONTH)
+
+        partitions.detach_partition(name, self.MONTH, partitions.add_months(self.MONTH, 1))
+
+        self.assertNotIn(name, [name for name, _, _ in partitions.attached_partitions()])
+        self.assertEqual(partitions.detached_partitions(), [name])
+        self.assertEqual(partitions.default_partition_rows(), 0)
+        self.assertFalse(Donation.objects.filter(pk=donation.pk).exists())
+        archive = DonationArchive.objects.get(partition=name)
+        self.assertEqual((archive.row_count, archive.amount, archive.donor_totals_kept), (1, 5, True))
+        self.assertEqual(ArchivedDonorTotal.objects.get().archive, archive)
+
+    def test_rotate_warns_about_stray_donations(self):
+        self.stray_donation()
+        err = StringIO()
+        call_command('rotate_donation_partitions', '--retain', '0', stdout=StringIO(), stderr=err)
+        self.assertIn(f'1 donations are in {partitions.DEFAULT_PARTITION}', err.getvalue())
+
+
+
+class DonorTotalsTests(TestCase):
+    """
+    Lifetime donor totals count archived months from their kept
+    ArchivedDonorTotal rows, and say from when they count otherwise.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        cls.donor = User.objects.create_user(email="donor@example.com", password="x", first_name="Ada", last_name="Donor")
+        category = Category.objects.create(name="Health")
+        cls.wells, cls.schools, cls.roads = [
+            Campaign.objects.create(owner=owner, category=category, title=title, description="Help", goal=1000)
+            for title in ("Wells", "Schools", "Roads")
+        ]
+        cls.archived_until = datetime(2025, 2, 1, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        cache.clear()
+
+    def archive(self, start, end, kept=True):
+        return DonationArchive.objects.create(
+            partition=partitions.partition_name(start), range_start=start, range_end=end, donor_totals_kept=kept
+        )
+
+    def test_archived_months_are_counted(self):
+        Donation.objects.create(campaign=self.wells, donor=self.donor, amount=10)
+        archive = self.archive(datetime(2025, 1, 1, tzinfo=dt_timezone.utc), self.archived_until)
+        for campaign, amount in ((self.wells, 7), (self.schools, 3)):
+            ArchivedDonorTotal.objects.create(
+                archive=archive, donor=self.donor, campaign=campaign, amount=amount, donation_count=2,
+                last_donation_date=self.archived_until - timedelta(days=1),
+            )
+        # Still in the month being detached, already counted above.
+        detaching = Donation.objects.create(campaign=self.roads, donor=self.donor, amount=100)
+        Donation.objects.filter(pk=detaching.pk).update(donation_date=self.archived_until - timedelta(days=2))
+
+        totals = donor_totals(self.donor.pk)
+        self.assertEqual(totals["total_donated"], "20.00")
+        self.assertEqual(totals["donation_count"], 5)
+        self.assertEqual(totals["campaigns_supported"], 2)
+        self.assertEqual(totals["last_donation_date"], Donation.objects.get(campaign=self.wells).donation_date)
+        self.assertIsNone(totals["counted_since"])
+
+    def test_months_dropped_without_totals_are_reported(self):
+        self.archive(datetime(2024, 12, 1, tzinfo=dt_timezone.utc), datetime(2025, 1, 1, tzinfo=dt_timezone.utc), kept=False)
+        self.archive(datetime(2025, 1, 1, tzinfo=dt_timezone.utc), self.archived_until)
+        Donation.objects.create(campaign=self.wells, donor=self.donor, amount=10)
+
+        totals = donor_totals(self.donor.pk)
+        self.assertEqual((totals["total_donated"], totals["donation_count"]), ("10.00", 1))
+        self.assertEqual(totals["counted_since"], datetime(2025, 1, 1, tzinfo=dt_timezone.utc))
+
+    @skipUnless(connection.vendor == 'postgresql', 'Donations are only partitioned on Postgres')
+    def test_kept_totals_match_the_partition(self):
+        other = User.objects.create_user(email="other@example.com", password="x", first_name="Ada", last_name="Other")
+        for donor, campaign, amount in (
+            (self.donor, self.wells, 5), (self.donor, self.wells, 6), (self.donor, self.schools, 1),
+            (other, self.wells, 2), (None, self.wells, 50),
+        ):
+            Donation.objects.create(campaign=campaign, donor=donor, amount=amount)
+        month = partitions.month_start(timezone.now())
+        archive = self.archive(month, partitions.add_months(month, 1), kept=False)
+
+        partitions.keep_donor_totals(archive)
+
+        archive.refresh_from_db()
+        self.assertTrue(archive.donor_totals_kept)
+        self.assertEqual(
+            sorted(ArchivedDonorTotal.objects.values_list('donor_id', 'campaign_id', 'amount', 'donation_count')),
+            sorted([
+                (self.donor.pk, self.wells.pk, Decimal('11'), 2),
+                (self.donor.pk, self.schools.pk, Decimal('1'), 1),
+                (other.pk, self.wells.pk, Decimal('2'), 1),
+            ]),
+        )
+
+
+
+class DonationExportTests(TestCase):
+    """
+    Only the campaign owner can export its donations. Anonymous and guest
+    donors are masked, and CSV cells cannot start a formula.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email="owner@example.com", password="x", first_name="Ada", last_name="Owner")
+        cls.donor = User.objects.create_user(email="donor@example.com", password="x", first_name="Grace", last_name="Donor")
+        cls.formula = User.objects.create_user(email="formula@example.com", password="x", first_name="=Cmd", last_name="Donor")
+        category = Category.objects.create(name="Health")
+        cls.campaign = Campaign.objects.create(
+            owner=cls.owner, category=category, title="Wells", description="Wells", goal=1000
+        )
+        cls.donations = [
+            Donation.objects.create(campaign=cls.campaign, donor=cls.donor, amount=10, comment="Good luck"),
+            Donation.objects.create(campaign=cls.campaign, donor=cls.donor, amount=20, is_anonymous=True, comment="+1"),
+            Donation.objects.create(campaign=cls.campaign, amount=30, comment="-2 from a guest"),
+            Donation.objects.create(campaign=cls.campaign, donor=cls.formula, amount=40, comment="@SUM(A1:A9)"),
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def export(self, file_type=None):
+        url = f"/api/campaign/{self.campaign.slug}/donations/export/"
+        response = self.client.get(url, {"file_type": file_type} if file_type else {})
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content).decode("utf-8")
+
+    def test_only_the_owner_can_export(self):
+        url = f"/api/campaign/{self.campaign.slug}/donations/export/"
+        self.client.force_authenticate(self.donor)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.client.get("/api/campaign/missing/donations/export/").status_code, 404)
+
+    def test_csv_masks_donors_and_escapes_formulas(self):
+        response, body = self.export()
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn(f'filename="{self.campaign.slug}-donations.csv"', response["Content-Disposition"])
+        rows = list(csv.reader(body.splitlines()))
+        self.assertEqual(rows[0], ["id", "donation_date", "amount", "donor", "comment"])
+        self.assertEqual([row[0] for row in rows[1:]], [str(donation.id) for donation in self.donations])
+        self.assertEqual([(row[2], row[3], row[4]) for row in rows[1:]], [
+            ("10.00", "Grace Donor", "Good luck"),
+            ("20.00", "Anonymous", "'+1"),
+            ("30.00", "Anonymous", "'-2 from a guest"),
+            ("40.00", "'=Cmd Donor", "'@SUM(A1:A9)"),
+        ])
+
+    def test_jsonl_lists_every_donation(self):
+        response, body = self.export("jsonl")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([record["id"] for record in records], [donation.id for donation in self.donations])
+        self.assertEqual([record["donor"] for record in records], ["Grace Donor", "Anonymous", "Anonymous", "=Cmd Donor"])
+        self.assertEqual(records[0]["amount"], "10.00")
+        self.assertEqual(records[1]["comment"], "+1")
+
+    def test_unknown_file_type_is_rejected(self):
+        url = f"/api/campaign/{self.campaign.slug}/donations/export/"
+        self.assertEqual(self.client.get(url, {"file_type": "xlsx"}).status_code, 400)
@@ -1,3 +1,388 @@
+import csv
+import io
+import json
+from datetime import datetime
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from authentication.permissions import IsOwner
+from campaign.models import Campaign
+from campaign.cache import campaign_version
+from api.conditional import make_etag, not_modified, with_validators
+from .models import Donation
+from .payments import record_event, verify_signature
+from .rollups import INTERVALS, ROLLUPS, bucket_end, bucket_start
+from .serializers import DonationRollupSerializer, DonationSerializer
 
-# Create your views here.
+
+IDEMPOTENCY_KEY_MAX_LENGTH = Donation._meta.get_field('idempotency_key').max_length
+
+# Default window per interval, and the most buckets one request may ask for.
+DEFAULT_SPANS = {'hour': 48, 'day': 30}
+MAX_BUCKETS = 1000
+
+EXPORT_COLUMNS = ['id', 'donation_date', 'amount', 'donor', 'comment']
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FLUSH_SIZE = 64 * 1024
+# Cells starting with these are evaluated as formulas by spreadsheet apps.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class DonateView(GenericAPIView):
+    """
+    View to donate to a campaign. Retries carrying the same Idempotency-Key
+    header return the donation the first attempt created.
+    """
+
+    serializer_class = DonationSerializer
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Donate to Campaign",
+        operation_description=(
+            "Record a donation to an active campaign. Send a unique `Idempotency-Key` header per donation; "
+            "repeating a request with the same key returns the original donation with status 200 instead of "
+            "creating another one. Pass the returned `id` as `donation_id` in the Paystack transaction metadata; "
+            "the charge then settles this donation instead of recording a second one."
+        ),
+        manual_parameters=[
+            openapi.Parameter('Idempotency-Key', openapi.IN_HEADER, description="Client-generated unique key", type=openapi.TYPE_STRING),
+        ],
+        request_body=DonationSerializer,
+        responses={
+            201: openapi.Response("Donation Created", DonationSerializer),
+            200: openapi.Response("Donation Replayed", DonationSerializer),
+            400: "Bad Request",
+            404: "Campaign Not Found",
+            422: "Idempotency-Key reused with a different request",
+        }
+    )
+    def post(self, request, slug):
+        # Not wrapped in transaction.atomic: the donation and the campaign
+        # totals commit together inside Donation.save, and keeping that
+        # transaction short keeps the campaign row lock short on popular
+        # campaigns.
+        key = request.headers.get('Idempotency-Key') or None
+        if key is not None and len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return Response({
+                "success": False,
+                "message": f"Idempotency-Key must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        campaign = Campaign.objects.only('id', 'slug', 'is_active', 'end_date').filter(slug=slug).first()
+        if campaign is None:
+            return Response({
+                "success": False,
+                "message": "Campaign not found."
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({
+                "success": False,
+                "message": "Validation failed",
+                "errors": serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not campaign.is_active or campaign.is_expired:
+            return Response({
+                "success": False,
+                "message": "This campaign is not accepting donations."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # The unique constraint decides which request wins; a retry racing
+        # the first attempt waits on the index entry and then replays it.
+        try:
+            with transaction.atomic():
+                donation = serializer.save(campaign=campaign, donor=request.user, idempotency_key=key)
+        except IntegrityError:
+            existing = Donation.objects.filter(donor=request.user, idempotency_key=key).first() if key else None
+            if existing is None:
+                raise
+            return self.replay(existing, campaign, serializer.validated_data)
+
+        return Response({
+            "success": True,
+            "message": "Donation received.",
+            "data": self.get_serializer(donation).data
+        }, status=status.HTTP_201_CREATED)
+
+    def replay(self, donation, campaign, validated_data):
+        if donation.campaign_id != campaign.id or donation.amount != validated_data['amount']:
+            return Response({
+                "success": False,
+                "message": "This Idempotency-Key was already used for a different donation."
+            }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        donation.campaign = campaign
+        response = Response({
+            "success": True,
+            "message": "Donation already received.",
+            "data": self.get_serializer(donation).data
+        }, status=status.HTTP_200_OK)
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+
+
+class CampaignStatsView(GenericAPIView):
+    """
+    View to chart a campaign's donations over time from the rollup tables.
+    """
+
+    serializer_class = DonationRollupSerializer
+    permission_classes = [IsAuthenticated, IsOwner]
+    pagination_class = None
+
+    @swagger_auto_schema(
+        operation_summary="Campaign Donation Stats",
+        operation_description=(
+            "Donation totals of a campaign per hour or per day, oldest first. Buckets without donations are "
+            "returned with zeros. Defaults to the last 48 hours or 30 days, up to the end of the current one. Only the campaign owner may read them."
+        ),
+        manual_parameters=[
+            openapi.Parameter('interval', openapi.IN_QUERY, description="hour or day (default)", type=openapi.TYPE_STRING),
+            openapi.Parameter('start', openapi.IN_QUERY, description="ISO date or datetime, inclusive", type=openapi.TYPE_STRING),
+            openapi.Parameter('end', openapi.IN_QUERY, description="ISO date or datetime, exclusive", type=openapi.TYPE_STRING),
+        ],
+        responses={
+            200: openapi.Response("Donation Stats", DonationRollupSerializer(many=True)),
+            400: "Bad Request",
+            404: "Campaign Not Found",
+        }
+    )
+    def get(self, request, slug):
+        campaign = Campaign.objects.select_related('owner').only('id', 'slug', 'owner__id').filter(slug=slug).first()
+        if campaign is None:
+            return Response({
+                "success": False,
+                "message": "Campaign not found."
+            }, status=status.HTTP_404_NOT_FOUND)
+        self.check_object_permissions(request, campaign)
+
+        interval = request.query_params.get('interval', 'day')
+        if interval not in ROLLUPS:
+            return Response({
+                "success": False,
+                "message": "interval must be hour or day."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # By default the window runs to the end of the current bucket, so
+            # it only moves when a new bucket starts.
+            end = self.parse_moment(request.query_params.get('end')) or bucket_end(
+                bucket_start(timezone.now(), interval), interval
+            )
+            start = self.parse_moment(request.query_params.get('start')) or end - INTERVALS[interval] * DEFAULT_SPANS[interval]
+        except ValueError as e:
+            return Response({
+                "success": False,
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        start = bucket_start(start, interval)
+        if start >= end or (end - start) / INTERVALS[interval] > MAX_BUCKETS:
+            return Response({
+                "success": False,
+                "message": f"start must be before end and span at most {MAX_BUCKETS} buckets."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Rollups change with every donation, which bumps the campaign version.
+        # The resolved window is part of the tag, a defaulted one moves with time.
+        etag = make_etag(campaign_version(slug), request.build_absolute_uri(), start, end)
+        response = not_modified(request, etag=etag)
+        if response:
+            return response
+
+        model, _ = ROLLUPS[interval]
+        rows = {
+            row.bucket: row
+            for row in model.objects.filter(campaign_id=campaign.id, bucket__gte=start, bucket__lt=end)
+        }
+        buckets = []
+        bucket = start
+        while bucket < end:
+            buckets.append(rows.get(bucket) or model(campaign_id=campaign.id, bucket=bucket))
+            bucket += INTERVALS[interval]
+
+        serializer = self.get_serializer(buckets, many=True)
+        return with_validators(Response({
+            "success": True,
+            "message": "Campaign stats retrieved successfully.",
+            "data": {
+                "interval": interval,
+                "start": start,
+                "end": end,
+                "buckets": serializer.data,
+            }
+        }, status=status.HTTP_200_OK), etag=etag)
+
+    def parse_moment(self, value):
+        if not value:
+            return None
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(f"Invalid date {value!r}, expected an ISO date or datetime.")
+            moment = datetime.combine(day, datetime.min.time())
+        return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+
+class DonationExportView(GenericAPIView):
+    """
+    View to download every donation of a campaign as CSV or JSON Lines.
+    """
+
+    permission_classes = [IsAuthenticated, IsOwner]
+
+    def perform_content_negotiation(self, request, force=False):
+        # The body is written by hand, so an Accept of text/csv must not 406.
+        return super().perform_content_negotiation(request, force=True)
+
+    @swagger_auto_schema(
+        operation_summary="Export Campaign Donations",
+        operation_description=(
+            "Stream every donation of a campaign, oldest first, as CSV (default) or JSON Lines. "
+            "Anonymous and guest donors are listed as Anonymous. Only the campaign owner may export."
+        ),
+        manual_parameters=[
+            openapi.Parameter('file_type', openapi.IN_QUERY, description="csv (default) or jsonl", type=openapi.TYPE_STRING),
+        ],
+        responses={
+            200: "Donation export file",
+            400: "Bad Request",
+            404: "Campaign Not Found",
+        }
+    )
+    def get(self, request, slug):
+        campaign = Campaign.objects.select_related('owner').only('id', 'slug', 'owner__id').filter(slug=slug).first()
+        if campaign is None:
+            return Response({
+                "success": False,
+                "message": "Campaign not found."
+            }, status=status.HTTP_404_NOT_FOUND)
+        self.check_object_permissions(request, campaign)
+
+        file_type = request.query_params.get('file_type', 'csv')
+        if file_type not in ('csv', 'jsonl'):
+            return Response({
+                "success": False,
+                "message": "file_type must be csv or jsonl."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # values_list keeps each row a tuple and iterator() reads through a
+        # server-side cursor, so memory does not grow with the campaign.
+        rows = (
+            Donation.objects.filter(campaign_id=campaign.id)
+            .order_by('donation_date', 'id')
+            .values_list('id', 'donation_date', 'amount', 'is_anonymous', 'donor__first_name', 'donor__last_name', 'comment')
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        if file_type == 'csv':
+            content, content_type = self.stream_csv(rows), 'text/csv; charset=utf-8'
+        else:
+            content, content_type = self.stream_jsonl(rows), 'application/x-ndjson'
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{campaign.slug}-donations.{file_type}"'
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def export_records(self, rows):
+        for donation_id, donation_date, amount, is_anonymous, first_name, last_name, comment in rows:
+            donor = f"{first_name} {last_name}".strip() if first_name is not None and not is_anonymous else ''
+            yield donation_id, donation_date.isoformat(), amount, donor or 'Anonymous', comment or ''
+
+    def stream_csv(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        for donation_id, donation_date, amount, donor, comment in self.export_records(rows):
+            writer.writerow([
+                donation_id,
+                donation_date,
+                amount,
+                self.escape_formula(donor),
+                self.escape_formula(comment),
+            ])
+            if buffer.tell() >= EXPORT_FLUSH_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def stream_jsonl(self, rows):
+        lines = []
+        size = 0
+        for record in self.export_records(rows):
+            line = json.dumps(dict(zip(EXPORT_COLUMNS, record)), cls=DjangoJSONEncoder, ensure_ascii=False)
+            lines.append(line)
+            size += len(line)
+            if size >= EXPORT_FLUSH_SIZE:
+                yield "\n".join(lines) + "\n"
+                lines, size = [], 0
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+    def escape_formula(self, value):
+        return f"'{value}" if value.startswith(FORMULA_PREFIXES) else value
+
+
+
+class PaystackWebhookView(GenericAPIView):
+    """
+    View to receive Paystack webhooks. Events are only verified and stored
+    here; the process_paystack_events worker applies them.
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="Paystack Webhook",
+        operation_description=(
+            "Called by Paystack. The raw body must be signed with HMAC-SHA512 using the Paystack secret key, "
+            "with the hex digest in the `x-paystack-signature` header. Redelivered events are accepted and ignored."
+        ),
+        manual_parameters=[
+            openapi.Parameter('x-paystack-signature', openapi.IN_HEADER, description="HMAC-SHA512 of the body", type=openapi.TYPE_STRING),
+        ],
+        responses={
+            200: "Event Accepted",
+            400: "Bad Request",
+            401: "Invalid Signature",
+        }
+    )
+    def post(self, request):
+        # The signature covers the exact bytes Paystack sent, so the body is
+        # read raw rather than through request.data.
+        body = request.body
+        if not verify_signature(body, request.headers.get('x-paystack-signature')):
+            return Response({
+                "success": False,
+                "message": "Invalid signature."
+            }, status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict) or not record_event(payload):
+            return Response({
+                "success": False,
+                "message": "Malformed event."
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "success": True,
+            "message": "Event received."
+        }, status=status.HTTP_200_OK)
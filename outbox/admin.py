@@ -0,0 +1,13 @@
+from django.contrib import admin
+from .models import OutgoingEmail
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'to', 'status', 'attempts', 'send_after', 'sent_at')
+    # Bodies carry one time codes and reset links.
+    exclude = ('body',)
+    list_filter = ('status',)
+    search_fields = ('subject', 'last_error')
+    ordering = ('-created_at',)
+    list_per_page = 20
@@ -0,0 +1,109 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+from .models import OutgoingEmail
+
+
+
+def queue_email(subject, message, recipient_list, from_email=None):
+    """
+    Queue an email in place of send_mail. The row commits or rolls back
+    with the caller's transaction; nothing is sent until it commits.
+    """
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(recipient_list),
+    )
+
+
+def retry_delay(attempts):
+    """
+    Wait before the next attempt: EMAIL_OUTBOX_RETRY_DELAY seconds, doubled
+    on every failure.
+    """
+    return timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+class Mailer:
+    """
+    One connection to the email backend, opened on first use and kept for
+    every email after it. A failed send closes it, the next send reopens.
+    """
+
+    def __init__(self):
+        self.connection = get_connection(fail_silently=False)
+        self.opened = False
+
+    def send(self, email):
+        if not self.opened:
+            self.connection.open()
+            self.opened = True
+        message = EmailMessage(
+            subject=email.subject,
+            body=email.body,
+            from_email=email.from_email,
+            to=email.to,
+            connection=self.connection,
+        )
+        try:
+            message.send()
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        if self.opened:
+            self.opened = False
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+
+
+def send_batch(emails, mailer, max_attempts):
+    """
+    Send claimed emails over `mailer`. Returns (sent, failed). Each email
+    is marked sent as soon as it went out, so a worker dying mid-batch
+    only resends the one it was on, and its body, which may hold a one
+    time code, is blanked.
+    """
+    sent, failed = 0, 0
+    for email in emails:
+        try:
+            mailer.send(email)
+        except Exception as e:
+            failed += 1
+            now = timezone.now()
+            OutgoingEmail.objects.filter(id=email.id).update(
+                status='failed' if email.attempts >= max_attempts else 'pending',
+                last_error=repr(e),
+                send_after=now + retry_delay(email.attempts),
+                updated_at=now,
+            )
+        else:
+            sent += 1
+            now = timezone.now()
+            OutgoingEmail.objects.filter(id=email.id).update(status='sent', body='', sent_at=now, updated_at=now)
+    return sent, failed
+
+
+def purge_sent(keep_days, batch_size=1000):
+    """
+    Delete emails sent more than `keep_days` days ago, `batch_size` rows
+    per statement. Returns how many were deleted.
+    """
+    cutoff = timezone.now() - timedelta(days=keep_days)
+    deleted = 0
+    while True:
+        # An email is never sent before its send_after, which lets the
+        # status index narrow the scan.
+        ids = list(
+            OutgoingEmail.objects.filter(status='sent', send_after__lt=cutoff, sent_at__lt=cutoff)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += OutgoingEmail.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,93 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from outbox.mail import Mailer, purge_sent, send_batch
+from outbox.models import OutgoingEmail
+
+# Seconds between purges of old sent emails.
+PURGE_EVERY = 3600
+
+
+
+class Command(BaseCommand):
+    help = 'Sends queued emails in batches over one connection to the email backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Emails claimed per pass')
+        parser.add_argument('--max-attempts', type=int, default=settings.EMAIL_OUTBOX_MAX_ATTEMPTS, help='Attempts before an email is marked failed')
+        parser.add_argument('--stale-after', type=int, default=600, help='Seconds before a sending email is assumed abandoned')
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting once the queue is empty')
+        parser.add_argument('--interval', type=int, default=5, help='Seconds between polls with --loop')
+        parser.add_argument(
+            '--keep-days', type=int, default=settings.EMAIL_OUTBOX_KEEP_DAYS,
+            help='Sent emails older than this many days are deleted',
+        )
+
+    def handle(self, *args, **options):
+        mailer = Mailer()
+        self.max_attempts = options['max_attempts']
+        sent = failed = purged = 0
+
+        try:
+            next_purge = 0
+            while True:
+                if time.monotonic() >= next_purge:
+                    purged += purge_sent(options['keep_days'])
+                    next_purge = time.monotonic() + PURGE_EVERY
+                self.release_stale(options['stale_after'])
+                batch = self.claim(options['batch_size'])
+                if batch:
+                    batch_sent, batch_failed = send_batch(batch, mailer, self.max_attempts)
+                    sent += batch_sent
+                    failed += batch_failed
+                    if batch_failed:
+                        self.stdout.write(self.style.WARNING(f'{batch_failed} of {len(batch)} emails failed, will retry.'))
+                    continue
+                if not options['loop']:
+                    break
+                # Idle SMTP connections get dropped by the server anyway.
+                mailer.close()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Email worker stopped.')
+        finally:
+            mailer.close()
+
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} emails, {failed} failed attempts, purged {purged} sent emails.'))
+
+    def claim(self, batch_size):
+        """
+        Mark up to `batch_size` due emails as sending. Rows locked by another
+        worker are skipped, so several workers can share the queue.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                OutgoingEmail.objects.select_for_update(skip_locked=True)
+                .filter(status='pending', send_after__lte=now)
+                .order_by('send_after')[:batch_size]
+            )
+            if batch:
+                OutgoingEmail.objects.filter(id__in=[email.id for email in batch]).update(
+                    status='sending', attempts=F('attempts') + 1, updated_at=now
+                )
+        for email in batch:
+            email.status = 'sending'
+            email.attempts += 1
+        return batch
+
+    def release_stale(self, stale_after):
+        # A worker killed mid-batch leaves its rows in sending; they may
+        # have gone out, so delivery is at least once. The attempt was
+        # counted when it was claimed, so an email that keeps killing the
+        # worker stops at the limit.
+        now = timezone.now()
+        stale = OutgoingEmail.objects.filter(status='sending', updated_at__lt=now - timedelta(seconds=stale_after))
+        stale.filter(attempts__gte=self.max_attempts).update(
+            status='failed', last_error='The worker sending this email stopped.', updated_at=now
+        )
+        stale.update(status='pending', updated_at=now)
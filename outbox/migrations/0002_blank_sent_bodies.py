@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-18 17:40
+
+from django.db import migrations
+
+
+def blank_sent_bodies(apps, schema_editor):
+    # The worker now blanks a body once its email is sent.
+    OutgoingEmail = apps.get_model("outbox", "OutgoingEmail")
+    OutgoingEmail.objects.filter(status="sent").exclude(body="").update(body="")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("outbox", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(blank_sent_bodies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+from django.db import models
+
+
+
+
+class OutgoingEmail(models.Model):
+    """
+    An email written in the transaction of the request that caused it and
+    sent later by the send_outgoing_email worker, so requests never wait
+    on the mail server.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    # Failed sends are retried from this time on, see send_outgoing_email.
+    send_after = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'send_after'], name='outgoing_email_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.to)} ({self.status})"
@@ -0,0 +1,95 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from .mail import Mailer, queue_email
+from .models import OutgoingEmail
+
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class SendOutgoingEmailTests(TestCase):
+    """
+    Queued emails go out once, keep no body after sending, and sent rows
+    are purged after EMAIL_OUTBOX_KEEP_DAYS.
+    """
+
+    def send(self, *args):
+        call_command('send_outgoing_email', *args, stdout=StringIO())
+
+    def test_sent_email_keeps_no_body(self):
+        queue_email("Your OTP Code", "Your OTP code is 123456.", ["ada@example.com"], "noreply@example.com")
+        self.send()
+
+        [message] = mail.outbox
+        self.assertEqual((message.subject, message.body, message.to), ("Your OTP Code", "Your OTP code is 123456.", ["ada@example.com"]))
+        email = OutgoingEmail.objects.get()
+        self.assertEqual((email.status, email.body), ('sent', ''))
+        self.assertIsNotNone(email.sent_at)
+
+        self.send()
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_each_email_is_marked_sent_right_after_it_went_out(self):
+        first, second = [queue_email(f"Email {n}", "Body", ["ada@example.com"]) for n in range(2)]
+        send = Mailer.send
+
+        def send_then_die(mailer, email):
+            if email.id == second.id:
+                # The worker is killed while sending the second email.
+                raise KeyboardInterrupt
+            send(mailer, email)
+
+        with mock.patch.object(Mailer, 'send', send_then_die):
+            self.send()
+
+        self.assertEqual(OutgoingEmail.objects.get(id=first.id).status, 'sent')
+        self.assertEqual(OutgoingEmail.objects.get(id=second.id).status, 'sending')
+
+    def test_stale_emails_fail_at_the_attempt_limit(self):
+        exhausted, retried = [queue_email(subject, "Body", ["ada@example.com"]) for subject in ("Exhausted", "Retried")]
+        long_ago = timezone.now() - timedelta(hours=1)
+        OutgoingEmail.objects.filter(id=exhausted.id).update(status='sending', attempts=3, updated_at=long_ago)
+        OutgoingEmail.objects.filter(id=retried.id).update(status='sending', attempts=1, updated_at=long_ago)
+        self.send('--max-attempts', '3')
+
+        exhausted.refresh_from_db()
+        retried.refresh_from_db()
+        self.assertEqual((exhausted.status, exhausted.attempts), ('failed', 3))
+        self.assertEqual(exhausted.last_error, 'The worker sending this email stopped.')
+        self.assertEqual((retried.status, retried.attempts), ('sent', 2))
+        self.assertEqual([message.subject for message in mail.outbox], ["Retried"])
+
+    def test_failed_email_keeps_its_body_for_the_retry(self):
+        queue_email("Welcome", "Hello Ada", ["ada@example.com"])
+        with mock.patch.object(Mailer, 'send', side_effect=OSError('connection refused')):
+            self.send()
+        email = OutgoingEmail.objects.get()
+        self.assertEqual((email.status, email.body, email.attempts), ('pending', 'Hello Ada', 1))
+
+    @override_settings(EMAIL_OUTBOX_KEEP_DAYS=7)
+    def test_old_sent_emails_are_purged(self):
+        now = timezone.now()
+        old, recent, waiting = [queue_email(subject, "Body", ["ada@example.com"]) for subject in ("Old", "Recent", "Waiting")]
+        OutgoingEmail.objects.filter(id=old.id).update(status='sent', body='', send_after=now - timedelta(days=9), sent_at=now - timedelta(days=8))
+        OutgoingEmail.objects.filter(id=recent.id).update(status='sent', body='', send_after=now - timedelta(days=2), sent_at=now - timedelta(days=2))
+        OutgoingEmail.objects.filter(id=waiting.id).update(send_after=now + timedelta(days=1), created_at=now - timedelta(days=30))
+
+        out = StringIO()
+        call_command('send_outgoing_email', '--keep-days', '7', stdout=out)
+
+        self.assertEqual(set(OutgoingEmail.objects.values_list('subject', flat=True)), {"Recent", "Waiting"})
+        self.assertIn('purged 1 sent emails', out.getvalue())
+
+    def test_admin_does_not_show_the_body(self):
+        superuser = get_user_model().objects.create_superuser(email="admin@example.com", password="x", first_name="Ada", last_name="Admin")
+        request = RequestFactory().get('/')
+        request.user = superuser
+        model_admin = admin.site._registry[OutgoingEmail]
+        self.assertNotIn('body', model_admin.get_form(request).base_fields)
+        self.assertNotIn('body', model_admin.get_list_display(request))
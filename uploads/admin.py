@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import PendingUpload
+
+
+@admin.register(PendingUpload)
+class PendingUploadAdmin(admin.ModelAdmin):
+    list_display = ('content_type', 'object_id', 'field_name', 'status', 'attempts', 'retry_after', 'created_at')
+    list_filter = ('status', 'content_type')
+    search_fields = ('original_name', 'last_error')
+    ordering = ('-created_at',)
+    list_per_page = 20
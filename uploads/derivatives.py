@@ -0,0 +1,41 @@
+import os
+import tempfile
+from django.conf import settings
+from PIL import Image, ImageOps
+
+
+
+def _flatten(image):
+    # JPEG has no alpha channel, so transparent images go on white.
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def build_derivatives(path, backend):
+    """
+    Render every IMAGE_DERIVATIVES size from the image at `path`, push each
+    one through `backend` and return a manifest mapping size name to URL.
+    """
+    sizes = settings.IMAGE_DERIVATIVES
+    largest = max(sizes.values())
+    manifest = {}
+
+    with Image.open(path) as source:
+        # Lets the JPEG decoder scale down while decoding large photos.
+        source.draft('RGB', largest)
+        image = _flatten(ImageOps.exif_transpose(source))
+
+    for name, size in sizes.items():
+        derivative = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+        handle, derivative_path = tempfile.mkstemp(suffix='.jpg', dir=os.path.dirname(path))
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                derivative.save(output, 'JPEG', quality=85, optimize=True, progressive=True)
+            _, manifest[name] = backend.save(derivative_path)
+        finally:
+            os.remove(derivative_path)
+    return manifest
@@ -0,0 +1,126 @@
+import hashlib
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.template.defaultfilters import filesizeformat
+from rest_framework import status
+from rest_framework.response import Response
+
+
+
+# Leading bytes of the image formats the API accepts.
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+SIGNATURE_LENGTH = 12
+INVALID_IMAGE = "Upload a valid JPEG, PNG, GIF or WebP image."
+
+
+def sniff_image_type(header):
+    for signature, content_type in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return content_type
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """
+    Streams every uploaded file straight to a temporary file, whatever its
+    size, and hashes it on the way through. A file is dropped as soon as
+    its first bytes are not a known image signature or it grows past
+    UPLOAD_MAX_IMAGE_SIZE; the reason is kept on `request.upload_errors`.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_size = settings.UPLOAD_MAX_IMAGE_SIZE
+        if request is not None and not hasattr(request, "upload_errors"):
+            request.upload_errors = {}
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.header = b""
+        self.detected_type = None
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.file = TemporaryUploadedFile(
+            self.file_name, self.content_type, 0, self.charset, self.content_type_extra
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            self.reject(f"File exceeds the {filesizeformat(self.max_size)} limit.")
+
+        if self.detected_type is None:
+            self.header += raw_data[:SIGNATURE_LENGTH - len(self.header)]
+            if len(self.header) >= SIGNATURE_LENGTH:
+                self.check_signature()
+
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if self.detected_type is None:
+            # Shorter than a signature. Raising SkipFile here would escape the
+            # parser, so drop the file by returning None instead.
+            self.detected_type = sniff_image_type(self.header)
+            if self.detected_type is None:
+                self.record_error(INVALID_IMAGE)
+                self.file.close()
+                return None
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.content_type = self.detected_type
+        self.file.content_hash = self.digest.hexdigest()
+        return self.file
+
+    def check_signature(self):
+        self.detected_type = sniff_image_type(self.header)
+        if self.detected_type is None:
+            self.reject(INVALID_IMAGE)
+
+    def record_error(self, message):
+        if self.request is not None:
+            self.request.upload_errors[self.field_name] = [message]
+
+    def reject(self, message):
+        self.record_error(message)
+        raise SkipFile(message)
+
+    def upload_interrupted(self):
+        if hasattr(self, "file"):
+            self.file.close()
+
+
+class StreamingUploadMixin:
+    """
+    Installs ImageUploadHandler for the view's `streaming_upload_methods`
+    so multipart bodies are never buffered in memory.
+    """
+    streaming_upload_methods = ("POST", "PUT", "PATCH")
+
+    def initialize_request(self, request, *args, **kwargs):
+        if request.method in self.streaming_upload_methods:
+            request.upload_handlers = [ImageUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def rejected_uploads_response(self, request):
+        """
+        Return a 400 response if the handler dropped any uploaded file,
+        otherwise None. Parses the request body if it has not been yet.
+        """
+        request.data
+        errors = getattr(request._request, "upload_errors", None)
+        if errors:
+            return Response({
+                "success": False,
+                "message": "Validation failed",
+                "errors": errors,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return None
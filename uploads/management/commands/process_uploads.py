@@ -0,0 +1,96 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from uploads.models import PendingUpload
+from uploads.pipeline import process_upload, retry_delay
+from uploads.storage import get_storage_backend
+
+
+
+class Command(BaseCommand):
+    help = 'Pushes spooled campaign and profile images to the storage backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Uploads run in parallel')
+        parser.add_argument('--batch-size', type=int, default=20, help='Uploads claimed per pass')
+        parser.add_argument('--max-attempts', type=int, default=settings.UPLOAD_MAX_ATTEMPTS, help='Attempts before an upload is marked failed')
+        parser.add_argument('--stale-after', type=int, default=600, help='Seconds before a processing upload is assumed abandoned')
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting once the queue is empty')
+        parser.add_argument('--interval', type=int, default=5, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        self.max_attempts = options['max_attempts']
+        self.backend = get_storage_backend()
+        done = failed = 0
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            try:
+                while True:
+                    self.release_stale(options['stale_after'])
+                    batch = self.claim(options['batch_size'])
+                    if batch:
+                        results = list(executor.map(self.run, batch))
+                        done += results.count(True)
+                        failed += results.count(False)
+                        continue
+                    if not options['loop']:
+                        break
+                    time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                self.stdout.write('Upload worker stopped.')
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {done} uploads, {failed} failed.'))
+
+    def claim(self, batch_size):
+        """
+        Mark up to `batch_size` due uploads as processing. Rows locked by
+        another worker are skipped, so several workers can share the queue.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                PendingUpload.objects.select_for_update(skip_locked=True)
+                .filter(Q(retry_after__isnull=True) | Q(retry_after__lte=now), status='pending')
+                .order_by('created_at')[:batch_size]
+            )
+            if batch:
+                PendingUpload.objects.filter(id__in=[pending.id for pending in batch]).update(
+                    status='processing', attempts=F('attempts') + 1, updated_at=now
+                )
+        for pending in batch:
+            pending.status = 'processing'
+            pending.attempts += 1
+        return batch
+
+    def release_stale(self, stale_after):
+        # A worker killed mid-upload leaves its rows in processing. The
+        # attempt was counted when it was claimed.
+        now = timezone.now()
+        stale = PendingUpload.objects.filter(status='processing', updated_at__lt=now - timedelta(seconds=stale_after))
+        stale.filter(attempts__gte=self.max_attempts).update(
+            status='failed', last_error='The worker processing this upload stopped.', updated_at=now
+        )
+        stale.update(status='pending', updated_at=now)
+
+    def run(self, pending):
+        close_old_connections()
+        try:
+            process_upload(pending, self.backend)
+            return True
+        except Exception as e:
+            now = timezone.now()
+            PendingUpload.objects.filter(id=pending.id).update(
+                status='failed' if pending.attempts >= self.max_attempts else 'pending',
+                last_error=repr(e),
+                retry_after=now + retry_delay(pending.attempts),
+                updated_at=now,
+            )
+            self.stdout.write(self.style.WARNING(f'Upload {pending.id} attempt {pending.attempts} failed: {e!r}'))
+            return False
+        finally:
+            connections.close_all()
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("uploads", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pendingupload",
+            name="content_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="pendingupload",
+            name="stored_value",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("uploads", "0002_pendingupload_content_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pendingupload",
+            name="manifest",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
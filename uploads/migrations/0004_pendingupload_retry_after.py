@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 16:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("uploads", "0003_pendingupload_manifest"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pendingupload",
+            name="retry_after",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
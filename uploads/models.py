@@ -0,0 +1,43 @@
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+
+
+
+class PendingUpload(models.Model):
+    """
+    An image accepted by the API and spooled to local disk, waiting for the
+    process_uploads worker to push it to the storage backend and write the
+    result onto `target.<field_name>`.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    target = GenericForeignKey('content_type', 'object_id')
+    field_name = models.CharField(max_length=100)
+    spool_path = models.CharField(max_length=500)
+    original_name = models.CharField(max_length=255, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    stored_value = models.CharField(max_length=255, blank=True)
+    manifest = models.JSONField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    retry_after = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='upload_status_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.content_type.model} {self.object_id}.{self.field_name} ({self.status})"
@@ -0,0 +1,142 @@
+import hashlib
+import os
+import shutil
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from .derivatives import build_derivatives
+from .models import PendingUpload
+from .storage import get_storage_backend
+
+
+
+def retry_delay(attempts):
+    """
+    Wait before the next attempt: UPLOAD_RETRY_DELAY seconds, doubled on
+    every failure.
+    """
+    return timedelta(seconds=settings.UPLOAD_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def spool_file(uploaded_file):
+    """
+    Write an uploaded file into the spool directory and return its path.
+    Temporary uploads are moved rather than copied.
+    """
+    os.makedirs(settings.UPLOAD_SPOOL_DIR, exist_ok=True)
+    extension = os.path.splitext(uploaded_file.name or '')[1].lower()
+    path = os.path.join(settings.UPLOAD_SPOOL_DIR, f"{uuid.uuid4().hex}{extension}")
+
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        shutil.move(uploaded_file.temporary_file_path(), path)
+    else:
+        with open(path, 'wb') as destination:
+            for chunk in uploaded_file.chunks():
+                destination.write(chunk)
+    return path
+
+
+def content_hash(uploaded_file):
+    """
+    SHA-256 of the file, reusing the digest ImageUploadHandler computed
+    while the file streamed in.
+    """
+    digest = getattr(uploaded_file, 'content_hash', None)
+    if digest:
+        return digest
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def find_stored(digest):
+    """
+    The finished upload of an identical file, if there is one.
+    """
+    return (
+        PendingUpload.objects.filter(content_hash=digest, status='done')
+        .exclude(stored_value='')
+        .only('stored_value', 'manifest')
+        .first()
+    )
+
+
+def _set_field(model, object_id, field_name, value, manifest):
+    """
+    Point `field_name` at the stored file, and `<field_name>_manifest` at
+    its derivatives when the model has that column.
+    """
+    target = model.objects.select_for_update().filter(pk=object_id).first()
+    if target is None:
+        return
+    field_names = {field.name for field in model._meta.concrete_fields}
+    setattr(target, field_name, value)
+    update_fields = [field_name]
+    if f'{field_name}_manifest' in field_names:
+        setattr(target, f'{field_name}_manifest', manifest)
+        update_fields.append(f'{field_name}_manifest')
+    if 'updated_at' in field_names:
+        update_fields.append('updated_at')
+    target.save(update_fields=update_fields)
+
+
+def queue_upload(instance, field_name, uploaded_file):
+    """
+    Spool `uploaded_file` and queue it for `instance.<field_name>`. The
+    queue row is written in the caller's transaction, so the worker only
+    sees it once the request commits. A file identical to one already
+    uploaded is not spooled again; the field is pointed at the existing
+    copy straight away.
+    """
+    digest = content_hash(uploaded_file)
+    pending = PendingUpload(
+        content_type=ContentType.objects.get_for_model(instance),
+        object_id=instance.pk,
+        field_name=field_name,
+        original_name=(uploaded_file.name or '')[:255],
+        content_hash=digest,
+    )
+
+    existing = find_stored(digest)
+    if existing:
+        _set_field(type(instance), instance.pk, field_name, existing.stored_value, existing.manifest)
+        pending.status = 'done'
+        pending.stored_value = existing.stored_value
+        pending.manifest = existing.manifest
+    else:
+        pending.spool_path = spool_file(uploaded_file)
+    pending.save()
+    return pending
+
+
+def process_upload(pending, backend=None):
+    """
+    Push one spooled file and its resized derivatives to the storage
+    backend and point the target record at them. Raises on failure so the
+    worker can retry.
+    """
+    # An identical file may have finished uploading since this one was queued.
+    existing = find_stored(pending.content_hash) if pending.content_hash else None
+    if existing:
+        value, manifest = existing.stored_value, existing.manifest
+    else:
+        backend = backend or get_storage_backend()
+        value, _ = backend.save(pending.spool_path)
+        manifest = build_derivatives(pending.spool_path, backend)
+
+    with transaction.atomic():
+        _set_field(pending.content_type.model_class(), pending.object_id, pending.field_name, value, manifest)
+        pending.status = 'done'
+        pending.stored_value = value
+        pending.manifest = manifest
+        pending.last_error = None
+        pending.save(update_fields=['status', 'stored_value', 'manifest', 'last_error', 'updated_at'])
+
+    try:
+        os.remove(pending.spool_path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,38 @@
+import os
+import shutil
+import uuid
+import cloudinary.uploader
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+
+class CloudinaryStorageBackend:
+    """
+    Pushes files to Cloudinary. The stored value uses the format CloudinaryField reads back.
+    """
+    
+    def save(self, path):
+        resource = cloudinary.uploader.upload_resource(path)
+        return resource.get_prep_value(), resource.build_url(secure=True)
+
+
+class FileSystemStorageBackend:
+    """
+    Offline stand-in for Cloudinary that copies files under MEDIA_ROOT.
+    """
+    
+    def __init__(self, root=None, base_url=None):
+        self.root = root or settings.MEDIA_ROOT
+        self.base_url = base_url or settings.MEDIA_URL
+    
+    def save(self, path):
+        name = f"uploads/{uuid.uuid4().hex}{os.path.splitext(path)[1].lower()}"
+        destination = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        shutil.copyfile(path, destination)
+        return name, f"{self.base_url}{name}"
+
+
+def get_storage_backend():
+    return import_string(settings.UPLOAD_STORAGE_BACKEND)()
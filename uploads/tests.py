@@ -0,0 +1,202 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+from PIL import Image
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from authentication.models import User
+from users.models import UserProfile
+from .derivatives import build_derivatives
+from .management.commands.process_uploads import Command
+from .models import PendingUpload
+from .pipeline import process_upload, queue_upload
+from .storage import FileSystemStorageBackend
+
+
+
+class FailingBackend:
+    def save(self, path):
+        raise OSError('storage is down')
+
+
+class CountingBackend(FileSystemStorageBackend):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.saved = []
+
+    def save(self, path):
+        self.saved.append(path)
+        return super().save(path)
+
+
+def png_bytes(size=(1600, 900), color=(200, 30, 30, 0)):
+    output = BytesIO()
+    Image.new('RGBA', size, color).save(output, 'PNG')
+    return output.getvalue()
+
+
+
+@override_settings(UPLOAD_RETRY_DELAY=60)
+class ProcessUploadsRetryTests(TestCase):
+    """
+    Failed uploads wait out a growing delay before the next attempt, and
+    uploads abandoned by a dead worker still stop at the attempt limit.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="ada@example.com", password="x", first_name="Ada", last_name="Lovelace")
+
+    def queue(self, **fields):
+        return PendingUpload.objects.create(
+            content_type=ContentType.objects.get_for_model(UserProfile),
+            object_id=self.user.profile.pk,
+            field_name='profile_picture',
+            spool_path='/nonexistent/picture.png',
+            **fields,
+        )
+
+    def process(self):
+        """
+        One pass of the worker, in this thread so it sees the test's rows.
+        """
+        command = Command(stdout=StringIO())
+        command.max_attempts = 3
+        command.backend = FailingBackend()
+        command.release_stale(600)
+        worker = 'uploads.management.commands.process_uploads'
+        with mock.patch.multiple(worker, connections=mock.DEFAULT, close_old_connections=mock.DEFAULT):
+            for pending in command.claim(10):
+                command.run(pending)
+
+    def test_failed_upload_backs_off(self):
+        pending = self.queue()
+        self.process()
+        pending.refresh_from_db()
+        self.assertEqual((pending.status, pending.attempts), ('pending', 1))
+        self.assertGreater(pending.retry_after, timezone.now() + timedelta(seconds=50))
+
+        # Not due yet, so the next pass leaves it alone.
+        self.process()
+        pending.refresh_from_db()
+        self.assertEqual(pending.attempts, 1)
+
+        PendingUpload.objects.filter(pk=pending.pk).update(retry_after=timezone.now())
+        self.process()
+        pending.refresh_from_db()
+        self.assertEqual(pending.attempts, 2)
+        self.assertGreater(pending.retry_after, timezone.now() + timedelta(seconds=110))
+
+    def test_stale_uploads_fail_at_the_attempt_limit(self):
+        long_ago = timezone.now() - timedelta(hours=1)
+        exhausted = self.queue(status='processing', attempts=3)
+        retried = self.queue(status='processing', attempts=1)
+        PendingUpload.objects.update(updated_at=long_ago)
+        with mock.patch.object(Command, 'claim', return_value=[]):
+            self.process()
+        exhausted.refresh_from_db()
+        retried.refresh_from_db()
+        self.assertEqual(exhausted.status, 'failed')
+        self.assertEqual(retried.status, 'pending')
+
+
+
+class UploadPipelineTests(TestCase):
+    """
+    Spooled images are stored with a derivative per IMAGE_DERIVATIVES size,
+    and an identical file is stored once however often it is uploaded.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ada = User.objects.create_user(email="ada@example.com", password="x", first_name="Ada", last_name="Lovelace")
+        cls.grace = User.objects.create_user(email="grace@example.com", password="x", first_name="Grace", last_name="Hopper")
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.spool = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        self.addCleanup(shutil.rmtree, self.spool)
+        patched = override_settings(MEDIA_ROOT=self.media, UPLOAD_SPOOL_DIR=self.spool)
+        patched.enable()
+        self.addCleanup(patched.disable)
+        self.backend = CountingBackend()
+
+    def stored_files(self):
+        return sorted(os.listdir(os.path.join(self.media, 'uploads'))) if os.path.isdir(os.path.join(self.media, 'uploads')) else []
+
+    def picture(self, user):
+        """
+        The stored value of the user's picture as written, and its manifest.
+        """
+        # CloudinaryField parses the column on read, so read it raw.
+        profile = UserProfile.objects.raw(
+            f"SELECT id, profile_picture AS raw_picture FROM {UserProfile._meta.db_table} WHERE user_id = %s", [user.pk]
+        )[0]
+        return profile.raw_picture, profile.profile_picture_manifest
+
+    def upload(self, user, content):
+        picture = SimpleUploadedFile("picture.png", content, content_type="image/png")
+        return queue_upload(user.profile, 'profile_picture', picture)
+
+    def test_derivatives_are_generated(self):
+        source = os.path.join(self.spool, 'source.png')
+        with open(source, 'wb') as f:
+            f.write(png_bytes())
+        manifest = build_derivatives(source, self.backend)
+
+        self.assertEqual(set(manifest), set(settings.IMAGE_DERIVATIVES))
+        for name, url in manifest.items():
+            with self.subTest(name=name):
+                self.assertTrue(url.startswith(f"{settings.MEDIA_URL}uploads/"), url)
+                with Image.open(os.path.join(self.media, url[len(settings.MEDIA_URL):])) as derivative:
+                    self.assertEqual(derivative.format, 'JPEG')
+                    self.assertEqual(derivative.size, settings.IMAGE_DERIVATIVES[name])
+                    # Transparent pixels are flattened onto white.
+                    self.assertEqual(derivative.convert('RGB').getpixel((0, 0)), (255, 255, 255))
+        # Only the source is left in the spool.
+        self.assertEqual(os.listdir(self.spool), ['source.png'])
+
+    def test_processed_upload_records_its_manifest(self):
+        pending = self.upload(self.ada, png_bytes())
+        self.assertTrue(os.path.exists(pending.spool_path))
+        process_upload(pending, self.backend)
+
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'done')
+        self.assertEqual(self.picture(self.ada), (pending.stored_value, pending.manifest))
+        self.assertEqual(set(pending.manifest), set(settings.IMAGE_DERIVATIVES))
+        self.assertEqual(len(self.stored_files()), 1 + len(settings.IMAGE_DERIVATIVES))
+        self.assertFalse(os.path.exists(pending.spool_path))
+
+    def test_identical_uploads_are_stored_once(self):
+        content = png_bytes()
+        first = self.upload(self.ada, content)
+        # Queued before the first finished, so it is spooled too.
+        racing = self.upload(self.grace, content)
+        process_upload(first, self.backend)
+        process_upload(racing, self.backend)
+        stored = self.stored_files()
+
+        # Uploaded after the first finished, so it is never spooled.
+        later = self.upload(self.grace, content)
+        self.assertEqual(later.status, 'done')
+        self.assertEqual(later.spool_path, '')
+        self.assertEqual(os.listdir(self.spool), [])
+
+        first.refresh_from_db()
+        racing.refresh_from_db()
+        self.assertEqual(len(self.backend.saved), 1 + len(settings.IMAGE_DERIVATIVES))
+        self.assertEqual(self.stored_files(), stored)
+        for pending in (racing, later):
+            self.assertEqual((pending.stored_value, pending.manifest), (first.stored_value, first.manifest))
+        self.assertEqual(self.picture(self.grace), (first.stored_value, first.manifest))
+
+        different = self.upload(self.grace, png_bytes(color=(0, 0, 255, 255)))
+        self.assertEqual(different.status, 'pending')
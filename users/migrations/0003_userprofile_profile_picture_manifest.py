@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_alter_userprofile_profile_picture"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="profile_picture_manifest",
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -9,6 +9,7 @@ class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="profile")
     bio = models.TextField(max_length=500, blank=True, null=True)
     profile_picture = CloudinaryField("Profile Picture", blank=True, null=True)
+    profile_picture_manifest = models.JSONField(null=True, blank=True, editable=False)
     address = models.TextField(blank=True, null=True)
     country = models.CharField(max_length=100, blank=True, null=True)
     state = models.CharField(max_length=100, blank=True, null=True)
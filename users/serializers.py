@@ -1,20 +1,23 @@
-import cloudinary.uploader
 from rest_framework import serializers
+from api.serializers import SparseFieldsetMixin
+from uploads.pipeline import queue_upload
 from .models import UserProfile
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
-    Serializer for the UserProfile model, handles Cloudinary uploads.
+    Serializer for the UserProfile model, queues profile pictures for upload.
     """
 
     profile_picture = serializers.ImageField(required=False)
+    profile_picture_manifest = serializers.JSONField(read_only=True)
 
     class Meta:
         model = UserProfile
         fields = [
             "bio",
             "profile_picture",
+            "profile_picture_manifest",
             "address",
             "country",
             "state",
@@ -24,14 +27,14 @@ class UserProfileSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         profile_pic = validated_data.pop('profile_picture', None)
 
-        # Handle Cloudinary upload if a new image is provided
-        if profile_pic:
-            upload_result = cloudinary.uploader.upload(profile_pic)
-            instance.profile_picture = upload_result["secure_url"]
-
-        # Update other fields normally
+        # Update other fields normally. Only they are written, the picture
+        # and its manifest are set by the upload worker meanwhile.
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
-        instance.save()
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+
+        # The new picture is pushed to Cloudinary by the process_uploads worker
+        if profile_pic:
+            queue_upload(instance, "profile_picture", profile_pic)
         return instance
\ No newline at end of file
@@ -1,3 +1,95 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from rest_framework.test import APIClient
+from authentication.models import User
+from uploads.handlers import INVALID_IMAGE
+from uploads.models import PendingUpload
+from .models import UserProfile
+from .serializers import UserProfileSerializer
 
-# Create your tests here.
+
+
+class UserProfileSerializerTests(TestCase):
+
+    def test_update_keeps_a_picture_stored_meanwhile(self):
+        user = User.objects.create_user(email="ada@example.com", password="x", first_name="Ada", last_name="Lovelace")
+        profile = UserProfile.objects.get(user=user)
+        # The upload worker finishes while the request is being handled.
+        UserProfile.objects.filter(pk=profile.pk).update(
+            profile_picture='ada', profile_picture_manifest={'thumbnail': 'ada_thumb.png'}
+        )
+
+        serializer = UserProfileSerializer(profile, data={'bio': 'Mathematician'}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+
+        stored = UserProfile.objects.get(pk=profile.pk)
+        self.assertEqual(stored.bio, 'Mathematician')
+        self.assertEqual(str(stored.profile_picture), 'ada')
+        self.assertEqual(stored.profile_picture_manifest, {'thumbnail': 'ada_thumb.png'})
+
+
+
+class UserProfileUploadTests(TestCase):
+    """
+    Pictures that are not images are refused with a 400 on PUT and PATCH,
+    however short they are.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="ada@example.com", password="x", first_name="Ada", last_name="Lovelace")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def send(self, method, content):
+        picture = SimpleUploadedFile("picture.png", content, content_type="image/png")
+        return getattr(self.client, method)(
+            "/api/users/profile/", {"bio": "Mathematician", "profile_picture": picture}, format="multipart"
+        )
+
+    def test_short_file_is_rejected(self):
+        for method in ("patch", "put"):
+            response = self.send(method, b"GIF8")
+            self.assertEqual(response.status_code, 400, method)
+            self.assertEqual(response.data["errors"], {"profile_picture": [INVALID_IMAGE]})
+        self.assertFalse(PendingUpload.objects.exists())
+        self.assertEqual(UserProfile.objects.get(user=self.user).bio, None)
+
+    def test_put_rejects_what_patch_rejects(self):
+        response = self.send("put", b"not an image, just some text")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"], {"profile_picture": [INVALID_IMAGE]})
+
+
+
+class UserProfileConditionalTests(TestCase):
+    """
+    The profile answers a conditional GET with 304 until it is updated.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="ada@example.com", password="x", first_name="Ada", last_name="Lovelace")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_unchanged_profile_is_not_modified(self):
+        first = self.client.get("/api/users/profile/")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.client.get("/api/users/profile/", HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        trimmed = self.client.get("/api/users/profile/?fields=bio", HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(trimmed.status_code, 200)
+        self.assertEqual(set(trimmed.json()['data']), {'bio'})
+
+    def test_updated_profile_is_sent_again(self):
+        first = self.client.get("/api/users/profile/")
+        self.assertEqual(self.client.patch("/api/users/profile/", {"bio": "Mathematician"}, format="multipart").status_code, 200)
+        second = self.client.get("/api/users/profile/", HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()['data']['bio'], "Mathematician")
@@ -7,12 +7,19 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
 from django.db import transaction
+from api.conditional import make_etag, not_modified, with_validators
+from api.serializers import SPARSE_FIELDSET_PARAMETERS, fieldset_key
+from uploads.handlers import StreamingUploadMixin
+
+from donations.history import donor_totals
+from donations.models import Donation
+from donations.serializers import DonationHistorySerializer
 
 from .serializers import UserProfileSerializer
 from .models import UserProfile
 
 
-class UserProfileView(RetrieveUpdateAPIView):
+class UserProfileView(StreamingUploadMixin, RetrieveUpdateAPIView):
     """
     Retrieve and update the authenticated user's profile.
     """
@@ -25,6 +32,7 @@ class UserProfileView(RetrieveUpdateAPIView):
     @swagger_auto_schema(
         operation_summary="User Profile",
         operation_description="Retrieve the authenticated user's profile.",
+        manual_parameters=SPARSE_FIELDSET_PARAMETERS,
         responses={
             200: openapi.Response(
                 "User Profile",
@@ -61,12 +69,17 @@ class UserProfileView(RetrieveUpdateAPIView):
     )
     def get(self, request, *args, **kwargs):
         instance = self.get_object()
+        etag = make_etag(instance.pk, instance.updated_at.isoformat(), fieldset_key(request))
+        response = not_modified(request, etag=etag, last_modified=instance.updated_at)
+        if response:
+            return response
+        
         serializer = self.get_serializer(instance)
-        return Response({
+        return with_validators(Response({
             "success": True,
             "message": "User profile retrieved successfully.",
             "data": serializer.data
-        })
+        }), etag=etag, last_modified=instance.updated_at)
 
     @swagger_auto_schema(
         operation_summary="Update User Profile",
@@ -98,10 +111,30 @@ class UserProfileView(RetrieveUpdateAPIView):
             ),
         }
     )
-    @transaction.atomic
     def patch(self, request, *args, **kwargs):
+        return self.update(request, *args, partial=True, **kwargs)
+
+    @swagger_auto_schema(
+        operation_summary="Replace User Profile",
+        operation_description="Replace the authenticated user profile. Fields left out are validated as for a new profile.",
+        request_body=UserProfileSerializer,
+        consumes=["multipart/form-data"],
+        responses={
+            200: openapi.Response("Profile Updated", UserProfileSerializer),
+            400: "Bad Request",
+        }
+    )
+    def put(self, request, *args, **kwargs):
+        return self.update(request, *args, **kwargs)
+
+    @transaction.atomic
+    def update(self, request, *args, partial=False, **kwargs):
+        # PUT and PATCH both land here so neither skips the upload check.
+        rejected = self.rejected_uploads_response(request)
+        if rejected:
+            return rejected
         instance = self.get_object()
-        serializer = self.get_serializer(instance, data=request.data, partial=True)
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
         if serializer.is_valid():
             serializer.save()
             return Response({
@@ -117,5 +150,47 @@ class UserProfileView(RetrieveUpdateAPIView):
 
 
 
+class UserDonationHistoryView(GenericAPIView):
+    """
+    The authenticated user's donations, newest first, with their lifetime
+    totals.
+    """
+    serializer_class = DonationHistorySerializer
+    permission_classes = [IsAuthenticated]
+    keyset_ordering = ('-donation_date',)
+
+    def get_queryset(self):
+        # Served from donation_donor_history_idx plus the campaign's primary key.
+        return (
+            Donation.objects.filter(donor=self.request.user)
+            .select_related('campaign')
+            .only('id', 'amount', 'is_anonymous', 'donation_date', 'campaign__title', 'campaign__slug')
+        )
+
+    @swagger_auto_schema(
+        operation_summary="Donation History",
+        operation_description=(
+            "Retrieve the authenticated user's donations, newest first, with the campaign title and slug. "
+            "Follow `pagination.next` for the next page. `totals` are the user's lifetime totals, including "
+            "archived months that are no longer listed. If some archived months cannot be counted, "
+            "`totals.counted_since` is the date the totals start from, otherwise it is null."
+        ),
+        responses={
+            200: openapi.Response("Donation History", DonationHistorySerializer(many=True)),
+        }
+    )
+    def get(self, request):
+        donations = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(donations, many=True)
+        return Response({
+            "success": True,
+            "message": "Donation history retrieved successfully." if donations else "No donations yet.",
+            "data": serializer.data,
+            "totals": donor_totals(request.user.pk),
+            "pagination": self.paginator.get_links(),
+        }, status=status.HTTP_200_OK)
+
+
+
 class UserDashboardView(GenericAPIView):
     pass
\ No newline at end of file